@@ -1,7 +1,9 @@
-import pandas as pd 
-import re
-import sqlite3
+# Heavy modules (numpy, pandas, sqlite3, hashlib, re) are imported inside the functions that need them,
+# so --help and invalid-argument runs start without paying for them
 from argparse import ArgumentParser
+import functools
+import json
+import os
 import sys
 
 # Dictionary mapping team codes to team names
@@ -13,6 +15,570 @@ nhl_teams = {"ANH":"Anaheim Ducks","ARI":"Arizona Coyotes","BOS":"Boston Bruins"
         "SEA":"Seattle Kraken","STL":"St. Louis Blues","TB":"Tampa Bay Lightning","TOR":"Toronto Maple Leafs","VAN":"Vancouver Canucks",\
         "VGK":"Vegas Golden Knights","WAS":"Washington Capitals","WPG":"Winnipeg Jets"}
 
+# Dictionary mapping leaderboard names to the table and stat column they rank by
+LEADERBOARDS = {"goals": ("skaters", "G"), "hits": ("skaters", "Hits"), "pim": ("skaters", "PIM"),\
+        "goalies": ("goalies", "SV%")}
+
+# Dictionary mapping table names to the CSV files they are read from
+TABLE_FILES = {"skaters": "nhl-stats_1.csv", "goalies": "nhl-stats_2.csv"}
+
+# Columns every leaderboard prints alongside its stat
+BASE_COLUMNS = ["Player Name", "Team"]
+
+# Directory holding the columnar copies of the CSV inputs
+CACHE_DIR = ".nhl_cache"
+
+# Stat columns summed when several seasons or game logs are aggregated, and the descriptive
+# columns kept from each player's most recent row
+AGGREGATE_STATS = ["G", "A", "Hits", "PIM", "SV", "SA"]
+AGGREGATE_LAST = ["Team", "Pos"]
+
+# Columns that tell apart players who share a name: a player id when the files have one,
+# otherwise the position
+PLAYER_IDS = ["Player ID", "Pos"]
+
+# SQLite database the player data is saved to, and the season rows are filed under by default
+DB_PATH = "nhl_players.db"
+DEFAULT_SEASON = "2023-24"
+
+# Dictionary mapping leaderboard stat columns to the SQL expressions that rank them
+SQL_STATS = {"G": "goals", "Hits": "hits", "PIM": "penalty_minutes",\
+        "SV%": "saves * 1.0 / (saves + goals_allowed)"}
+
+# Dictionary mapping leaderboard stat columns to the (prefix, middle, suffix) of their text report lines
+REPORT_LINES = {"G": ("Top scorer #:", " scored ", " goals."), "SV%": ("Top Goalie #:", " has ", " save percentage."),\
+        "Hits": ("Top Hitters #:", " has ", " Hits."), "PIM": ("Top Penalty Minutes #:", " has ", " minutes.")}
+
+# Dictionary mapping leaderboard stat columns to the titles of their grouped reports
+REPORT_TITLES = {"G": "Goal Scorers", "SV%": "Goalies", "Hits": "Hitters", "PIM": "Penalty Minutes"}
+
+# Output formats the leaderboards can be rendered in
+REPORT_FORMATS = ["text", "csv", "jsonl", "markdown"]
+
+
+class ProfileStage:
+    """
+    A context manager that times one stage of the pipeline for a Profiler.
+
+    Attributes:
+    - name (str): The stage name.
+    - rows (int): The number of rows the stage processed; may be set inside the 'with' block.
+    - peak (int): The highest traced memory seen during the stage, in bytes.
+
+    Methods:
+    - None
+    """
+    __slots__ = ("profiler", "name", "rows", "start", "base", "peak", "depth")
+
+    def __init__(self, profiler, name, rows=None):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+        self.start = None
+
+    def __enter__(self):
+        if not self.profiler.enabled:
+            return self
+        import time
+        import tracemalloc
+        stack = self.profiler.stack
+        current, peak = tracemalloc.get_traced_memory()
+        # The peak counter is shared, so hand the enclosing stage its peak before resetting it
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, peak)
+        tracemalloc.reset_peak()
+        self.base = self.peak = current
+        self.depth = len(stack)
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.start is None:
+            return False
+        import time
+        import tracemalloc
+        seconds = time.perf_counter() - self.start
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        stack = self.profiler.stack
+        stack.pop()
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, self.peak)
+        self.profiler.stages.append({"stage": self.name, "depth": self.depth, "seconds": seconds,\
+                "rows": self.rows, "peak_memory_bytes": self.peak - self.base})
+        return False
+
+
+class Profiler:
+    """
+    Records wall time, rows processed and peak memory for each stage of the NHL pipeline.
+
+    Recording is off until start() is called, so the hooks cost only a flag check otherwise.
+    Peak memory is the most traced memory (tracemalloc) used above the stage's starting point.
+
+    Attributes:
+    - enabled (bool): Whether stages are being recorded.
+    - stages (list): One dict per finished stage, in the order they finished.
+    - tracing (bool): Whether start() turned tracemalloc on, so stop() should turn it off.
+
+    Methods:
+    - start(): Turns recording on, tracing memory if it is not traced already.
+    - stop(): Turns recording off, leaving tracemalloc as start() found it.
+    - stage(name, rows): Returns a context manager that records one stage.
+    - report(): Returns the recorded stages and a per-stage summary.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.stages = []
+        self.stack = []
+        self.tracing = False
+
+    def start(self):
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.tracing = True
+        self.enabled = True
+
+    def stop(self):
+        import tracemalloc
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+        self.enabled = False
+
+    def stage(self, name, rows=None):
+        """
+        Returns a context manager that records one stage.
+
+        Parameters:
+        - name (str): The stage name.
+        - rows (int): The number of rows the stage processes, if known up front.
+
+        Returns:
+        - ProfileStage: The context manager.
+        """
+        return ProfileStage(self, name, rows)
+
+    def report(self):
+        """
+        Returns the recorded stages and a summary per stage name.
+
+        Returns:
+        - dict: 'stages' (every recorded stage) and 'summary' (calls, seconds, rows and the
+          largest peak memory per stage name).
+        """
+        summary = {}
+        for stage in self.stages:
+            total = summary.setdefault(stage["stage"], {"calls": 0, "seconds": 0.0, "rows": 0,\
+                    "peak_memory_bytes": 0})
+            total["calls"] += 1
+            total["seconds"] += stage["seconds"]
+            total["rows"] += stage["rows"] or 0
+            total["peak_memory_bytes"] = max(total["peak_memory_bytes"], stage["peak_memory_bytes"])
+        return {"stages": self.stages, "summary": summary}
+
+
+# The profiler the pipeline's hooks report to (enabled by --profile)
+PROFILER = Profiler()
+
+
+def profiled(name, rows=None):
+    """
+    Decorates a function so each call is recorded as a PROFILER stage.
+
+    Parameters:
+    - name (str): The stage name.
+    - rows (function): Called with the function's result and arguments to count the rows
+      processed (optional).
+
+    Returns:
+    - function: The decorator.
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+            with PROFILER.stage(name) as stage:
+                result = function(*args, **kwargs)
+                if rows is not None:
+                    stage.rows = rows(result, *args, **kwargs)
+            return result
+        return wrapper
+    return decorate
+
+
+def frame_rows(result, df, *args, **kwargs):
+    """
+    Counts the rows of the DataFrame passed as a stage's first argument (for profiled).
+    """
+    return len(df)
+
+
+def handler_rows(result, handler, *args, **kwargs):
+    """
+    Counts the rows of a PlayerHandler's table (for profiled methods).
+    """
+    return len(handler.df)
+
+
+def file_digest(file_path):
+    """
+    Computes the SHA-1 hash of a file's contents.
+
+    Parameters:
+    - file_path (str): The path to the file.
+
+    Returns:
+    - str: The hex digest of the file.
+    """
+    import hashlib
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as fp:
+        for block in iter(lambda: fp.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_stats_cache(df, bundle_path, meta_path, meta):
+    """
+    Writes a DataFrame to a NumPy .npz bundle with one typed array per column.
+
+    Parameters:
+    - df (pandas.DataFrame): The parsed CSV table.
+    - bundle_path (str): Where to write the .npz bundle.
+    - meta_path (str): Where to write the JSON file describing the bundle.
+    - meta (dict): The source file's size, mtime and hash.
+
+    Returns:
+    - None
+    """
+    import numpy as np
+    import pandas as pd
+    arrays = {}
+    for i, column in enumerate(df.columns):
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            arrays[f"c{i}"] = values.to_numpy()
+        else:
+            # Text columns are stored as fixed-width unicode so no pickling is needed,
+            # with a mask of the missing values so they come back as NaN rather than ""
+            missing = values.isna().to_numpy()
+            arrays[f"c{i}"] = values.fillna("").astype(str).to_numpy(dtype=str)
+            if missing.any():
+                arrays[f"n{i}"] = missing
+    meta = dict(meta, columns=[str(column) for column in df.columns])
+    # Write to temporary files first so an interrupted run never leaves a half-written cache
+    with open(bundle_path + ".tmp", "wb") as fp:
+        np.savez(fp, **arrays)
+    os.replace(bundle_path + ".tmp", bundle_path)
+    with open(meta_path + ".tmp", "w") as fp:
+        json.dump(meta, fp)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def read_stats_csv(file_path, columns=None, cache_dir=CACHE_DIR, skiprows=1, optional=()):
+    """
+    Reads an NHL stats CSV through a columnar cache.
+
+    The first read parses the CSV and saves it as a NumPy .npz bundle in cache_dir. Later
+    reads load only the requested columns from the bundle as long as the CSV is unchanged:
+    its size and modification time are checked first, and the contents are hashed only when
+    the modification time moved, so touching a file does not force a re-parse.
+
+    Parameters:
+    - file_path (str): The path to the CSV file.
+    - columns (list): The columns to load, or None for all of them.
+    - cache_dir (str): The cache directory, or None to always parse the CSV.
+    - skiprows (int): The number of title rows above the CSV header.
+    - optional (list): More columns to load when the file has them.
+
+    Returns:
+    - pandas.DataFrame: The requested columns of the table.
+    """
+    import numpy as np
+    import pandas as pd
+    if cache_dir is None:
+        wanted = None if columns is None else list(columns) + [column for column in optional if column not in columns]
+        with PROFILER.stage("csv parse") as stage:
+            df = pd.read_csv(file_path, skiprows=skiprows, usecols=None if wanted is None else wanted.__contains__)
+            stage.rows = len(df)
+        if columns is None:
+            return df
+        missing = [column for column in columns if column not in df.columns]
+        if missing:
+            raise KeyError(f"Columns not found in {file_path}: {missing}")
+        return df[[column for column in wanted if column in df.columns]]
+    import hashlib
+    os.makedirs(cache_dir, exist_ok=True)
+    # Files with the same name in different directories get their own cache entries
+    path = os.path.abspath(file_path)
+    name = os.path.basename(path) + "-" + hashlib.sha1(path.encode()).hexdigest()[:12]
+    bundle_path = os.path.join(cache_dir, name + ".npz")
+    meta_path = os.path.join(cache_dir, name + ".json")
+    source = os.stat(file_path)
+    try:
+        with open(meta_path) as fp:
+            meta = json.load(fp)
+    except (OSError, ValueError):
+        meta = None
+    fresh = meta is not None and os.path.exists(bundle_path) and meta.get("skiprows") == skiprows\
+            and meta.get("size") == source.st_size
+    if fresh and meta.get("mtime_ns") != source.st_mtime_ns:
+        # The file was touched; only a change in contents makes the cache stale
+        fresh = meta.get("sha1") == file_digest(file_path)
+        if fresh:
+            meta["mtime_ns"] = source.st_mtime_ns
+            with open(meta_path, "w") as fp:
+                json.dump(meta, fp)
+    if not fresh:
+        with PROFILER.stage("csv parse") as stage:
+            df = pd.read_csv(file_path, skiprows=skiprows)
+            stage.rows = len(df)
+        write_stats_cache(df, bundle_path, meta_path, {"size": source.st_size,\
+                "mtime_ns": source.st_mtime_ns, "sha1": file_digest(file_path), "skiprows": skiprows})
+        if columns is None:
+            return df
+        return df[list(columns) + [column for column in optional if column in df.columns and column not in columns]]
+    positions = {column: i for i, column in enumerate(meta["columns"])}
+    wanted = meta["columns"] if columns is None else list(columns)\
+            + [column for column in optional if column in positions and column not in columns]
+    missing = [column for column in wanted if column not in positions]
+    if missing:
+        raise KeyError(f"Columns not found in {file_path}: {missing}")
+    # An .npz bundle is read lazily, so only the requested columns are loaded from disk
+    with PROFILER.stage("cache load") as stage, np.load(bundle_path, allow_pickle=False) as bundle:
+        df = pd.DataFrame({column: cached_column(bundle, positions[column]) for column in wanted})
+        stage.rows = len(df)
+    return df
+
+
+def cached_column(bundle, i):
+    """
+    Loads one column of a stats cache bundle, restoring missing text values as NaN.
+
+    Parameters:
+    - bundle (numpy.lib.npyio.NpzFile): The open .npz bundle.
+    - i (int): The column's position in the table.
+
+    Returns:
+    - pandas.Series: The column, typed as pandas.read_csv would type it.
+    """
+    import numpy as np
+    import pandas as pd
+    values = bundle[f"c{i}"]
+    if values.dtype.kind != "U":
+        return pd.Series(values)
+    values = values.astype(object)
+    if f"n{i}" in bundle.files:
+        values[bundle[f"n{i}"]] = np.nan
+    return pd.Series(values)
+
+
+def expand_inputs(patterns):
+    """
+    Expands input paths, directories and glob patterns into a sorted list of CSV files.
+
+    Parameters:
+    - patterns (list): File paths, directories (all of their .csv files) or glob patterns.
+
+    Returns:
+    - list: The matching file paths.
+    """
+    import glob
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.csv")
+        paths.extend(sorted(glob.glob(pattern)) if glob.has_magic(pattern) or not os.path.exists(pattern) else [pattern])
+    return paths
+
+
+def iter_stat_chunks(paths, chunksize=100000, skiprows=1):
+    """
+    Reads stat files one chunk at a time, keeping only the columns aggregation uses.
+
+    Parameters:
+    - paths (list): The CSV files to read, in order.
+    - chunksize (int): The number of rows per chunk.
+    - skiprows (int): The number of title rows above each file's header.
+
+    Returns:
+    - generator: DataFrame chunks, one file after another.
+    """
+    import pandas as pd
+    wanted = set(BASE_COLUMNS + AGGREGATE_STATS + AGGREGATE_LAST + PLAYER_IDS)
+    for path in paths:
+        yield from pd.read_csv(path, skiprows=skiprows, chunksize=chunksize, usecols=lambda column: column in wanted)
+
+
+def player_key(columns):
+    """
+    Returns the columns that identify a player in a table with the given columns.
+
+    Parameters:
+    - columns (list): The table's columns.
+
+    Returns:
+    - list: 'Player Name' plus the first PLAYER_IDS column the table has, if any.
+    """
+    return ["Player Name"] + [column for column in PLAYER_IDS if column in columns][:1]
+
+
+@profiled("aggregate", rows=lambda result, *args, **kwargs: sum(len(df) for df in result.values()))
+def aggregate_stats(chunks, by_team=False):
+    """
+    Folds stat chunks into running per-player totals for skaters and goalies.
+
+    Only the running totals (one row per player) are held in memory, never a whole file.
+    Chunks with 'SV' are treated as goalie data. Save percentage is recomputed from the summed
+    saves and shots against rather than averaged.
+    Players are told apart by name plus player id, or plus position when the files have no
+    id column (see player_key), so namesakes are not added together.
+
+    Parameters:
+    - chunks (iterable): DataFrame chunks, e.g. from iter_stat_chunks.
+    - by_team (bool): Keep a player's totals for each team separate instead of combining them.
+
+    Returns:
+    - dict: Maps 'skaters' and 'goalies' to DataFrames of totals, in order of first appearance.
+    """
+    import pandas as pd
+    keys = {}
+    totals = {}
+    for chunk in chunks:
+        table = "goalies" if "SV" in chunk.columns else "skaters"
+        # The first chunk of a table decides its key; later chunks without a key column get it empty
+        if table not in keys:
+            name, *ids = player_key(chunk.columns)
+            keys[table] = [name] + ["Team"] * by_team + ids
+        key = keys[table]
+        chunk = chunk.assign(**{column: None for column in key if column not in chunk.columns})
+        rules = {column: "sum" for column in AGGREGATE_STATS if column in chunk.columns}
+        rules.update({column: "last" for column in AGGREGATE_LAST if column in chunk.columns and column not in key})
+        part = chunk.groupby(key, sort=False, dropna=False).agg(rules)
+        if table in totals:
+            # Merge this chunk's totals into the running totals; unseen players go to the end
+            combined = pd.concat([totals[table], part])
+            rules = {column: rule for column, rule in rules.items() if column in combined.columns}
+            rules.update({column: "sum" if column in AGGREGATE_STATS else "last" for column in combined.columns\
+                    if column not in rules})
+            part = combined.groupby(level=list(range(len(key))), sort=False, dropna=False).agg(rules)
+        totals[table] = part
+    tables = {}
+    for table, df in totals.items():
+        df = df.reset_index()
+        if table == "goalies" and "SA" in df.columns:
+            df["SV%"] = (df["SV"] / df["SA"].where(df["SA"] > 0)).round(3)
+        tables[table] = df
+    return tables
+
+def top_k_positions(values, k):
+    """
+    Returns the row positions of the k largest values, largest first.
+
+    Uses a partial selection (numpy.argpartition) so only the rows that can still make
+    the leaderboard get ordered, instead of sorting the whole column. Ties keep the order
+    the rows appear in the table and missing values always rank last.
+
+    Parameters:
+    - values (array-like): The stat column to rank.
+    - k (int): The number of positions to return.
+
+    Returns:
+    - numpy.ndarray: The positions of the top k values.
+    """
+    import numpy as np
+    keys = np.asarray(values, dtype=float)
+    n = len(keys)
+    k = max(0, min(int(k), n))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    # Missing values rank below every real value, the same way sort_values puts NaN last
+    keys = np.where(np.isnan(keys), -np.inf, keys)
+    if k < n:
+        # Find the k-th largest value without ordering the rest of the column
+        kth = keys[np.argpartition(-keys, k - 1)[k - 1]]
+        # Keep every row tied with the k-th value so the tie can be broken by position
+        candidates = np.flatnonzero(keys >= kth)
+    else:
+        candidates = np.arange(n)
+    # Order the candidates by value (descending), then by their position in the table
+    order = np.lexsort((candidates, -keys[candidates]))
+    return candidates[order[:k]]
+
+
+def map_team_names(teams):
+    """
+    Maps team codes to team names, looking each distinct code up once.
+
+    Parameters:
+    - teams (pandas.Series): Team codes (e.g. 'BOS').
+
+    Returns:
+    - numpy.ndarray: The team names, NaN where a code is missing or unknown.
+    """
+    import numpy as np
+    import pandas as pd
+    codes, uniques = pd.factorize(teams)
+    # Code -1 (a missing team) picks the NaN appended at the end
+    names = np.append(pd.Series(uniques).map(nhl_teams).to_numpy(dtype=object), np.nan)
+    return names[codes]
+
+
+def grouped_top_k(df, column, num, by):
+    """
+    Returns the top num rows by a stat column within each group.
+
+    Rows are ordered by group, then stat (descending), then table position in one lexsort,
+    and each row's rank in its group is read off from where the group starts.
+
+    Parameters:
+    - df (pandas.DataFrame): The data, with 'Player Name' and 'Team Name'.
+    - column (str): The stat column to rank by.
+    - num (int): The number of rows to keep per group.
+    - by (list): The columns to group by.
+
+    Returns:
+    - pandas.DataFrame: The group columns, 'Rank', 'Player Name', 'Team Name' and the stat.
+    """
+    import numpy as np
+    import pandas as pd
+    values = df[column].to_numpy(dtype=float, na_value=np.nan)
+    values = np.where(np.isnan(values), -np.inf, values)
+    group_codes = [pd.factorize(df[key], sort=True)[0] for key in by]
+    # np.lexsort treats its last key as the primary one
+    order = np.lexsort([np.arange(len(df)), -values] + group_codes[::-1])
+    if group_codes:
+        sorted_codes = np.stack([codes[order] for codes in group_codes])
+        new_group = np.r_[True, (sorted_codes[:, 1:] != sorted_codes[:, :-1]).any(axis=0)] if len(order) else\
+                np.zeros(0, dtype=bool)
+    else:
+        new_group = np.r_[True, np.zeros(max(len(order) - 1, 0), dtype=bool)][:len(order)]
+    starts = np.flatnonzero(new_group)
+    ranks = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)])) + 1
+    keep = order[ranks <= num]
+    result = df.iloc[keep][list(by) + ['Player Name', 'Team Name', column]].reset_index(drop=True)
+    result.insert(len(by), 'Rank', ranks[ranks <= num])
+    return result
+
+
+def grouped_boards(df, boards, by):
+    """
+    Runs grouped_top_k for several stat columns (used by the process-pool backend).
+
+    Parameters:
+    - df (pandas.DataFrame): The data for one partition.
+    - boards (dict): Maps a stat column to the number of rows wanted per group.
+    - by (list): The columns to group by.
+
+    Returns:
+    - dict: Maps each stat column to its grouped leaderboard.
+    """
+    return {column: grouped_top_k(df, column, num, by) for column, num in boards.items()}
+
+
 class Player:
     """
     A class that represents an NHL player.
@@ -23,16 +589,21 @@ class Player:
     - position (str): The playing position of the player (e.g., Forward, Defense).
     - goals (int): The number of goals scored by the player.
     - penalty_minutes (int): The total penalty minutes accumulated by the player.
+    - hits (int): The number of hits made by the player.
 
     Methods:
     - None
     """
-    def __init__(self, name, team, position, goals, penalty_minutes):
+    # Fixed attribute slots instead of a per-object __dict__
+    __slots__ = ("name", "team", "position", "goals", "penalty_minutes", "hits")
+
+    def __init__(self, name, team, position, goals, penalty_minutes, hits=0):
         self.name = name
         self.team = team
         self.position = position
         self.goals = goals
         self.penalty_minutes = penalty_minutes
+        self.hits = hits
 
 class Team:
     """
@@ -43,11 +614,34 @@ class Team:
     - players (list): A list of Player objects representing the team's players.
 
     Methods:
-    - None
+    - extract_team_code(player_info): Extracts the team code from player information.
     """
+    __slots__ = ("name", "players")
+
     def __init__(self, name, players):
         self.name = name
         self.players = players
+
+    @staticmethod
+    def extract_team_code(player_info):
+        """
+        Extracts the team code from player information.
+
+        Parameters:
+        - player_info (str): Player information containing the team code in parentheses.
+
+        Returns:
+        - str: The extracted team code if found, or None if not found.
+        """
+        import re
+        # Use a regular expression to search for a team code in parentheses
+        match = re.search(r'\(([A-Z]+)\)', player_info)
+        if match:
+            # If a match is found, return the extracted team code
+            return match.group(1)
+        else:
+            # If no match is found, return None
+            return None
  
 
 class PlayerHandler:
@@ -65,12 +659,78 @@ class PlayerHandler:
     - read_goalies_data(file_path): Reads goalies data from a CSV file.
     - calculate_save_percentage(goalies): Calculates save percentage for each goalie.
     - top_goalies_by_save_percentage(goalies, num_goalies=5): Returns the top goalies based on save percentage.
+    - leaderboards(boards): Returns the top rows for several stat columns at once.
+    - grouped_leaderboards(boards, by): Returns the top rows of every group (e.g. team and position).
     """
+    @profiled("team names", rows=handler_rows)
     def __init__(self,df):
         self.df = df
         self.names = []
-        self.df['Team Name'] = df['Team'].map(nhl_teams)
+        self.boards = {}
+        # Map the team codes once per table; a table that already has team names keeps them
+        if 'Team Name' not in df.columns:
+            self.df['Team Name'] = map_team_names(df['Team'])
 
+    @profiled("rank", rows=handler_rows)
+    def leaderboards(self, boards):
+        """
+        Returns the top rows for several stat columns in one call.
+
+        Each column is ranked with a partial top-k selection rather than a full sort, and
+        the results are kept so later requests for the same board are not recomputed.
+
+        Parameters:
+        - boards (dict): Maps a stat column (e.g. 'G', 'Hits') to the number of rows wanted.
+
+        Returns:
+        - dict: Maps each requested stat column to a DataFrame of its top rows.
+        """
+        import numpy as np
+        results = {}
+        for column, num in boards.items():
+            cached = self.boards.get(column)
+            # Reuse a board that was already computed with at least as many rows
+            if cached is None or cached[0] < num:
+                positions = top_k_positions(self.df[column].to_numpy(dtype=float, na_value=np.nan), num)
+                cached = (num, self.df.iloc[positions])
+                self.boards[column] = cached
+            results[column] = cached[1].head(num)
+        return results
+
+
+    @profiled("grouped rank", rows=handler_rows)
+    def grouped_leaderboards(self, boards, by=("Team", "Pos"), position=None, workers=None):
+        """
+        Returns the top rows for several stat columns within every group, e.g. "top 3 hitters
+        per team per position".
+
+        Groups are ranked with one vectorized sort per stat column. With workers, the table is
+        split by team and the teams are ranked in a process pool instead, which only pays off for
+        very large inputs such as game logs; the results are the same either way.
+
+        Parameters:
+        - boards (dict): Maps a stat column (e.g. 'G', 'Hits') to the number of rows wanted per group.
+        - by (tuple): The columns to group by; columns missing from the table are skipped.
+        - position (str): Only rank skaters playing this position (optional).
+        - workers (int): The number of worker processes, or None to rank in this process.
+
+        Returns:
+        - dict: Maps each requested stat column to a DataFrame of the group columns, 'Rank',
+          'Player Name', 'Team Name' and the stat, ordered by group and then rank.
+        """
+        import pandas as pd
+        df = self.df if position is None else self.filter_skaters_by_position(self.df, position)
+        by = [column for column in by if column in df.columns]
+        if not workers or 'Team' not in by:
+            return {column: grouped_top_k(df, column, num, by) for column, num in boards.items()}
+        from concurrent.futures import ProcessPoolExecutor
+        # Every team is its own group, so teams can be ranked independently and joined in team order;
+        # rows without a team are kept as their own group and come first, as in grouped_top_k
+        groups = list(df.groupby('Team', sort=True, dropna=False))
+        parts = [part for key, part in groups if pd.isna(key)] + [part for key, part in groups if not pd.isna(key)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(grouped_boards, parts, [boards] * len(parts), [by] * len(parts)))
+        return {column: pd.concat([result[column] for result in results], ignore_index=True) for column in boards}
 
     def read_skaters_data(self,file_path):
         """
@@ -82,6 +742,7 @@ class PlayerHandler:
         Returns:
         - A DataFrame containing skaters data.
         """
+        import pandas as pd
         skaters = pd.read_csv(file_path)
         return skaters
 
@@ -109,12 +770,12 @@ class PlayerHandler:
         Returns:
         - The top players based on points.
         """
-        # Sort skaters DataFrame by the 'G' (goals) column in descending order
-        sorted_skaters = self.df.sort_values(by=['G'], ascending=[False])
-        self.names.append(sorted_skaters['Player Name'].head(num_players)) 
+        # Select the top 'num_players' rows by the 'G' (goals) column
+        top_skaters = self.leaderboards({'G': num_players})['G']
+        self.names.append(top_skaters['Player Name'])
 
-        # Return the first 'num_players' rows from the sorted DataFrame
-        return sorted_skaters.head(num_players)
+        # Return the top 'num_players' rows
+        return top_skaters
 
     def read_goalies_data(self,file_path):
         """
@@ -126,6 +787,7 @@ class PlayerHandler:
         Returns:
         - A DataFrame containing goalies data.
         """
+        import pandas as pd
         goalies = pd.read_csv(file_path)
         return goalies
 
@@ -154,10 +816,8 @@ class PlayerHandler:
         Returns:
         - The top goalies based on save percentage.
         """
-        # Sort the goalies DataFrame by 'SV%' (save percentage) in descending order
-        sorted_goalies = self.df.sort_values(by='SV%', ascending=False)
-        # Return the top 'num_goalies' goalies from the sorted DataFrame
-        return sorted_goalies.head(num_goalies)
+        # Return the top 'num_goalies' goalies by 'SV%' (save percentage)
+        return self.leaderboards({'SV%': num_goalies})['SV%']
     
     def top_players_by_hits(self, num_players=10):
         """
@@ -169,10 +829,8 @@ class PlayerHandler:
         Returns:
         - A DataFrame with the top players based on hits.
         """
-        # Sort skaters DataFrame by 'Hits' column in descending order
-        sorted_skaters = self.df.sort_values(by='Hits', ascending=False)
         # Return the top 'num_players' players based on hits
-        return sorted_skaters.head(num_players)
+        return self.leaderboards({'Hits': num_players})['Hits']
 
     def top_players_by_pim(self, num_players=10):
         """
@@ -184,15 +842,285 @@ class PlayerHandler:
         Returns:
         - A DataFrame with the top players based on penalty minutes.
         """
-        # Sort skaters DataFrame by 'PIM' (Penalty Minutes) column in descending order
-        sorted_skaters = self.df.sort_values(by='PIM', ascending=False)
-        # Return the top 'num_players' players based on penalty minutes
-        return sorted_skaters.head(num_players)
+        # Return the top 'num_players' players based on 'PIM' (Penalty Minutes)
+        return self.leaderboards({'PIM': num_players})['PIM']
     
     def get_player_info(self):
         return self.names
 
 
+class LeaderboardState:
+    """
+    A persisted, incrementally updated set of leaderboards.
+
+    The state keeps running totals for every player plus one heap per leaderboard stat over
+    all of them. New rows (e.g. one game night) are folded in with apply(), which only pushes
+    fresh heap entries for the players in those rows; an entry that a later one replaced is
+    skipped when it reaches the top, and the heap is compacted once such entries make up half
+    of it. An update therefore costs time in proportion to the delta rather than the season,
+    even when a player on a board gets worse. Goalie save percentage is recomputed from the
+    summed saves and shots against. Players are told apart as in aggregate_stats (player_key).
+
+    The state file is a log of JSON lines, each holding the totals of the players one save
+    changed, so saving also only writes the delta. The file is rewritten as a single line
+    once the log holds twice as many records as there are players.
+
+    Attributes:
+    - capacity (int): The number of players per leaderboard tables() returns.
+    - players (dict): Maps 'skaters' and 'goalies' to {player key: running totals}.
+    - heaps (dict): Maps each leaderboard stat to its heap of (-value, first seen, key) entries.
+    - current (dict): Maps each leaderboard stat to {player key: the player's live heap entry}.
+
+    Methods:
+    - load(path, capacity): Loads a saved state, or starts an empty one.
+    - from_handler(handler, table, capacity): Starts a state from a PlayerHandler's data.
+    - save(path): Appends the players changed since the last save to the state file.
+    - apply(delta): Folds new rows into the totals and leaderboards.
+    - top(stat, num): Returns the keys of the best players for a stat.
+    - tables(): Returns the leaderboard players of each table as DataFrames.
+    """
+    # Totals kept per player, and the leaderboard stats each table feeds
+    TOTALS = {"skaters": ["G", "A", "Hits", "PIM"], "goalies": ["SV", "SA"]}
+    BOARDS = {"skaters": ["G", "Hits", "PIM"], "goalies": ["SV%"]}
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.next_seq = 0
+        self.players = {"skaters": {}, "goalies": {}}
+        self.heaps = {stat: [] for stats in LeaderboardState.BOARDS.values() for stat in stats}
+        self.current = {stat: {} for stat in self.heaps}
+        self.changed = {table: set() for table in self.players} # players not saved yet
+        self.logged = None # player records in the state file, or None before it is read or written
+
+    @classmethod
+    def load(cls, path, capacity=100):
+        """
+        Loads a saved state, or starts an empty one when the file does not exist.
+
+        A last line cut short by a crash is dropped, so the next save appends after the
+        last complete one.
+
+        Parameters:
+        - path (str): The state file.
+        - capacity (int): The number of players per leaderboard tables() returns.
+
+        Returns:
+        - LeaderboardState: The state.
+        """
+        state = cls(capacity)
+        if not os.path.exists(path):
+            return state
+        good = 0 # length of the file up to its last complete line
+        state.logged = 0
+        with open(path, "rb") as fp:
+            for line in fp:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    saved = json.loads(line)
+                except ValueError:
+                    break
+                good += len(line)
+                state.next_seq = saved["next_seq"]
+                for table, players in saved["players"].items():
+                    state.players[table].update(players)
+                    state.logged += len(players)
+        if good < os.path.getsize(path):
+            with open(path, "r+b") as fp:
+                fp.truncate(good)
+        for table, stats in LeaderboardState.BOARDS.items():
+            for stat in stats:
+                for key, record in state.players[table].items():
+                    state.offer(stat, key, record)
+                state.compact(stat)
+        return state
+
+    @classmethod
+    def from_handler(cls, handler, table, capacity=100):
+        """
+        Starts a state from the data of a PlayerHandler.
+
+        Parameters:
+        - handler (PlayerHandler): The handler holding a skaters or goalies table.
+        - table (str): 'skaters' or 'goalies'.
+        - capacity (int): The number of players per leaderboard tables() returns.
+
+        Returns:
+        - LeaderboardState: The state.
+        """
+        state = cls(capacity)
+        state.apply(handler.df, table)
+        return state
+
+    def save(self, path):
+        """
+        Appends the totals of the players changed since the last save to the state file.
+
+        The whole state is written instead, to a new copy that then replaces the file, when
+        the file is new or the log has grown to twice the number of players.
+
+        Parameters:
+        - path (str): The state file.
+
+        Returns:
+        - None
+        """
+        count = sum(len(players) for players in self.players.values())
+        if self.logged is None or self.logged > 2 * count:
+            with open(path + ".tmp", "w") as fp:
+                fp.write(json.dumps({"next_seq": self.next_seq, "players": self.players}) + "\n")
+            os.replace(path + ".tmp", path)
+            self.logged = count
+        elif any(self.changed.values()):
+            players = {table: {key: self.players[table][key] for key in keys} for table, keys in self.changed.items()}
+            with open(path, "a") as fp:
+                fp.write(json.dumps({"next_seq": self.next_seq, "players": players}) + "\n")
+            self.logged += sum(len(keys) for keys in self.changed.values())
+        self.changed = {table: set() for table in self.players}
+
+    def value(self, stat, record):
+        """
+        Returns a player's value for a leaderboard stat, or None when it has none.
+
+        Save percentage is rounded to three places the same way the CSV data and
+        aggregate_stats round it, so all of them rank goalies alike.
+        """
+        if stat == "SV%":
+            return round(record["SV"] / record["SA"] * 1000) / 1000 if record["SA"] > 0 else None
+        return record[stat]
+
+    def offer(self, stat, key, record):
+        """
+        Pushes a player's new entry onto a leaderboard heap, leaving the old one to be skipped.
+
+        Parameters:
+        - stat (str): The leaderboard stat.
+        - key (str): The player's key.
+        - record (dict): The player's running totals.
+
+        Returns:
+        - None
+        """
+        import heapq
+        current = self.current[stat]
+        value = self.value(stat, record)
+        entry = None if value is None else (-value, record["seq"], key)
+        if entry == current.get(key):
+            return
+        if entry is None:
+            del current[key]
+        else:
+            current[key] = entry
+            heapq.heappush(self.heaps[stat], entry)
+        if len(self.heaps[stat]) > 2 * len(current) + 64:
+            self.compact(stat)
+
+    def compact(self, stat):
+        """
+        Rebuilds a leaderboard heap from the live entries only.
+
+        Parameters:
+        - stat (str): The leaderboard stat.
+
+        Returns:
+        - None
+        """
+        import heapq
+        heap = list(self.current[stat].values())
+        heapq.heapify(heap)
+        self.heaps[stat] = heap
+
+    def top(self, stat, num):
+        """
+        Returns the best players for a leaderboard stat, best first; ties go to the player seen first.
+
+        Replaced entries that reach the top of the heap are dropped on the way.
+
+        Parameters:
+        - stat (str): The leaderboard stat.
+        - num (int): The number of players wanted.
+
+        Returns:
+        - list: The players' keys.
+        """
+        import heapq
+        heap, current = self.heaps[stat], self.current[stat]
+        best = []
+        while heap and len(best) < num:
+            entry = heapq.heappop(heap)
+            # A player whose value went back to an earlier one has two equal entries, popped together
+            if current.get(entry[2]) == entry and (not best or best[-1] != entry):
+                best.append(entry)
+        for entry in best:
+            heapq.heappush(heap, entry)
+        return [entry[2] for entry in best]
+
+    @profiled("incremental update", rows=lambda result, state, delta, *args, **kwargs: len(delta))
+    def apply(self, delta, table=None):
+        """
+        Folds new rows into the running totals and the leaderboards.
+
+        Parameters:
+        - delta (pandas.DataFrame): New stat rows, with the column names used in the nhl-stats CSVs.
+        - table (str): 'skaters' or 'goalies'; by default rows with 'SV' are goalie rows.
+
+        Returns:
+        - int: The number of players whose totals changed.
+        """
+        import pandas as pd
+        table = table or ("goalies" if "SV" in delta.columns else "skaters")
+        totals = [column for column in LeaderboardState.TOTALS[table] if column in delta.columns]
+        key = player_key(delta.columns)
+        rules = {column: "sum" for column in totals}
+        rules.update({column: "last" for column in AGGREGATE_LAST if column in delta.columns and column not in key})
+        # Combine the delta's rows per player first, so each player is updated once
+        delta = delta.groupby(key, sort=False, dropna=False).agg(rules).reset_index()
+        players = self.players[table]
+        touched = []
+        for row in delta.to_dict("records"):
+            ids = [str(row[column]) for column in key[1:] if pd.notna(row[column])]
+            player = "\t".join([row["Player Name"]] + ids)
+            record = players.get(player)
+            if record is None:
+                record = players[player] = {"seq": self.next_seq, "Player Name": row["Player Name"], "Team": None,\
+                        "Pos": None, **{column: 0 for column in LeaderboardState.TOTALS[table]}}
+                self.next_seq += 1
+            for column in totals:
+                record[column] += int(row[column])
+            for column in AGGREGATE_LAST:
+                if column in row and pd.notna(row[column]):
+                    record[column] = row[column]
+            touched.append(player)
+        self.changed[table].update(touched)
+        for stat in LeaderboardState.BOARDS[table]:
+            for player in touched:
+                self.offer(stat, player, players[player])
+        return len(touched)
+
+    def tables(self):
+        """
+        Returns the players on any leaderboard of each table, in the order they were first seen.
+
+        Ranking these rows with PlayerHandler gives the same boards (up to 'capacity' rows) as
+        ranking every player.
+
+        Returns:
+        - dict: Maps 'skaters' and 'goalies' to DataFrames shaped like the aggregated CSV data.
+        """
+        import pandas as pd
+        tables = {}
+        for table, stats in LeaderboardState.BOARDS.items():
+            keys = set().union(*(self.top(stat, self.capacity) for stat in stats))
+            players = self.players[table]
+            rows = [players[key] for key in keys]
+            rows.sort(key=lambda row: row["seq"])
+            df = pd.DataFrame(rows, columns=["Player Name", "Team", "Pos"] + LeaderboardState.TOTALS[table])
+            if table == "goalies":
+                df["SV%"] = [self.value("SV%", row) for row in rows]
+            tables[table] = df
+        return tables
+
+
 class Goalie(Player):
     """
     A class that represents an NHL goalie.
@@ -206,6 +1134,7 @@ class Goalie(Player):
     Methods:
     - None
     """
+    __slots__ = ("saves", "goals_allowed")
 
     def __init__(self, name, country, saves, goals_allowed):
         """
@@ -227,35 +1156,211 @@ class Goalie(Player):
         self.goals_allowed = goals_allowed
 
 
-class Team:
+class Roster:
     """
-    A class for handling NHL team-related functionalities.
+    A compact struct-of-arrays store for a whole roster of players and goalies.
 
-    Methods:
-    - extract_team_code(player_info): Extracts the team code from player information.
+    Each attribute is held as one typed NumPy column instead of one Python object per player.
+    Team codes and positions are interned: each row stores a small integer code into the
+    'teams' and 'positions' tuples. Stats missing for a row (hits for a goalie, saves for a
+    skater) are stored as MISSING.
 
     Attributes:
-    - None
+    - names (numpy.ndarray): Player names (fixed-width unicode).
+    - team_codes (numpy.ndarray): Codes into 'teams' (the smallest unsigned type that holds them).
+    - teams (tuple): The distinct team codes (e.g. 'BOS').
+    - position_codes (numpy.ndarray): Codes into 'positions' (the smallest unsigned type that holds them).
+    - positions (tuple): The distinct playing positions.
+    - goals, hits, penalty_minutes, saves, goals_allowed (numpy.ndarray): Stat columns (int32).
+
+    Methods:
+    - from_dataframe(df, table): Builds a roster from a skaters or goalies DataFrame.
+    - from_players(players): Builds a roster from Player and Goalie objects.
+    - concat(rosters): Joins several rosters, e.g. one per season.
+    - to_dataframe(): Converts the roster to a DataFrame shaped like the CSV data.
+    - to_players(): Converts the roster back to Player and Goalie objects.
     """
+    __slots__ = ("names", "team_codes", "teams", "position_codes", "positions",\
+            "goals", "hits", "penalty_minutes", "saves", "goals_allowed")
+
+    # Value stored for a stat a row does not have
+    MISSING = -1
+
+    # The stat columns, in the order of the Player/Goalie attributes
+    STATS = ("goals", "hits", "penalty_minutes", "saves", "goals_allowed")
+
+    def __init__(self, names, team_codes, teams, position_codes, positions, goals, hits, penalty_minutes,\
+            saves, goals_allowed):
+        import numpy as np
+        self.names = np.asarray(names, dtype=str)
+        self.teams = tuple(teams)
+        self.team_codes = np.asarray(team_codes, dtype=Roster.code_type(self.teams))
+        self.positions = tuple(positions)
+        self.position_codes = np.asarray(position_codes, dtype=Roster.code_type(self.positions))
+        self.goals = np.asarray(goals, dtype=np.int32)
+        self.hits = np.asarray(hits, dtype=np.int32)
+        self.penalty_minutes = np.asarray(penalty_minutes, dtype=np.int32)
+        self.saves = np.asarray(saves, dtype=np.int32)
+        self.goals_allowed = np.asarray(goals_allowed, dtype=np.int32)
+
+    @staticmethod
+    def code_type(values):
+        """
+        Returns the smallest unsigned integer type that can number every one of the values.
+        """
+        import numpy as np
+        return np.min_scalar_type(max(len(values) - 1, 0))
 
-    def extract_team_code(player_info):
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, i):
         """
-        Extracts the team code from player information.
+        Returns one row of the roster as a Player or Goalie object.
 
         Parameters:
-        - player_info (str): Player information containing the team code in parentheses.
+        - i (int): The row position.
 
         Returns:
-        - str: The extracted team code if found, or None if not found.
+        - Player: A Goalie when the row has saves recorded, otherwise a Player.
         """
-        # Use a regular expression to search for a team code in parentheses
-        match = re.search(r'\(([A-Z]+)\)', player_info)
-        if match:
-            # If a match is found, return the extracted team code
-            return match.group(1)
+        team = self.teams[self.team_codes[i]]
+        if self.saves[i] != Roster.MISSING:
+            return Goalie(str(self.names[i]), team, int(self.saves[i]), int(self.goals_allowed[i]))
+        return Player(str(self.names[i]), team, self.positions[self.position_codes[i]], int(self.goals[i]),\
+                int(self.penalty_minutes[i]), int(self.hits[i]))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def nbytes(self):
+        """
+        Returns the number of bytes used by the roster's columns.
+        """
+        return sum(getattr(self, column).nbytes for column in ("names", "team_codes", "position_codes") + Roster.STATS)
+
+    @classmethod
+    def from_dataframe(cls, df, table="skaters"):
+        """
+        Builds a roster from a skaters or goalies DataFrame without looping over its rows.
+
+        Parameters:
+        - df (pandas.DataFrame): The data, with the column names used in the nhl-stats CSVs.
+        - table (str): 'skaters' or 'goalies'.
+
+        Returns:
+        - Roster: The roster holding the DataFrame's players.
+        """
+        import numpy as np
+        import pandas as pd
+
+        def stat(name):
+            # Missing columns and blank cells become MISSING
+            if name not in df.columns:
+                return np.full(len(df), cls.MISSING, dtype=np.int32)
+            values = pd.to_numeric(df[name], errors="coerce")
+            return values.fillna(cls.MISSING).to_numpy(dtype=np.int32)
+
+        team_codes, teams = pd.factorize(df["Team"].astype(str), sort=True)
+        if table == "goalies":
+            positions = ("Goalie",)
+            position_codes = np.zeros(len(df), dtype=np.intp)
+            saves = stat("SV")
+            shots = stat("SA")
+            goals_allowed = np.where((saves == cls.MISSING) | (shots == cls.MISSING), cls.MISSING, shots - saves)
+            goals = np.zeros(len(df), dtype=np.int32)
+            penalty_minutes = np.zeros(len(df), dtype=np.int32)
+            hits = np.full(len(df), cls.MISSING, dtype=np.int32)
         else:
-            # If no match is found, return None
-            return None
+            pos = df["Pos"].astype(str) if "Pos" in df.columns else pd.Series([""] * len(df))
+            position_codes, positions = pd.factorize(pos, sort=True)
+            saves = goals_allowed = np.full(len(df), cls.MISSING, dtype=np.int32)
+            goals, hits, penalty_minutes = stat("G"), stat("Hits"), stat("PIM")
+        return cls(df["Player Name"].astype(str).to_numpy(dtype=str), team_codes, teams, position_codes,\
+                positions, goals, hits, penalty_minutes, saves, goals_allowed)
+
+    @classmethod
+    def from_players(cls, players):
+        """
+        Builds a roster from Player and Goalie objects.
+
+        Parameters:
+        - players (list): A list of Player (or Goalie) objects.
+
+        Returns:
+        - Roster: The roster holding the players.
+        """
+        teams, positions = {}, {}
+        columns = {column: [] for column in ("names", "team_codes", "position_codes") + cls.STATS}
+        for player in players:
+            columns["names"].append(player.name)
+            columns["team_codes"].append(teams.setdefault(player.team, len(teams)))
+            columns["position_codes"].append(positions.setdefault(player.position, len(positions)))
+            for column in cls.STATS:
+                value = getattr(player, column, None)
+                columns[column].append(cls.MISSING if value is None else value)
+            if isinstance(player, Goalie):
+                columns["hits"][-1] = cls.MISSING
+        return cls(columns["names"], columns["team_codes"], teams, columns["position_codes"], positions,\
+                *(columns[column] for column in cls.STATS))
+
+    @classmethod
+    def concat(cls, rosters):
+        """
+        Joins several rosters into one, re-coding their teams and positions.
+
+        Parameters:
+        - rosters (list): The rosters to join, e.g. one per season.
+
+        Returns:
+        - Roster: A roster holding every row, in order.
+        """
+        import numpy as np
+        teams = tuple(sorted(set().union(*(roster.teams for roster in rosters))))
+        positions = tuple(sorted(set().union(*(roster.positions for roster in rosters))))
+
+        def recode(codes, old, new):
+            # Look up every old code's position in the joined tuple at once
+            lookup = np.array([new.index(value) for value in old], dtype=cls.code_type(new))
+            return lookup[codes] if len(lookup) else codes
+
+        return cls(np.concatenate([roster.names for roster in rosters]),\
+                np.concatenate([recode(roster.team_codes, roster.teams, teams) for roster in rosters]), teams,\
+                np.concatenate([recode(roster.position_codes, roster.positions, positions) for roster in rosters]),\
+                positions, *(np.concatenate([getattr(roster, column) for roster in rosters]) for column in cls.STATS))
+
+    def to_dataframe(self):
+        """
+        Converts the roster to a DataFrame shaped like the CSV data.
+
+        Teams and positions become categorical columns and MISSING stats become <NA>.
+
+        Returns:
+        - pandas.DataFrame: Columns 'Player Name', 'Team', 'Pos', 'G', 'Hits', 'PIM', 'SV', 'SA'.
+        """
+        import numpy as np
+        import pandas as pd
+
+        def stat(values):
+            return pd.arrays.IntegerArray(values, values == Roster.MISSING)
+
+        shots = np.where(self.saves == Roster.MISSING, Roster.MISSING, self.saves + self.goals_allowed)
+        return pd.DataFrame({"Player Name": self.names,
+                             "Team": pd.Categorical.from_codes(self.team_codes.astype(np.intp), self.teams),
+                             "Pos": pd.Categorical.from_codes(self.position_codes.astype(np.intp), self.positions),
+                             "G": stat(self.goals), "Hits": stat(self.hits), "PIM": stat(self.penalty_minutes),
+                             "SV": stat(self.saves), "SA": stat(shots.astype(np.int32))})
+
+    def to_players(self):
+        """
+        Converts the roster back to Player and Goalie objects.
+
+        Returns:
+        - list: One Player (or Goalie) object per row.
+        """
+        return list(self)
 
 
 #module 9 - GIT Hub. I am incoperating this module by uplaoding my progress and final into git hub
@@ -266,7 +1371,7 @@ class DataHandler:
     A class for handling NHL data and creating Pandas DataFrames.
 
     Methods:
-    - create_dataframe(players): Creates a Pandas DataFrame from a list of player objects.
+    - create_dataframe(players): Creates a Pandas DataFrame from a list of player objects or a Roster.
 
     Attributes:
     - None
@@ -277,13 +1382,14 @@ class DataHandler:
         Creates a Pandas DataFrame from a list of player objects.
 
         Parameters:
-        - players (list): A list of Player objects.
+        - players (list or Roster): A list of Player objects, or a Roster.
 
         Returns:
         - pandas.DataFrame: A DataFrame containing player data.
         """
-        # Use Pandas to create a DataFrame from the list of player objects
-        return pd.DataFrame(players)
+        # Gather the players into typed columns first, then build the DataFrame from whole columns
+        roster = players if isinstance(players, Roster) else Roster.from_players(players)
+        return roster.to_dataframe()
 
 
 class SQL:
@@ -291,128 +1397,420 @@ class SQL:
     A class for handling SQL operations related to NHL player data.
 
     Methods:
+    - connect(db_path): Opens the database with tuned settings and makes sure the schema exists.
     - create_database(players): Creates an SQLite database and inserts player data.
+    - ingest_dataframe(df, table): Saves a skaters or goalies DataFrame to the database.
+    - leaderboard(column, num): Returns the top players for a stat straight from the database.
+    - leaderboard_frame(table, boards): Returns the rows of several leaderboards as a DataFrame.
+    - stats_frame(table, columns): Returns every player of a table as a DataFrame.
+    - table_rows(table): Returns the SQL condition that picks a table's rows.
 
     Attributes:
     - None
     """
 
-    def create_database(players):
+    def connect(db_path=DB_PATH):
+        """
+        Opens the SQLite database with tuned settings and makes sure the schema exists.
+
+        The database uses write-ahead logging so readers are not blocked by a load, and the
+        players table is keyed on (name, team, season) with an index per leaderboard stat.
+        A table left by older versions (no season, no key) is migrated, collapsing duplicates.
+
+        Parameters:
+        - db_path (str): The path to the database file.
+
+        Returns:
+        - sqlite3.Connection: The open connection.
+        """
+        import sqlite3
+        conn = sqlite3.connect(db_path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-32000')
+        with conn:
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(players)')]
+            if columns and 'season' not in columns:
+                conn.execute('ALTER TABLE players RENAME TO players_v1')
+            conn.execute('CREATE TABLE IF NOT EXISTS players (name TEXT NOT NULL, team TEXT NOT NULL, '
+                         'season TEXT NOT NULL, position TEXT, goals INTEGER, hits INTEGER, penalty_minutes INTEGER, '
+                         'saves INTEGER, goals_allowed INTEGER, PRIMARY KEY (name, team, season))')
+            if columns and 'season' not in columns:
+                conn.execute('INSERT OR REPLACE INTO players (name, team, season, position, goals, penalty_minutes) '
+                             'SELECT name, team, ?, position, goals, penalty_minutes FROM players_v1 '
+                             'WHERE name IS NOT NULL AND team IS NOT NULL', (DEFAULT_SEASON,))
+                conn.execute('DROP TABLE players_v1')
+            # Descending indexes let ORDER BY <stat> DESC LIMIT n read the top rows directly
+            for column, expression in SQL_STATS.items():
+                index = 'players_' + ''.join(ch for ch in column.lower() if ch.isalnum())
+                conn.execute(f'CREATE INDEX IF NOT EXISTS {index} ON players (season, {expression} DESC)')
+        return conn
+
+    def create_database(players, db_path=DB_PATH, season=DEFAULT_SEASON, conn=None):
         """
         Creates an SQLite database and inserts player data.
 
+        All players are written with one executemany call inside a single transaction.
+        A player already stored for the same team and season is updated instead of duplicated.
+
         Parameters:
-        - players (list): A list of Player objects.
+        - players (list): A list of Player (or Goalie) objects.
+        - db_path (str): The path to the database file.
+        - season (str): The season the players' stats belong to.
+        - conn (sqlite3.Connection): An open connection to reuse instead of opening db_path (optional).
 
         Returns:
         - None
         """
-        # Connect to the SQLite database (or create if it doesn't exist)
-        conn = sqlite3.connect('nhl_players.db')
-        # Create a cursor to execute SQL commands
-        c = conn.cursor()
+        rows = ((player.name, player.team, season, player.position, player.goals, getattr(player, 'hits', None),\
+                player.penalty_minutes, getattr(player, 'saves', None), getattr(player, 'goals_allowed', None))\
+                for player in players)
+        SQL.upsert_rows(rows, db_path, conn)
 
-        # Create a table if it doesn't exist with columns: name, team, position, goals, penalty_minutes
-        c.execute('CREATE TABLE IF NOT EXISTS players (name TEXT, team TEXT, position TEXT, goals INTEGER, penalty_minutes INTEGER)')
+    def upsert_rows(rows, db_path=DB_PATH, conn=None):
+        """
+        Inserts or updates player rows in one transaction.
 
-        # Insert player data into the 'players' table
-        for player in players:
-            c.execute('INSERT INTO players VALUES (?, ?, ?, ?, ?)', (player.name, player.team, player.position, player.goals, player.penalty_minutes))
+        Parameters:
+        - rows (iterable): Tuples of (name, team, season, position, goals, hits, penalty_minutes,
+          saves, goals_allowed).
+        - db_path (str): The path to the database file.
+        - conn (sqlite3.Connection): An open connection to reuse instead of opening db_path (optional).
+
+        Returns:
+        - None
+        """
+        own = conn is None
+        if own:
+            conn = SQL.connect(db_path)
+        try:
+            # The connection context manager commits the whole batch at once (or rolls it back)
+            with conn, PROFILER.stage("sqlite write") as stage:
+                stage.rows = conn.executemany('INSERT INTO players VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                                 'ON CONFLICT (name, team, season) DO UPDATE SET position = excluded.position, '
+                                 'goals = excluded.goals, hits = excluded.hits, '
+                                 'penalty_minutes = excluded.penalty_minutes, saves = excluded.saves, '
+                                 'goals_allowed = excluded.goals_allowed', rows).rowcount
+        finally:
+            if own:
+                conn.close()
+
+    def ingest_dataframe(df, table, db_path=DB_PATH, season=DEFAULT_SEASON, conn=None):
+        """
+        Saves a skaters or goalies DataFrame (as read from the nhl-stats CSVs) to the database.
+
+        Parameters:
+        - df (pandas.DataFrame): The skaters or goalies data.
+        - table (str): 'skaters' or 'goalies'.
+        - db_path (str): The path to the database file.
+        - season (str): The season the stats belong to.
+        - conn (sqlite3.Connection): An open connection to reuse instead of opening db_path (optional).
+
+        Returns:
+        - None
+        """
+        def column(name, default=None):
+            # Convert a column to plain Python values, or repeat a default when it is missing
+            if name not in df.columns:
+                return [default] * len(df)
+            values = df[name].astype(object)
+            return values.where(values.notna(), None).tolist()
+
+        if table == 'goalies':
+            saves = column('SV')
+            shots = column('SA')
+            goals_allowed = [None if sv is None or sa is None else int(sa - sv) for sv, sa in zip(saves, shots)]
+            rows = zip(column('Player Name'), column('Team'), [season] * len(df), ['Goalie'] * len(df),\
+                    column('G', 0), column('Hits'), column('PIM', 0), saves, goals_allowed)
+        else:
+            rows = zip(column('Player Name'), column('Team'), [season] * len(df), column('Pos'),\
+                    column('G'), column('Hits'), column('PIM'), [None] * len(df), [None] * len(df))
+        SQL.upsert_rows(rows, db_path, conn)
+
+    def table_rows(table):
+        """
+        Returns the SQL condition that picks the rows of the skaters or the goalies.
+
+        Parameters:
+        - table (str): 'skaters' or 'goalies'.
+
+        Returns:
+        - str: A condition for a WHERE clause on the players table.
+        """
+        # Goalie rows carry saves and skater rows do not, which keeps the two tables apart
+        return 'saves IS NOT NULL' if table == 'goalies' else 'saves IS NULL'
+
+    def leaderboard(column, num, season=DEFAULT_SEASON, db_path=DB_PATH, conn=None):
+        """
+        Returns the top players for a stat straight from the database.
+
+        Parameters:
+        - column (str): The leaderboard stat column ('G', 'Hits', 'PIM' or 'SV%').
+        - num (int): The number of players to return.
+        - season (str): The season to rank.
+        - db_path (str): The path to the database file.
+        - conn (sqlite3.Connection): An open connection to reuse instead of opening db_path (optional).
+
+        Returns:
+        - list: (rowid, name, team, value) tuples, best first; ties keep the order rows were loaded.
+        """
+        expression = SQL_STATS[column]
+        table_filter = SQL.table_rows('goalies' if column == 'SV%' else 'skaters')
+        own = conn is None
+        if own:
+            conn = SQL.connect(db_path)
+        try:
+            return conn.execute(f'SELECT rowid, name, team, {expression} FROM players '
+                                f'WHERE season = ? AND {table_filter} AND {expression} IS NOT NULL '
+                                f'ORDER BY {expression} DESC, rowid LIMIT ?', (season, num)).fetchall()
+        finally:
+            if own:
+                conn.close()
+
+    @profiled("sqlite read", rows=lambda result, *args, **kwargs: len(result))
+    def leaderboard_frame(table, boards, season=DEFAULT_SEASON, db_path=DB_PATH):
+        """
+        Returns the rows of several leaderboards as one DataFrame shaped like the CSV data.
+
+        Parameters:
+        - table (str): 'skaters' or 'goalies'.
+        - boards (dict): Maps a stat column to the number of rows wanted.
+        - season (str): The season to rank.
+        - db_path (str): The path to the database file.
+
+        Returns:
+        - pandas.DataFrame: The union of the boards' rows, in the order they were loaded.
+        """
+        import pandas as pd
+        conn = SQL.connect(db_path)
+        try:
+            rowids = set()
+            for column, num in boards.items():
+                rowids.update(row[0] for row in SQL.leaderboard(column, num, season, conn=conn))
+            # Save percentage is shown to three places, as in the goalies CSV
+            selected = ', '.join(f'ROUND({SQL_STATS[column]}, 3) AS "{column}"' if column == 'SV%'\
+                    else f'{SQL_STATS[column]} AS "{column}"' for column in boards)
+            ids = ', '.join(str(rowid) for rowid in sorted(rowids)) or 'NULL'
+            return pd.read_sql_query(f'SELECT name AS "Player Name", team AS "Team", {selected} FROM players '
+                                     f'WHERE rowid IN ({ids}) ORDER BY rowid', conn)
+        finally:
+            conn.close()
+
+    @profiled("sqlite read", rows=lambda result, *args, **kwargs: len(result))
+    def stats_frame(table, columns, season=DEFAULT_SEASON, db_path=DB_PATH):
+        """
+        Returns every player of a table as a DataFrame shaped like the CSV data.
+
+        Grouped leaderboards rank within each team or position, so they need all of the rows,
+        not just the league-wide leaders that leaderboard_frame fetches.
+
+        Parameters:
+        - table (str): 'skaters' or 'goalies'.
+        - columns (list): The stat columns to return.
+        - season (str): The season to read.
+        - db_path (str): The path to the database file.
+
+        Returns:
+        - pandas.DataFrame: 'Player Name', 'Team', 'Pos' (skaters only) and the stat columns,
+          in the order the rows were loaded.
+        """
+        import pandas as pd
+        selected = ''.join(f', ROUND({SQL_STATS[column]}, 3) AS "{column}"' if column == 'SV%'\
+                else f', {SQL_STATS[column]} AS "{column}"' for column in columns)
+        table_filter = SQL.table_rows(table)
+        # The goalies CSV has no position column
+        if table != 'goalies':
+            selected = ', position AS "Pos"' + selected
+        conn = SQL.connect(db_path)
+        try:
+            return pd.read_sql_query(f'SELECT name AS "Player Name", team AS "Team"{selected} FROM players '
+                                     f'WHERE season = ? AND {table_filter} ORDER BY rowid', conn, params=(season,))
+        finally:
+            conn.close()
+
+
+@profiled("format", rows=lambda result, board, *args, **kwargs: len(board))
+def render_leaderboard(board, column, fmt="text", heading="", groups=()):
+    """
+    Renders a leaderboard as one string, built from whole columns rather than row by row.
+
+    Parameters:
+    - board (pandas.DataFrame): The leaderboard rows, best first, with 'Player Name' and 'Team Name'.
+    - column (str): The stat column the board ranks by (a key of REPORT_LINES).
+    - fmt (str): One of REPORT_FORMATS: 'text', 'csv', 'jsonl' or 'markdown'.
+    - heading (str): A line printed above the board in text format.
+    - groups (list): Group columns of a grouped leaderboard (with its own 'Rank' column), if any.
+
+    Returns:
+    - str: The rendered report.
+    """
+    import pandas as pd
+
+    def text(values):
+        # numpy's str conversion prints missing values as 'nan'/'<NA>', as print() would
+        return pd.Series(values.to_numpy(dtype=object).astype(str), index=values.index)
+
+    if groups and fmt == "text":
+        # Text reports get one headed board per group
+        reports = []
+        for key, rows in board.groupby(list(groups), sort=False):
+            key = key if isinstance(key, tuple) else (key,)
+            label = " ".join(str(rows['Team Name'].iloc[0]) if name == 'Team' else str(value)\
+                    for name, value in zip(groups, key))
+            reports.append(render_leaderboard(rows, column, fmt, f"\n{heading} {label}:\n"))
+        return "".join(reports)
+    ranks = board['Rank'] if groups else pd.Series(range(1, len(board) + 1), index=board.index)
+    if fmt == "text":
+        prefix, middle, suffix = REPORT_LINES[column]
+        lines = prefix + text(ranks) + " " + text(board['Player Name']) + " from " + text(board['Team Name'])\
+                + middle + text(board[column]) + suffix
+        return heading + "".join(lines + "\n")
+    if fmt == "csv":
+        return render_csv_report([(board, column, groups)])
+    table = leaderboard_table(board, column, groups)
+    if fmt == "jsonl":
+        return table.to_json(orient="records", lines=True) if len(table) else ""
+    if fmt == "markdown":
+        # Pipes inside a cell would end it early, so escape them before joining the cells
+        cells = [text(table[name]).str.replace("|", "\\|", regex=False) for name in table.columns]
+        rows = "| " + cells[0].str.cat(cells[1:], sep=" | ") + " |"
+        header = "| " + " | ".join(table.columns) + " |\n|" + "---|" * len(table.columns) + "\n"
+        return header + "".join(rows + "\n") + "\n"
+    raise ValueError(f"Unknown report format: {fmt}")
+
+
+def leaderboard_table(board, column, groups=()):
+    """
+    Returns the columns of a leaderboard that the csv, jsonl and markdown formats write.
+
+    Parameters:
+    - board (pandas.DataFrame): The leaderboard rows, best first, with 'Player Name' and 'Team Name'.
+    - column (str): The stat column the board ranks by.
+    - groups (list): Group columns of a grouped leaderboard (with its own 'Rank' column), if any.
+
+    Returns:
+    - pandas.DataFrame: The group columns, 'Rank', 'Player Name', 'Team Name' and the stat.
+    """
+    import pandas as pd
+    ranks = board['Rank'] if groups else pd.Series(range(1, len(board) + 1), index=board.index)
+    return pd.DataFrame({**{name: board[name] for name in groups}, "Rank": ranks,\
+            "Player Name": board['Player Name'], "Team Name": board['Team Name'], column: board[column]})
 
-        # Commit the changes to the database and close the connection
-        conn.commit()
-        conn.close()
 
+def render_csv_report(boards):
+    """
+    Renders one or more leaderboards as a single CSV table.
+
+    The boards are stacked under one header: a 'board' column names each row's stat and a
+    'value' column holds it, and group columns a board does not have are left empty.
 
-def goal_scorers_analysis(sdf, num):
+    Parameters:
+    - boards (list): (board, column, groups) triples, as passed to render_leaderboard.
+
+    Returns:
+    - str: The CSV text.
+    """
+    import pandas as pd
+    tables = []
+    groups = []
+    for board, column, board_groups in boards:
+        table = leaderboard_table(board, column, board_groups).rename(columns={column: "value"})
+        table.insert(0, "board", column)
+        tables.append(table)
+        groups += [name for name in board_groups if name not in groups]
+    columns = ["board"] + groups + ["Rank", "Player Name", "Team Name", "value"]
+    if not tables:
+        return pd.DataFrame(columns=columns).to_csv(index=False)
+    return pd.concat(tables, ignore_index=True)[columns].to_csv(index=False)
+
+
+@profiled("goal_scorers_analysis", rows=frame_rows)
+def goal_scorers_analysis(sdf, num, handler=None, fmt="text"):
     """
     Analyzes skaters' data and prints the top goal scorers.
 
     Parameters:
     - sdf (pandas.DataFrame): DataFrame containing skaters' data.
     - num (int): The number of top goal scorers to display.
+    - handler (PlayerHandler): An existing handler for the same data to reuse (optional).
+    - fmt (str): The report format (see render_leaderboard).
 
     Returns:
     - names list
     """
     # Create a PlayerHandler instance
-    players = PlayerHandler(sdf)
-    # Get the top goal scorers using the PlayerHandler instance
+    players = handler if handler is not None else PlayerHandler(sdf)
+    # Get the top goal scorers (already ordered by goals) using the PlayerHandler instance
     top_scorers = players.top_players_by_goals(num)
-    # Sort the top scorers DataFrame by goals (G) in descending order
-    sorted_top_scorers = top_scorers.sort_values(by='G', ascending=False)
-    sorted_top_scorers.index = range(1,len(sorted_top_scorers) + 1)
-    # Print information about the top goal scorers
-    print(f"\nTop {num} Goal Scorers:")
-    for index, row in sorted_top_scorers.iterrows():
-        print(f"Top scorer #:{index} {row['Player Name']} from {row['Team Name']} scored {row['G']} goals.")
+    # Print information about the top goal scorers in a single write
+    sys.stdout.write(render_leaderboard(top_scorers, 'G', fmt, f"\nTop {num} Goal Scorers:\n"))
     return players
 
-def goalies_analysis(gdf, num):
+@profiled("goalies_analysis", rows=frame_rows)
+def goalies_analysis(gdf, num, handler=None, fmt="text"):
     """
     Analyzes goalies' data and prints the top goalies based on save percentage.
 
     Parameters:
     - gdf (pandas.DataFrame): DataFrame containing goalies' data.
     - num (int): The number of top goalies to display.
+    - handler (PlayerHandler): An existing handler for the same data to reuse (optional).
+    - fmt (str): The report format (see render_leaderboard).
 
     Returns:
     - names list
     """
     # Create a PlayerHandler instance for goalies
-    goalies = PlayerHandler(gdf)
-    # Get the top goalies based on save percentage using the PlayerHandler instance
+    goalies = handler if handler is not None else PlayerHandler(gdf)
+    # Get the top goalies (already ordered by save percentage) using the PlayerHandler instance
     top_goalies = goalies.top_goalies_by_save_percentage(num)
-    top_goalies.index = range(1,len(top_goalies) + 1)
-    # Sort the top goalies DataFrame by save percentage (SV%) in descending order
-    top_goalies = top_goalies.sort_values(by='SV%', ascending=False)
-    for index, row in top_goalies.iterrows():
-        print(f"Top Goalie #:{index} {row['Player Name']} from {row['Team Name']} has {row['SV%']} save percentage.")
+    sys.stdout.write(render_leaderboard(top_goalies, 'SV%', fmt))
     return goalies
 
 
-def hitters_analysis(sdf, num):
+@profiled("hitters_analysis", rows=frame_rows)
+def hitters_analysis(sdf, num, handler=None, fmt="text"):
     """
     Analyzes skaters' data and prints the top hitters.
 
     Parameters:
     - sdf (pandas.DataFrame): DataFrame containing skaters' data.
     - num (int): The number of top hitters to display.
+    - handler (PlayerHandler): An existing handler for the same data to reuse (optional).
+    - fmt (str): The report format (see render_leaderboard).
 
     Returns:
     - names list
     """
     # Create a PlayerHandler instance
-    hitters = PlayerHandler(sdf)
+    hitters = handler if handler is not None else PlayerHandler(sdf)
     # Get the top hitters using the PlayerHandler instance
     top_hitters = hitters.top_players_by_hits(num)
-    top_hitters.index = range(1,len(top_hitters) + 1)
-    # Print information about the top hitters
-    print("\nTop Hitters:")
-    for index, row in top_hitters.iterrows():
-        print(f"Top Hitters #:{index} {row['Player Name']} from {row['Team Name']} has {row['Hits']} Hits.")
+    # Print information about the top hitters in a single write
+    sys.stdout.write(render_leaderboard(top_hitters, 'Hits', fmt, "\nTop Hitters:\n"))
     return hitters
 
-def penalty_minutes_analysis(sdf, num):
+@profiled("penalty_minutes_analysis", rows=frame_rows)
+def penalty_minutes_analysis(sdf, num, handler=None, fmt="text"):
     """
     Analyzes skaters' data and prints players with the highest penalty minutes.
 
     Parameters:
     - sdf (pandas.DataFrame): DataFrame containing skaters' data.
     - num (int): The number of players with the highest penalty minutes to display.
+    - handler (PlayerHandler): An existing handler for the same data to reuse (optional).
+    - fmt (str): The report format (see render_leaderboard).
 
     Returns:
     - names list
     """
     # Create a PlayerHandler instance
-    penalty = PlayerHandler(sdf)
+    penalty = handler if handler is not None else PlayerHandler(sdf)
     # Get players with the highest penalty minutes using the PlayerHandler instance
     top_penalty_minutes = penalty.top_players_by_pim(num)
-    top_penalty_minutes.index = range(1,len(top_penalty_minutes) + 1)
-    # Print information about players with the highest penalty minutes
-    print("\nPlayers with the Highest Penalty Minutes:")
-    for index, row in top_penalty_minutes.iterrows():
-        print(f"Top Penalty Minutes #:{index} {row['Player Name']} from {row['Team Name']} has {row['PIM']} minutes.")
+    # Print information about players with the highest penalty minutes in a single write
+    sys.stdout.write(render_leaderboard(top_penalty_minutes, 'PIM', fmt, "\nPlayers with the Highest Penalty Minutes:\n"))
     return penalty
 
 def skaters_analysis(sdf):
@@ -455,38 +1853,253 @@ def parse_args(arglist):
     parser.add_argument('-bg', '--bestgoalies', nargs=1, type=int, help="Show Best Goalies (include n goalies)")
     parser.add_argument('-bh', '--biggesthitters', nargs=1, type=int, help="Show Biggest Hitters (include n hitters)")
     parser.add_argument('-pm', '--penaltyminutes', nargs=1, type=int, help="Show Players With Highest Penalty Minutes")
+    parser.add_argument('--format', choices=REPORT_FORMATS, default="text", help="Output format for the leaderboards")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="Directory for the columnar copies of the CSV files")
+    parser.add_argument('--no-cache', action='store_true', help="Always parse the CSV files")
+    parser.add_argument('--save-db', metavar='PATH', help="Save the skaters and goalies tables to this SQLite database")
+    parser.add_argument('--from-db', metavar='PATH', help="Answer the leaderboards from this SQLite database")
+    parser.add_argument('--season', default=DEFAULT_SEASON, help="Season to save or rank in the database")
+    parser.add_argument('--per-team', action='store_true', help="Show the leaderboards for every team")
+    parser.add_argument('--per-position', action='store_true', help="Show the leaderboards for every position")
+    parser.add_argument('--position', help="Only rank skaters playing this position (e.g. D)")
+    parser.add_argument('--workers', type=int, help="Rank the teams in this many processes (for very large inputs)")
+    parser.add_argument('--inputs', nargs='+', metavar='PATH',\
+            help="Aggregate these stat files, directories or glob patterns (e.g. one file per season or game)")
+    parser.add_argument('--by-team', action='store_true', help="With --inputs, keep each player's totals per team")
+    parser.add_argument('--state', metavar='PATH', help="Keep the leaderboards in this state file, updated by --delta")
+    parser.add_argument('--delta', nargs='+', metavar='PATH', help="New stat rows (files, directories or globs) for --state")
+    parser.add_argument('--capacity', type=int, default=100, help="Largest leaderboard a --state file can answer")
+    parser.add_argument('--chunksize', type=int, default=100000, help="Rows read at a time with --inputs and --delta")
+    parser.add_argument('--skiprows', type=int, default=1, help="Title rows above the header in --inputs files")
+    parser.add_argument('--profile', action='store_true', help="Record time, rows and peak memory for each stage")
+    parser.add_argument('--profile-format', choices=["json", "cprofile"], default="json",\
+            help="Write the stage report as JSON, or a cProfile dump of every function call")
+    parser.add_argument('--profile-output', metavar='PATH',\
+            help="Where to write the profile (JSON defaults to stderr, cProfile to Project_1.prof)")
     
     # Parse the command-line arguments and return the result
     return parser.parse_args(arglist)
 
-if __name__ == "__main__":
+def requested_leaderboards(args):
+    """
+    Collects the leaderboards asked for on the command line.
+
+    Parameters:
+    - args (Namespace): The parsed command-line arguments.
+
+    Returns:
+    - list: (leaderboard name, n) pairs in the order the boards are printed.
+    """
+    flags = [("goals", args.topgoalscorers), ("goalies", args.bestgoalies),\
+            ("hits", args.biggesthitters), ("pim", args.penaltyminutes)]
+    return [(name, value[0]) for name, value in flags if value]
+
+
+def update_state(path, deltas, capacity=100, chunksize=100000, skiprows=1):
+    """
+    Loads a leaderboard state file, folds new stat files into it and saves it.
+
+    Parameters:
+    - path (str): The state file (created when missing).
+    - deltas (list): Files, directories or glob patterns with the new rows.
+    - capacity (int): The largest leaderboard the state must answer.
+    - chunksize (int): The number of rows read at a time.
+    - skiprows (int): The number of title rows above each file's header.
+
+    Returns:
+    - LeaderboardState: The updated state.
+    """
+    state = LeaderboardState.load(path, capacity)
+    for chunk in iter_stat_chunks(expand_inputs(deltas), chunksize, skiprows):
+        state.apply(chunk)
+    state.save(path)
+    return state
+
+
+def build_handlers(requested, cache_dir=CACHE_DIR, db_path=None, season=DEFAULT_SEASON, tables=None,\
+        extra_columns=(), rank=True):
+    """
+    Loads the tables the requested boards need and computes all of their boards at once.
+
+    Only the tables and columns used by the requested leaderboards are read. With db_path,
+    only the leaderboard rows are fetched from the SQLite database instead (every row when
+    rank is False, since grouped boards are ranked by the caller).
+
+    Parameters:
+    - requested (list): (leaderboard name, n) pairs from requested_leaderboards.
+    - cache_dir (str): The columnar cache directory, or None to parse the CSV files.
+    - db_path (str): An SQLite database to read the leaderboards from (optional).
+    - season (str): The season to rank when reading from the database.
+    - tables (dict): Already-loaded tables (e.g. from aggregate_stats) to rank instead (optional).
+    - extra_columns (list): More columns to read from the CSV files when present (e.g. 'Pos').
+    - rank (bool): Compute the league-wide boards right away.
+
+    Returns:
+    - dict: Maps each table name that was needed to its PlayerHandler.
+    """
+    boards = {}
+    for name, num in requested:
+        table, column = LEADERBOARDS[name]
+        table_boards = boards.setdefault(table, {})
+        table_boards[column] = max(num, table_boards.get(column, 0))
+    handlers = {}
+    for table, table_boards in boards.items():
+        if tables is not None:
+            if table not in tables:
+                raise ValueError(f"No {table} data found in the input files")
+            df = tables[table]
+        elif db_path is not None and not rank:
+            # Grouped boards rank inside every team or position, so they need every row
+            df = SQL.stats_frame(table, list(table_boards), season, db_path)
+        elif db_path is not None:
+            df = SQL.leaderboard_frame(table, table_boards, season, db_path)
+        else:
+            df = read_stats_csv(TABLE_FILES[table], BASE_COLUMNS + list(table_boards), cache_dir,\
+                    optional=extra_columns)
+        handlers[table] = PlayerHandler(df)
+        # Rank every stat column this table needs in a single call
+        if rank:
+            handlers[table].leaderboards(table_boards)
+    return handlers
+
+
+def main(argv=None):
+    """
+    Runs the NHL Stats Analyzer command line.
+
+    Parameters:
+    - argv (list): Command-line arguments, or None to use sys.argv.
+
+    Returns:
+    - int: The process exit status.
+    """
     # Parse command-line arguments
-    args = parse_args(sys.argv[1:])
-
-    # Read skaters data from CSV file and add 'Team Name' column
-    skaters_df = pd.read_csv("nhl-stats_1.csv", skiprows=1)
-    #skaters_df['Team Name'] = skaters_df['Team'].map(nhl_teams)
-
-    # Read goalies data from CSV file and add 'Team Name' column
-    goalies_df = pd.read_csv("nhl-stats_2.csv", skiprows=1)
-    #goalies_df['Team Name'] = goalies_df['Team'].map(nhl_teams)
-
-    # Perform analysis based on user's command-line arguments
-    if args.topgoalscorers:
-        num = args.topgoalscorers[0]
-        print(f"Processing Top {num} Goal Scorers...")
-        goal_scorers_analysis(skaters_df, num)
-    elif args.bestgoalies:
-        num = args.bestgoalies[0]
-        print(f"Processing Best {num} Goalies...")
-        goalies_analysis(goalies_df, num)
-    elif args.biggesthitters:
-        num = args.biggesthitters[0]
-        print("Processing Biggest Hitters...")
-        hitters_analysis(skaters_df, num)
-    elif args.penaltyminutes:
-        num = args.penaltyminutes[0]
-        print("Processing Penalty Minutes Analysis...")
-        penalty_minutes_analysis(skaters_df, num)
-    else:
-        print("Invalid choice. Please select a valid option.")
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if not args.profile:
+        return run(args)
+
+    # With cProfile record every function call; memory tracing would only skew its timings
+    if args.profile_format == "cprofile":
+        import cProfile
+        profile = cProfile.Profile()
+        status = profile.runcall(run, args)
+        profile.dump_stats(args.profile_output or "Project_1.prof")
+        return status
+
+    # Otherwise record the time, rows and memory of every stage
+    PROFILER.start()
+    try:
+        with PROFILER.stage("total"):
+            status = run(args)
+        report = json.dumps(PROFILER.report(), indent=2)
+        if args.profile_output:
+            with open(args.profile_output, "w") as fp:
+                fp.write(report + "\n")
+        else:
+            sys.stderr.write(report + "\n")
+    finally:
+        PROFILER.stop()
+    return status
+
+
+def run(args):
+    """
+    Performs the analysis asked for on the command line.
+
+    Parameters:
+    - args (Namespace): The parsed command-line arguments.
+
+    Returns:
+    - int: The process exit status.
+    """
+    requested = requested_leaderboards(args)
+
+    # Save both full tables to SQLite, one transaction per table
+    if args.save_db:
+        cache_dir = None if args.no_cache else args.cache_dir
+        for table, file_path in TABLE_FILES.items():
+            SQL.ingest_dataframe(read_stats_csv(file_path, None, cache_dir), table, args.save_db, args.season)
+        print(f"Saved player data to {args.save_db}.")
+
+    if not requested:
+        if args.state and args.delta:
+            # Update the state file even when no leaderboard is printed
+            update_state(args.state, args.delta, args.capacity, args.chunksize, args.skiprows)
+            return 0
+        if not args.save_db:
+            print("Invalid choice. Please select a valid option.")
+        return 0
+
+    # Stream the --inputs files into per-player totals, holding one chunk at a time
+    tables = None
+    if args.inputs:
+        paths = expand_inputs(args.inputs)
+        if not paths:
+            print("No input files found.")
+            return 1
+        tables = aggregate_stats(iter_stat_chunks(paths, args.chunksize, args.skiprows), args.by_team)
+
+    # Fold the --delta rows into the saved leaderboards instead of re-reading the season
+    elif args.state:
+        capacity = max([args.capacity] + [num for _, num in requested])
+        tables = update_state(args.state, args.delta or [], capacity, args.chunksize, args.skiprows).tables()
+
+    # Read only the tables needed and compute every requested leaderboard, one handler per table
+    by = ["Team"] * args.per_team + ["Pos"] * args.per_position
+    grouped = bool(by) or args.position is not None
+    handlers = build_handlers(requested, None if args.no_cache else args.cache_dir, args.from_db, args.season,\
+            tables, ["Pos"] if grouped else [], rank=not grouped)
+
+    # Grouped leaderboards: every table's boards are ranked per group in one call, then written at once
+    # (CSV output stacks every board into one table under a single header)
+    if grouped:
+        reports = []
+        csv_boards = []
+        for table, handler in handlers.items():
+            table_boards = {LEADERBOARDS[name][1]: num for name, num in requested if LEADERBOARDS[name][0] == table}
+            position = args.position if table == "skaters" else None
+            results = handler.grouped_leaderboards(table_boards, by, position, args.workers)
+            for column, num in table_boards.items():
+                groups = [key for key in by if key in results[column].columns]
+                if args.format == "csv":
+                    csv_boards.append((results[column], column, groups))
+                    continue
+                title = f"Top {num} {REPORT_TITLES[column]}" + (f" ({position})" if position else "")
+                reports.append(render_leaderboard(results[column], column, args.format,\
+                        title + " for" if groups else f"\n{title}:\n", groups))
+        sys.stdout.write(render_csv_report(csv_boards) if args.format == "csv" else "".join(reports))
+        return 0
+
+    if args.format == "csv":
+        boards = []
+        for name, num in requested:
+            table, column = LEADERBOARDS[name]
+            boards.append((handlers[table].leaderboards({column: num})[column], column, ()))
+        sys.stdout.write(render_csv_report(boards))
+        return 0
+
+    # Perform analysis for each of the user's command-line arguments
+    # (progress lines are only printed in text format so other formats stay machine-readable)
+    text = args.format == "text"
+    for name, num in requested:
+        if name == "goals":
+            if text:
+                print(f"Processing Top {num} Goal Scorers...")
+            goal_scorers_analysis(handlers["skaters"].df, num, handlers["skaters"], args.format)
+        elif name == "goalies":
+            if text:
+                print(f"Processing Best {num} Goalies...")
+            goalies_analysis(handlers["goalies"].df, num, handlers["goalies"], args.format)
+        elif name == "hits":
+            if text:
+                print("Processing Biggest Hitters...")
+            hitters_analysis(handlers["skaters"].df, num, handlers["skaters"], args.format)
+        elif name == "pim":
+            if text:
+                print("Processing Penalty Minutes Analysis...")
+            penalty_minutes_analysis(handlers["skaters"].df, num, handlers["skaters"], args.format)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
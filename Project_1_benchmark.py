@@ -0,0 +1,160 @@
+###################################################################
+# Startup benchmark for the Project_1 NHL Stats Analyzer CLI
+# Measure the time to import Project_1 and the time to first output
+# Subtract the bare interpreter start so results travel between machines
+# Fail when a budget or a saved baseline is exceeded
+###################################################################
+
+from argparse import ArgumentParser
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Directory holding Project_1.py
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that must not be loaded until a leaderboard is actually requested
+HEAVY_MODULES = ["numpy", "pandas", "sqlite3"]
+
+# Probe run in a fresh interpreter: import Project_1 and report the time and loaded heavy modules
+IMPORT_PROBE = '''import sys, time
+start = time.perf_counter()
+import Project_1
+elapsed = time.perf_counter() - start
+print(elapsed, ",".join(m for m in {heavy!r} if m in sys.modules))
+'''
+
+
+def time_to_first_output(command):
+    """
+    Runs a command and measures the time until its first line of output.
+
+    Parameters:
+    - command (list): The command to run.
+
+    Returns:
+    - float: Seconds from launch until the first line was written.
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=HERE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    proc.stdout.readline()
+    elapsed = time.perf_counter() - start
+    proc.communicate()
+    return elapsed
+
+
+def measure(runs):
+    """
+    Measures Project_1 startup costs, each as the median over several runs.
+
+    Parameters:
+    - runs (int): The number of runs per measurement.
+
+    Returns:
+    - dict: Milliseconds for each measurement and the heavy modules loaded by the import.
+    """
+    python = sys.executable
+    interpreter, imports, heavy = [], [], set()
+    help_output, invalid_output = [], []
+    for _ in range(runs):
+        interpreter.append(time_to_first_output([python, "-c", "print()"]))
+        result = subprocess.run([python, "-c", IMPORT_PROBE.format(heavy=HEAVY_MODULES)], cwd=HERE,\
+                capture_output=True, text=True, check=True)
+        seconds, _, loaded = result.stdout.strip().partition(" ")
+        imports.append(float(seconds))
+        heavy.update(m for m in loaded.split(",") if m)
+        help_output.append(time_to_first_output([python, "Project_1.py", "--help"]))
+        invalid_output.append(time_to_first_output([python, "Project_1.py"]))
+    base = statistics.median(interpreter)
+    return {"interpreter_ms": base * 1000,
+            "import_ms": statistics.median(imports) * 1000,
+            "help_first_output_ms": (statistics.median(help_output) - base) * 1000,
+            "invalid_first_output_ms": (statistics.median(invalid_output) - base) * 1000,
+            "heavy_modules_on_import": sorted(heavy)}
+
+
+def check(results, budgets, baseline=None, tolerance=0.25):
+    """
+    Compares benchmark results against budgets and an optional saved baseline.
+
+    Parameters:
+    - results (dict): The output of measure.
+    - budgets (dict): Maximum milliseconds allowed per measurement.
+    - baseline (dict): Earlier results to compare against, or None.
+    - tolerance (float): The allowed slowdown relative to the baseline (0.25 = 25%).
+
+    Returns:
+    - list: A message for every failed check (empty when startup is within limits).
+    """
+    failures = []
+    if results["heavy_modules_on_import"]:
+        failures.append("importing Project_1 loaded " + ", ".join(results["heavy_modules_on_import"]))
+    for key, limit in budgets.items():
+        if results[key] > limit:
+            failures.append(f"{key} {results[key]:.1f} ms exceeds the {limit:.1f} ms budget")
+    if baseline:
+        # A baseline saved before a measurement was added has nothing to compare it with
+        for key in [key for key in budgets if key in baseline]:
+            # A small absolute slack keeps timer noise on very fast steps from failing the run
+            allowed = baseline[key] * (1 + tolerance) + 5
+            if results[key] > allowed:
+                failures.append(f"{key} {results[key]:.1f} ms regressed from the {baseline[key]:.1f} ms baseline")
+    return failures
+
+
+def parse_args(arglist):
+    """
+    Parses command-line arguments for the startup benchmark.
+
+    Parameters:
+    - arglist (list): List of command-line arguments.
+
+    Returns:
+    - Namespace: An object containing attributes corresponding to the command-line arguments.
+    """
+    parser = ArgumentParser(description="Project_1 startup benchmark")
+    parser.add_argument('--runs', type=int, default=7, help="Runs per measurement (the median is reported)")
+    parser.add_argument('--max-import-ms', type=float, default=50.0, help="Budget for importing Project_1")
+    parser.add_argument('--max-first-output-ms', type=float, default=100.0,\
+            help="Budget for the first line of --help and invalid-argument runs, beyond interpreter start")
+    parser.add_argument('--baseline', help="JSON file with earlier results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown relative to the baseline")
+    parser.add_argument('--save-baseline', action='store_true', help="Write these results to the --baseline file")
+    return parser.parse_args(arglist)
+
+
+def main(argv=None):
+    """
+    Runs the startup benchmark and reports whether startup is within limits.
+
+    Parameters:
+    - argv (list): Command-line arguments, or None to use sys.argv.
+
+    Returns:
+    - int: 0 when every check passes, 1 otherwise.
+    """
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    results = measure(args.runs)
+    print(json.dumps(results, indent=2))
+    budgets = {"import_ms": args.max_import_ms, "help_first_output_ms": args.max_first_output_ms,\
+            "invalid_first_output_ms": args.max_first_output_ms}
+    baseline = None
+    if args.baseline and not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+    failures = check(results, budgets, baseline, args.tolerance)
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as fp:
+            json.dump(results, fp, indent=2)
+    for failure in failures:
+        print("FAIL:", failure)
+    if not failures:
+        print("Startup is within limits.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,9 +8,15 @@
 # Display closing messages
 ###################################################################
 
+from argparse import ArgumentParser
+import sys
+
 #from p11_calendar import P11_Calendar
-from p11_event import P11_Event
+from p11_event import P11_Event, DAY_START, DAY_END
 from p11_calendar import P11_Calendar
+from p11_recurrence import P11_Recurrence, FREQS
+from p11_batch import import_events, export_events
+from p11_storage import P11_LogStore, P11_SQLiteStore
 
 
 CAL_TYPE = ['meeting','event','appointment','other']
@@ -18,8 +24,12 @@ CAL_TYPE = ['meeting','event','appointment','other']
 MENU = '''Welcome to your own personal calender.
   Available options:
     (A)dd an event to calender
-    (D)elete an event
+    (S)chedule a recurring event
+    (D)elete an event (or one occurrence of a recurring event)
+    (X) delete a recurring event
     (L)ist the events of a particular date
+    (R)ange of dates: list their events
+    (F)ind free time
     (Q)uit'''
 
 
@@ -29,8 +39,6 @@ def check_time(time,duration):
        value: Time (string), duration (int)
        Returns: True or False (bool)
     """
-    day_start = 360 #start time in minutes (6 * 60)
-    day_end = 1020 # end time in minutes (17 * 60)
     # first make sure time is valid
     try:
         #check if time is well formed
@@ -45,7 +53,7 @@ def check_time(time,duration):
         #calculate time in munutes
         sTime=(int(timeList[0])*60)+int(timeList[1])
         #check the time fits in the 6am to 5pm window
-        if ((sTime >= day_start) and ((sTime + duration) <= day_end)):
+        if ((sTime >= DAY_START) and ((sTime + duration) <= DAY_END)):
             return True
         return False
     except:
@@ -80,8 +88,97 @@ def event_prompt():
     #return event object
     return e
 
-def main():
-    c= P11_Calendar()
+def series_prompt():
+    """
+       Prompts for a recurring event until a valid one is entered
+       value: None
+       Returns: series (P11_Recurrence)
+    """
+    while (True):
+        #the first occurrence is entered like any other event
+        e = event_prompt() #event
+        freq = input("Enter how often it repeats " + str(FREQS) + ": ").strip().lower()
+        interval = input("Repeat every how many days/weeks/months (int, default 1): ").strip() or '1'
+        count = input("Enter the number of occurrences (int, or press enter for no limit): ").strip()
+        until = input("Enter the last date (mm/dd/yyyy, or press enter for none): ").strip()
+        if not interval.isdigit() or (count and not count.isdigit()):
+            print('Invalid recurrence. Please try again.')
+            continue
+        s = P11_Recurrence(e, freq, int(interval), int(count) if count else None, until or None)
+        if s.valid:
+            return s
+        print('Invalid recurrence. Please try again.')
+
+def parse_args(arglist):
+    """
+       Parses the command-line options
+       value: arglist (list of strings)
+       Returns: options (Namespace)
+    """
+    parser = ArgumentParser(description="Personal calendar")
+    parser.add_argument('--store', metavar='DIR', help="Keep the calendar in this directory (log and snapshots)")
+    parser.add_argument('--sqlite', metavar='PATH', help="Keep the calendar in this SQLite database")
+    parser.add_argument('--snapshot-every', type=int, default=1000, help="Log records between snapshots")
+    parser.add_argument('--import', dest='imports', metavar='FILE', nargs='+', default=[],\
+            help="Add the events of CSV or .ics files, then exit")
+    parser.add_argument('--export', metavar='FILE', help="Write events to a CSV or .ics file, then exit")
+    parser.add_argument('--from', dest='first', metavar='DATE', help="First date to export (mm/dd/yyyy)")
+    parser.add_argument('--to', dest='last', metavar='DATE', help="Last date to export (mm/dd/yyyy)")
+    parser.add_argument('--serve', metavar='ADDRESS',\
+            help="Serve the calendar over a socket (host:port or a Unix socket path) instead of the menu")
+    return parser.parse_args(arglist)
+
+def run_batch(c, args):
+    """
+       Imports and exports events without the menu
+       value: c (P11_Calendar), args (Namespace)
+       Returns: None
+    """
+    for path in args.imports:
+        added, rejected = import_events(c, path)
+        #report every rejected row together
+        for line, reason in rejected:
+            print ("{}:{}: {}".format(path, line, reason))
+        print ("Imported {} events from {}; rejected {} rows.".format(added, path, len(rejected)))
+    if args.export:
+        try:
+            count = export_events(c, args.export, args.first, args.last)
+        except ValueError as err:
+            print ("*****Error in export: " + str(err))
+            return
+        print ("Exported {} events to {}.".format(count, args.export))
+
+def open_calendar(args):
+    """
+       Opens the calendar with the store chosen on the command line
+       value: args (Namespace)
+       Returns: calendar (P11_Calendar)
+    """
+    if args.sqlite:
+        return P11_Calendar(P11_SQLiteStore(args.sqlite))
+    if args.store:
+        return P11_Calendar(P11_LogStore(args.store, args.snapshot_every))
+    return P11_Calendar()
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    c= open_calendar(args)
+    if args.imports or args.export:
+        run_batch(c, args)
+        c.close()
+        return
+    if args.serve:
+        #the server module is only needed in this mode
+        import asyncio
+        from p11_server import P11_Server
+        print ("Serving the calendar on " + args.serve)
+        try:
+            asyncio.run(P11_Server(c).serve_forever(args.serve))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            c.close()
+        return
     while True:
         #print main menu display 
         print(MENU)
@@ -96,8 +193,29 @@ def main():
             if(c.add_event(evnt) == True):
                 print ('Event successfully added.')
             else:
+                #show the events that are in the way
+                for x in c.conflicts(evnt):
+                    print ("Conflicts with " + str(x))
                 print("*****Error in add_event")
 
+        if l_opt == "s":
+            #prompt for the first occurrence and the rule
+            srs = series_prompt() #series
+            if(c.add_series(srs) == True):
+                print ('Recurring event successfully added.')
+            else:
+                #show what is in the way
+                for x in c.series_conflicts(srs):
+                    print ("Conflicts with " + str(x))
+                print("*****Error in add_series")
+        if l_opt == "x":
+            print ("Delete Recurring Event")
+            dt =input ("Enter the date of any occurrence (mm/dd/yyyy): ") #date enter
+            st= input ("Enter its start time (hh:mm): ") #start enter
+            if (c.delete_series(dt,st) == True):
+                print ("Recurring event successfully deleted.")
+            else:
+                print ("Recurring event was not deleted.")
         if l_opt == "d":
             #print delete message
             print ("Delete Event")
@@ -125,8 +243,45 @@ def main():
             #print each event
             for x in evnt_list:
                 print (x)
+        if l_opt == "r":
+            print ("List Events in a Range")
+            dt1= input("Enter the first date (mm/dd/yyyy): ") #first date
+            dt2= input("Enter the last date (mm/dd/yyyy): ") #last date
+            e_type= input("Enter event type, or press enter for all types: ").strip().lower() #type filter
+            evnt_list = c.range_events(dt1, dt2, e_type or None)
+            if evnt_list is None:
+                print ("Invalid date.")
+                continue
+            if (len(evnt_list) ==0):
+                print ("No events to list from " + dt1 + " to " + dt2)
+                continue
+            for x in evnt_list:
+                print (x)
+        if l_opt == "f":
+            print ("Find Free Time")
+            dt1= input("Enter the first date (mm/dd/yyyy): ") #first date
+            dt2= input("Enter the last date (mm/dd/yyyy): ") #last date
+            try:
+                duration = int(input("Enter the duration in minutes (int): "))
+                count = int(input("Enter how many openings to find (int): "))
+            except ValueError:
+                print ("Invalid number.")
+                continue
+            if duration <= 0 or count <= 0:
+                print ("Invalid number.")
+                continue
+            slots = c.free_slots(dt1, dt2, duration, count)
+            if slots is None:
+                print ("Invalid date.")
+                continue
+            if (len(slots) ==0):
+                print ("No free time found from " + dt1 + " to " + dt2)
+                continue
+            for date, start, end in slots:
+                print ("{}: free from {} to {}".format(date, start, end))
         if l_opt == "q":
-            #quit the program
+            #save and close the calendar, then quit the program
+            c.close()
             break
     
 if __name__ == '__main__':
@@ -0,0 +1,144 @@
+###################################################################
+# Load generator for the Project_2 calendar service
+# Start a calendar server, or use one that is already running
+# Run many clients at once with a mix of reads and writes
+# Report the throughput and the latency percentiles of each op
+###################################################################
+
+from argparse import ArgumentParser
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from p11_calendar import P11_Calendar
+from p11_server import P11_Client, P11_Server
+from p11_storage import P11_LogStore
+
+
+def percentile(values, fraction):
+    """
+       Finds a percentile of a list of numbers
+       value: values (sorted list of floats), fraction (float, 0.99 for p99)
+       Returns: the percentile (float)
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def random_request(rng, write_ratio, days):
+    """
+       Builds a random request
+       value: rng (random.Random), write_ratio (float), days (int, dates to spread events over)
+       Returns: request (dict)
+    """
+    date = '{:02d}/{:02d}/2026'.format(rng.randint(1, 12), rng.randint(1, min(28, days)))
+    if rng.random() < write_ratio:
+        time_ = '{:d}:{:02d}'.format(rng.randint(6, 15), rng.choice([0, 15, 30, 45]))
+        if rng.random() < 0.8:
+            return {'op': 'add', 'date': date, 'time': time_, 'duration': rng.choice([15, 30, 60]), 'type': 'meeting'}
+        return {'op': 'delete', 'date': date, 'time': time_}
+    if rng.random() < 0.5:
+        return {'op': 'list', 'date': date}
+    return {'op': 'free', 'first': date, 'last': '12/31/2026', 'duration': 60, 'count': 3}
+
+
+async def client(address, ops, write_ratio, days, seed, latencies):
+    """
+       Sends requests one after another and records how long each took
+       value: address (string), ops (int), write_ratio (float), days (int), seed (int),
+              latencies (dict, op -> list of seconds, filled in)
+       Returns: None
+    """
+    rng = random.Random(seed)
+    conn = await P11_Client.connect(address)
+    for _ in range(ops):
+        request = random_request(rng, write_ratio, days)
+        start = time.perf_counter()
+        await conn.request(**request)
+        latencies.setdefault(request['op'], []).append(time.perf_counter() - start)
+    await conn.close()
+
+
+async def run_load(address, clients, ops, write_ratio, days, seed):
+    """
+       Runs the clients together against a server
+       value: address (string), clients (int), ops (int, per client), write_ratio (float),
+              days (int), seed (int)
+       Returns: results (dict)
+    """
+    latencies = dict()
+    start = time.perf_counter()
+    await asyncio.gather(*(client(address, ops, write_ratio, days, seed + i, latencies) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    everything = sorted(x for values in latencies.values() for x in values)
+    results = {'clients': clients, 'requests': len(everything), 'seconds': elapsed,
+               'ops_per_sec': len(everything) / elapsed,
+               'p50_ms': percentile(everything, 0.50) * 1000, 'p99_ms': percentile(everything, 0.99) * 1000}
+    for op, values in sorted(latencies.items()):
+        values.sort()
+        results[op] = {'count': len(values), 'p50_ms': percentile(values, 0.50) * 1000,
+                       'p99_ms': percentile(values, 0.99) * 1000}
+    return results
+
+
+async def benchmark(args):
+    """
+       Starts a server unless one was given, then runs the load against it
+       value: args (Namespace)
+       Returns: results (dict)
+    """
+    if args.address:
+        return await run_load(args.address, args.clients, args.ops, args.write_ratio, args.days, args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        store = P11_LogStore(directory, sync=not args.no_sync) if args.store else None
+        calendar = P11_Calendar(store)
+        server = P11_Server(calendar)
+        address = os.path.join(directory, 'calendar.sock') if hasattr(asyncio, 'start_unix_server') else '127.0.0.1:0'
+        await server.start(address)
+        if address.endswith(':0'):
+            address = '127.0.0.1:{}'.format(server.server.sockets[0].getsockname()[1])
+        try:
+            return await run_load(address, args.clients, args.ops, args.write_ratio, args.days, args.seed)
+        finally:
+            server.server.close()
+            await server.server.wait_closed()
+            calendar.close()
+
+
+def parse_args(arglist):
+    """
+       Parses the command-line options
+       value: arglist (list of strings)
+       Returns: options (Namespace)
+    """
+    parser = ArgumentParser(description="Project_2 calendar service load generator")
+    parser.add_argument('--address', help="A running server (host:port or a Unix socket path); "
+                                          "by default a server is started for the run")
+    parser.add_argument('--clients', type=int, default=50, help="Clients connected at once")
+    parser.add_argument('--ops', type=int, default=200, help="Requests per client")
+    parser.add_argument('--write-ratio', type=float, default=0.2, help="Share of requests that add or delete")
+    parser.add_argument('--days', type=int, default=28, help="Days of each month the events are spread over")
+    parser.add_argument('--seed', type=int, default=1, help="Random seed")
+    parser.add_argument('--store', action='store_true', help="Give the started server a log store")
+    parser.add_argument('--no-sync', action='store_true', help="Do not fsync the log store on each write")
+    parser.add_argument('--max-p99-ms', type=float, help="Fail if the overall p99 latency is above this")
+    return parser.parse_args(arglist)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    results = asyncio.run(benchmark(args))
+    print(json.dumps(results, indent=2))
+    if args.max_p99_ms is not None and results['p99_ms'] > args.max_p99_ms:
+        print("FAIL: p99 {:.2f} ms exceeds the {:.2f} ms budget".format(results['p99_ms'], args.max_p99_ms))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
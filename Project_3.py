@@ -1,7 +1,16 @@
 ###################################################################
 # Computer Project #9
 # Read the image data from the JSON file
+# Stream the images out of the file one record at a time
 # Put the data into a master dictionary of dictionaries 
+# Index the images of each category with their instance and image counts
+# Count the caption words once and pick the top words with a heap
+# Optionally split the files across worker processes and merge their counts
+# Save the index and word counts to a memory-mapped file for later runs
+# Answer AND/OR/NOT queries over categories by merging their image lists
+# Load a dataset once and answer many queries from a file as JSON lines
+# Keep the statistics up to date as new images are appended
+# Find the categories that appear together with sparse matrix products
 # Create a list of the category names and captions  
 # Display the mapping of each category based on the list of images
 # Prompt the user for image category options 
@@ -9,24 +18,54 @@
 # Display closing messages
 ###################################################################
 
+from argparse import ArgumentParser
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import heapq
 import json
+import mmap
+import os
+import re
 import string
+import struct
+import sys
 
 STOP_WORDS = ['a','an','the','in','on','of','is','was','am','I','me','you',\
  'and','or','not','this','that','to','with','his','hers','out','it','as','by',\
      'are','he','her','at','its']
+STOP_SET = frozenset(STOP_WORDS)
+LOWER_STOP_SET = frozenset(word.lower() for word in STOP_WORDS) #for lowercased captions ('I' becomes 'i')
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+#word endings removed by stem, longest first
+STEM_SUFFIXES = [('sses','ss'), ('ies','y'), ('ing',''), ('ed',''), ('ss','ss'), ('s','')]
 
 MENU = '''
     Select from the menu:
         c: display categories
         f: find images by category
+        b: find images by a query (AND, OR, NOT, category>=count)
         i: find max instances of categories
         m: find max number of images of categories
         w: display the top ten words in captions
+        p: display the categories that most often appear together
         q: quit
         
     Choice: '''
-OPTIONS = "cfimwq"
+OPTIONS = "cfbimwpq"
+
+CHUNK_SIZE = 1 << 20 #characters read from the JSON file at a time
+
+INDEX_MAGIC = b'P3IX'
+INDEX_VERSION = 2
+INDEX_SUFFIX = '.p3idx' #saved index file, next to the JSON file
+INDEX_HEADER = struct.Struct('<4sIQ') #magic, version, metadata length
+
+QUERY_TOKEN = re.compile(r'\(|\)|[^\s()]+')
+QUERY_MIN = re.compile(r'(.+?)>=(\d+)$') #category>=count
+WHITESPACE = re.compile(r'\s*')
 
 def get_option():
    """
@@ -68,14 +107,125 @@ def open_file(s):
    #return the new file 
    return fp
         
+class JSONStream():
+   """
+       Reads JSON values from a file a chunk at a time, so a large file
+       never has to be in memory at once
+   """
+   def __init__(self, fp, chunk_size=CHUNK_SIZE):
+       self.fp = fp
+       self.chunk_size = chunk_size
+       self.buf = '' #text read but not yet parsed starts at pos
+       self.pos = 0
+       self.eof = False
+       self.decoder = json.JSONDecoder()
+
+   def more(self):
+       """
+           Reads the next chunk, dropping the text already parsed
+           Value: None
+           Returns: False at the end of the file (bool)
+       """
+       chunk = self.fp.read(self.chunk_size)
+       if not chunk:
+           self.eof = True
+           return False
+       self.buf = self.buf[self.pos:] + chunk
+       self.pos = 0
+       return True
+
+   def peek(self):
+       """
+           Skips whitespace and looks at the next character
+           Value: None
+           Returns: A character, or '' at the end of the file (string)
+       """
+       while True:
+           self.pos = WHITESPACE.match(self.buf, self.pos).end()
+           if self.pos < len(self.buf):
+               return self.buf[self.pos]
+           if not self.more():
+               return ''
+
+   def take(self):
+       """
+           Skips whitespace and reads the next character
+           Value: None
+           Returns: A character, or '' at the end of the file (string)
+       """
+       c = self.peek()
+       self.pos += len(c)
+       return c
+
+   def value(self):
+       """
+           Reads the next complete JSON value
+           Value: None
+           Returns: The value (any JSON type)
+       """
+       self.peek()
+       while True:
+           try:
+               v, end = self.decoder.raw_decode(self.buf, self.pos)
+               #a number cut off by the end of the chunk still parses, so read on to be sure
+               if end < len(self.buf) or self.eof:
+                   self.pos = end
+                   return v
+           except json.JSONDecodeError:
+               if self.eof:
+                   raise
+           self.more()
+
+def annot_record(image_id, value):
+   """
+       Keeps only the fields of an image that the queries use
+       Value: image id, dictionary of the image's fields
+       Returns: A tuple (image id (string), category labels (list), captions (list))
+   """
+   return (str(image_id), value.get("bbox_category_label") or [], value.get("cap_list") or [])
+
+def read_annot_records(fp1, chunk_size=CHUNK_SIZE):
+   """
+       Streams the images out of a JSON file. The file can be one object
+       mapping image ids to images, or JSON lines with one such object or
+       one image with an "image_id" field per line.
+       Value: File pointer
+       Returns: Generator of tuples (image id, category labels, captions)
+   """
+   stream = JSONStream(fp1, chunk_size)
+   while True:
+       c = stream.take()
+       if c == '':
+           return
+       if c != '{':
+           raise ValueError("expected a JSON object, found " + repr(c))
+       fields = dict() #members that are not whole images
+       #walk the members one at a time instead of decoding the whole object
+       while stream.peek() != '}':
+           key = stream.value()
+           if stream.take() != ':':
+               raise ValueError("expected ':' after " + repr(key))
+           value = stream.value()
+           if isinstance(value, dict) and ("bbox_category_label" in value or "cap_list" in value):
+               yield annot_record(key, value)
+           else:
+               fields[key] = value
+           if stream.peek() == ',':
+               stream.take()
+       stream.take()
+       if "image_id" in fields:
+           yield annot_record(fields["image_id"], fields)
+
 def read_annot_file(fp1):
    """
        Read the JSON file
        Value: File pointer
        Returns: Dictionary of dictionaries (DD)
    """
-   #load the json file
-   D=json.load(fp1) #dictionary
+   #stream the file, keeping only the fields that are used
+   D = dict() #dictionary
+   for image_id, labels, captions in read_annot_records(fp1):
+       D[image_id] = {"bbox_category_label": labels, "cap_list": captions}
    #return the dictionary
    return D
 
@@ -103,25 +253,8 @@ def collect_catogory_set(D_annot,D_cat):
        Value: dictionary of dictionaries (DD), dictionary (D)
        Returns: A set of strings (sett)
    """
-   #create a set
-   sett=set() #set
-   #create a list based off of the set
-   settList=[]
-   #go through each item in the dict
-   for key,value in D_annot.items():
-       #getting the list of category numbers
-       clist=value.get("bbox_category_label")
-       for x in clist:
-           if x in D_cat:
-               s = D_cat.get(x)
-               if s not in settList:
-                   settList.append(s)
-   #convert the list to a set
-   sett.update(settList)
-   #return the set
-   return sett
-           
-          
+   return set(index_annotations(D_annot, D_cat).categories())
+
 def collect_img_list_for_categories(D_annot,D_cat,cat_set):
    """
        Create a mapping of each category to the list of images that has an
@@ -130,33 +263,183 @@ def collect_img_list_for_categories(D_annot,D_cat,cat_set):
            (sett)
        Returns: Dictionary of sorted lists ()
    """
+   index = index_annotations(D_annot, D_cat)
+   keys = {int(key): key for key in D_annot} #the index holds ids as ints
    imgD = dict() #dictionary
-   settList=[] #set list
-   for x in cat_set:
-       #create a list as a placeholder for each category name in the dictionary
-       imgD.update({x: list()})
-   #go through each item in the D_annot
-   for key,value in D_annot.items():
-       #clear the set list through each loop
-       settList.clear()
-       #getting the list of category numbers
-       clist=value.get("bbox_category_label")
-       for x in clist:
-            if x in D_cat:
-                s = D_cat.get(x)
-                #grab the image list for that category
-                imgList = imgD.get(s)
-                #if this key is already in image list then continue
-                # if key in imgList:
-                #     continue
-                #append the image to the image settList
-                imgList.append(key)
-                #sort the list
-                imgList.sort()
-                #update the dictionary
-                imgD.update({s: imgList.copy()})
+   for s in cat_set:
+       #each image once per instance, sorted like the image keys
+       imgD[s] = sorted(keys[image_id] for image_id, n in zip(index.image_ids(s), index.image_instances(s))
+                        for i in range(n))
    return imgD
 
+def index_annotations(D_annot, D_cat):
+   """
+       Builds the category index of images already read into a dictionary
+       Value: dictionary of dictionaries (DD), dictionary (D)
+       Returns: index (CategoryIndex)
+   """
+   index = CategoryIndex()
+   for key, value in D_annot.items():
+       index.add(key, value.get("bbox_category_label"), D_cat)
+   index.finish()
+   return index
+
+class CategoryIndex():
+   """
+       Inverted index from category names to the images they appear in.
+       Each category keeps a compact sorted array of distinct image ids, a
+       parallel array of the instances in each of those images, the number
+       of instances over all images and the number of images, so a lookup
+       never has to rebuild or convert the list. all_ids holds every image,
+       with or without categories.
+   """
+   def __init__(self):
+       self.images = dict() #category -> array of distinct image ids
+       self.counts = dict() #category -> instances in each of those images
+       self.instances = dict() #category -> number of instances
+       self.unsorted = set() #categories whose ids arrived out of order
+       self.all_ids = array('q') #every image id
+       self.all_unsorted = False
+
+   def add(self, image_id, labels, D_cat):
+       """
+           Adds one image's category labels
+           Value: image id (string or int), list of labels (ints), dictionary (D)
+           Returns: None
+       """
+       image_id = int(image_id)
+       if self.all_ids and self.all_ids[-1] >= image_id:
+           self.all_unsorted = True
+       self.all_ids.append(image_id)
+       per_image = dict() #category -> instances in this image
+       for x in labels:
+           s = D_cat.get(x)
+           if s is not None:
+               per_image[s] = per_image.get(s, 0) + 1
+       for s, n in per_image.items():
+           self.instances[s] = self.instances.get(s, 0) + n
+           ids = self.images.get(s)
+           if ids is None:
+               ids = self.images[s] = array('q')
+               self.counts[s] = array('q')
+           elif ids[-1] >= image_id:
+               self.unsorted.add(s)
+           ids.append(image_id)
+           self.counts[s].append(n)
+
+   def finish(self):
+       """
+           Sorts and deduplicates the categories whose images came out of order
+           Value: None
+           Returns: None
+       """
+       for s in self.unsorted:
+           #an image listed twice keeps the sum of its instances
+           per_image = dict()
+           for image_id, n in zip(self.images[s], self.counts[s]):
+               per_image[image_id] = per_image.get(image_id, 0) + n
+           ids = sorted(per_image)
+           self.images[s] = array('q', ids)
+           self.counts[s] = array('q', (per_image[i] for i in ids))
+       self.unsorted.clear()
+       if self.all_unsorted:
+           self.all_ids = array('q', sorted(set(self.all_ids)))
+           self.all_unsorted = False
+
+   def merge(self, other):
+       """
+           Adds the images of another index, such as one built from another part of the data
+           Value: other (CategoryIndex)
+           Returns: None
+       """
+       for s, n in other.instances.items():
+           self.instances[s] = self.instances.get(s, 0) + n
+       for s, ids in other.images.items():
+           mine = self.images.get(s)
+           if s in other.unsorted or (mine is not None and len(mine) and len(ids) and mine[-1] >= ids[0]):
+               self.unsorted.add(s)
+           if mine is None:
+               self.images[s] = ids
+               self.counts[s] = other.counts[s]
+               continue
+           mine.extend(ids)
+           self.counts[s].extend(other.counts[s])
+       if other.all_unsorted or (len(self.all_ids) and len(other.all_ids) and self.all_ids[-1] >= other.all_ids[0]):
+           self.all_unsorted = True
+       self.all_ids.extend(other.all_ids)
+
+   def categories(self):
+       """
+           Lists the category names
+           Value: None
+           Returns: Sorted list of strings
+       """
+       return sorted(self.images)
+
+   def image_ids(self, s):
+       """
+           Finds the images a category appears in
+           Value: category name (string)
+           Returns: Sorted array of image ids (ints), empty for an unknown category
+       """
+       return self.images.get(s, array('q'))
+
+   def image_instances(self, s):
+       """
+           Finds how many instances of a category each of its images has
+           Value: category name (string)
+           Returns: Array of counts (ints), in the order of image_ids
+       """
+       return self.counts.get(s, array('q'))
+
+   def all_image_ids(self):
+       return self.all_ids
+
+   @classmethod
+   def from_mapped(cls, mapped):
+       """
+           Copies a saved index into memory so that images can be added to it
+           Value: mapped (MappedIndex)
+           Returns: index (CategoryIndex)
+       """
+       index = cls()
+       for s in mapped.categories():
+           index.instances[s] = mapped.instance_count(s)
+           index.images[s] = array('q', mapped.image_ids(s).tobytes())
+           index.counts[s] = array('q', mapped.image_instances(s).tobytes())
+       index.all_ids = array('q', mapped.all_image_ids().tobytes())
+       return index
+
+   def instance_count(self, s):
+       return self.instances.get(s, 0)
+
+   def image_count(self, s):
+       return len(self.images.get(s, ()))
+
+   def max_instances(self):
+       """
+           Finds the category with the most instances (the first by name on a tie)
+           Value: None
+           Returns: A tuple (count, category)
+       """
+       mcat = (0, "")
+       for s in sorted(self.instances):
+           if self.instances[s] > mcat[0]:
+               mcat = (self.instances[s], s)
+       return mcat
+
+   def max_images(self):
+       """
+           Finds the category that appears in the most images (the first by name on a tie)
+           Value: None
+           Returns: A tuple (count, category)
+       """
+       mcat = (0, "")
+       for s in sorted(self.images):
+           if len(self.images[s]) > mcat[0]:
+               mcat = (len(self.images[s]), s)
+       return mcat
+
 def max_instances_for_item(D_image):
    """
        Finds the most occurrences of an object across all images
@@ -188,51 +471,901 @@ def max_images_for_item(D_image):
    #return the tuple version of mcat
    return(tuple(mcat))
 
-def count_words(D_annot):
+def intersect_ids(a, b):
+   """
+       Finds the ids in both of two sorted id lists. A much shorter list is
+       looked up in the longer one by binary search; otherwise sets are used.
+       Value: a, b (sorted sequences of ints)
+       Returns: Sorted list of ints
+   """
+   small, large = (a, b) if len(a) <= len(b) else (b, a)
+   if len(small) * 16 >= len(large):
+       return sorted(set(small).intersection(large))
+   out = []
+   lo = 0
+   for x in small:
+       lo = bisect_left(large, x, lo)
+       if lo == len(large):
+           break
+       if large[lo] == x:
+           out.append(x)
+   return out
+
+class CategoryQuery():
+   """
+       A boolean query over categories such as "person AND dog NOT car" or
+       "(cat OR dog) AND person>=2". NOT binds tightest, then AND, then OR;
+       two terms side by side mean AND, so "dog NOT car" is "dog AND NOT car".
+       category>=N matches the images with at least N instances of it.
+       The query is parsed into nested tuples once and run against an index
+       with sorted image id lists: AND intersects them smallest first, AND
+       NOT removes ids, and only a NOT on its own needs the list of all images.
+   """
+   def __init__(self, text):
+       self.tokens = QUERY_TOKEN.findall(text)
+       self.pos = 0
+       if not self.tokens:
+           raise ValueError("empty query")
+       self.tree = self.parse_or()
+       if self.pos < len(self.tokens):
+           raise ValueError("unexpected " + repr(self.tokens[self.pos]))
+
+   def peek(self):
+       return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+   def keyword(self):
+       token = self.peek()
+       return token.upper() if token is not None and token.upper() in ('AND', 'OR', 'NOT') else None
+
+   def parse_or(self):
+       terms = [self.parse_and()]
+       while self.keyword() == 'OR':
+           self.pos += 1
+           terms.append(self.parse_and())
+       return terms[0] if len(terms) == 1 else ('or', terms)
+
+   def parse_and(self):
+       terms = [self.parse_not()]
+       while self.peek() not in (None, ')') and self.keyword() != 'OR':
+           if self.keyword() == 'AND':
+               self.pos += 1
+           terms.append(self.parse_not())
+       return terms[0] if len(terms) == 1 else ('and', terms)
+
+   def parse_not(self):
+       token = self.peek()
+       if token is None:
+           raise ValueError("query ends too soon")
+       self.pos += 1
+       if token.upper() == 'NOT':
+           return ('not', self.parse_not())
+       if token == '(':
+           tree = self.parse_or()
+           if self.peek() != ')':
+               raise ValueError("missing ')'")
+           self.pos += 1
+           return tree
+       if token == ')' or token.upper() in ('AND', 'OR'):
+           raise ValueError("unexpected " + repr(token))
+       match = QUERY_MIN.match(token)
+       if match:
+           return ('category', match.group(1), int(match.group(2)))
+       return ('category', token, 1)
+
+   def run(self, index):
+       """
+           Finds the images that match the query
+           Value: index (CategoryIndex or MappedIndex)
+           Returns: Sorted list of image ids (ints)
+       """
+       return list(self.evaluate(self.tree, index))
+
+   def evaluate(self, tree, index):
+       if tree[0] == 'category':
+           name, least = tree[1], tree[2]
+           if index.image_count(name) == 0:
+               raise ValueError("unknown category " + repr(name))
+           ids = index.image_ids(name)
+           if least <= 1:
+               return ids
+           return [i for i, n in zip(ids, index.image_instances(name)) if n >= least]
+       if tree[0] == 'or':
+           return sorted(set().union(*(self.evaluate(t, index) for t in tree[1])))
+       if tree[0] == 'not':
+           return sorted(set(index.all_image_ids()).difference(self.evaluate(tree[1], index)))
+       #AND: intersect the positive terms smallest first, then take out the negated ones
+       positive = [self.evaluate(t, index) for t in tree[1] if t[0] != 'not']
+       negative = [self.evaluate(t[1], index) for t in tree[1] if t[0] == 'not']
+       if not positive:
+           positive = [index.all_image_ids()]
+       positive.sort(key=len)
+       result = positive[0]
+       for ids in positive[1:]:
+           if not result:
+               break
+           result = intersect_ids(result, ids)
+       for ids in negative:
+           if result:
+               result = sorted(set(result).difference(ids))
+       return result
+
+def load_numpy():
+   """
+       Imports NumPy and SciPy, which only the co-occurrence statistics use,
+       so the rest of the program runs without them
+       Value: None
+       Returns: A tuple (numpy module, scipy.sparse module)
+   """
+   try:
+       import numpy
+       from scipy import sparse
+   except ImportError:
+       raise ImportError("category co-occurrence needs numpy and scipy (pip install numpy scipy)")
+   return numpy, sparse
+
+def incidence_matrix(index, categories):
+   """
+       Builds the sparse image x category matrix with a 1 where a category
+       appears in an image. Rows follow the index's sorted list of all
+       images, so images without categories are empty rows.
+       Value: index (CategoryIndex or MappedIndex), categories (list of names, the columns)
+       Returns: matrix (scipy.sparse.csr_matrix of int64)
+   """
+   np, sparse = load_numpy()
+   all_ids = np.frombuffer(index.all_image_ids(), dtype=np.int64)
+   #the id lists are viewed in place and joined once, not turned into Python ints
+   ids = [np.frombuffer(index.image_ids(s), dtype=np.int64) for s in categories]
+   lengths = np.array([len(x) for x in ids], dtype=np.int64)
+   rows = np.searchsorted(all_ids, np.concatenate(ids)) if ids else np.zeros(0, dtype=np.int64)
+   cols = np.repeat(np.arange(len(categories)), lengths)
+   data = np.ones(len(rows), dtype=np.int64)
+   return sparse.csr_matrix((data, (rows, cols)), shape=(len(all_ids), len(categories)))
+
+class CategoryCooccurrence():
+   """
+       Which categories appear in the same images. With X the image x
+       category incidence matrix, counts = X.T X holds the images each pair
+       shares (the diagonal is the images of each category). lift divides
+       that by what independent categories would share, N D^-1 counts D^-1
+       with D the diagonal and N the number of images, and pmi is the
+       natural log of lift. Only pairs seen together are stored, so all
+       three stay sparse however many categories there are.
+   """
+   def __init__(self, index):
+       np, sparse = load_numpy()
+       self.categories = index.categories()
+       self.position = {s: i for i, s in enumerate(self.categories)}
+       X = incidence_matrix(index, self.categories)
+       self.images = X.shape[0]
+       self.counts = (X.T @ X).tocsr()
+       self.totals = self.counts.diagonal()
+       #each stored pair divided once, so equal pairs get equal lifts and top_pairs ranks them by name
+       pairs = self.counts.tocoo()
+       lift = pairs.data * self.images / (self.totals[pairs.row].astype(float) * self.totals[pairs.col])
+       self.lift = sparse.csr_matrix((lift, (pairs.row, pairs.col)), shape=self.counts.shape)
+       self.pmi = self.lift.copy()
+       self.pmi.data = np.log(self.pmi.data)
+
+   def pair(self, a, b):
+       """
+           Looks up the statistics of two categories
+           Value: a, b (category names)
+           Returns: A tuple (images with both (int), lift (float), pmi (float))
+       """
+       for s in (a, b):
+           if s not in self.position:
+               raise ValueError("unknown category " + repr(s))
+       i, j = self.position[a], self.position[b]
+       count = int(self.counts[i, j])
+       if count == 0:
+           return 0, 0.0, float('-inf')
+       return count, float(self.lift[i, j]), float(self.pmi[i, j])
+
+   def top_pairs(self, n=10, by="count", min_count=1):
+       """
+           Ranks the pairs of different categories that share images, best
+           first (ties by name). Lift and pmi favour rare pairs, so min_count
+           leaves out pairs seen in fewer images than that.
+           Value: n (int), by (string: count, lift or pmi), min_count (int)
+           Returns: List of tuples (category, category, images with both, lift, pmi)
+       """
+       np, sparse = load_numpy()
+       if by not in ("count", "lift", "pmi"):
+           raise ValueError("by must be count, lift or pmi")
+       upper = sparse.triu(self.counts, k=1).tocoo()
+       keep = upper.data >= min_count
+       rows, cols, counts = upper.row[keep], upper.col[keep], upper.data[keep]
+       #read lift and pmi from the stored matrices at the same pairs
+       lift = np.asarray(self.lift[rows, cols]).ravel()
+       pmi = np.asarray(self.pmi[rows, cols]).ravel()
+       score = {"count": counts, "lift": lift, "pmi": pmi}[by]
+       if n <= 0 or not len(score):
+           return []
+       if n < len(score):
+           #only the pairs at least as good as the nth best are sorted
+           least = np.partition(score, len(score) - n)[len(score) - n]
+           best = np.flatnonzero(score >= least)
+       else:
+           best = np.arange(len(score))
+       best = best[np.lexsort((cols[best], rows[best], -score[best]))][:n]
+       return [(self.categories[rows[k]], self.categories[cols[k]], int(counts[k]), float(lift[k]),
+                float(pmi[k])) for k in best]
+
+def stem(word):
+   """
+       Strips common English endings so that forms of a word count together
+       (a light suffix stripper, not a full stemming algorithm)
+       Value: A word (string)
+       Returns: The stem (string)
+   """
+   for suffix, repl in STEM_SUFFIXES:
+       if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+           return word[:len(word) - len(suffix)] + repl
+   return word
+
+def caption_tokens(x, lower=False, stemmed=False, ngram=1):
+   """
+       Splits a caption into the words that are counted
+       Value: caption (string), lower (bool, lowercase first), stemmed (bool),
+           ngram (int, count runs of this many words instead of single words)
+       Returns: List of strings
+   """
+   #remove punctuation in one pass
+   x = x.translate(PUNCTUATION_TABLE)
+   stop = STOP_SET
+   if lower:
+       x, stop = x.lower(), LOWER_STOP_SET
+   # divide words in sentence into a list of words, leaving out the stop words
+   words = [word for word in x.split() if word not in stop]
+   if stemmed:
+       words = [stem(word) for word in words]
+   if ngram > 1:
+       words = [" ".join(words[i:i + ngram]) for i in range(len(words) - ngram + 1)]
+   return words
+
+def add_caption_words(clist, tempD, lower=False, stemmed=False, ngram=1):
+   """
+       Adds the words of an image's captions to the word counts
+       Value: List of captions (strings), counts (Counter), and the options of caption_tokens
+       Returns: None
+   """
+   if not (lower or stemmed or ngram > 1):
+       #plain words: one generator over all the captions, no per-caption lists
+       tempD.update(word for x in clist for word in x.translate(PUNCTUATION_TABLE).split()
+                    if word not in STOP_SET)
+       return
+   for x in clist:
+       tempD.update(caption_tokens(x, lower, stemmed, ngram))
+
+def count_words(D_annot, lower=False, stemmed=False, ngram=1):
    """
        Counts the occurrences of words in captions
-       Value: Dictionary of dictionaries (DD)
+       Value: Dictionary of dictionaries (DD), and the options of caption_tokens
        Returns: List of tuples (tuple_list)
    """
-   tempD = dict()
-   word_list = []
-   count_list_list = []
-   tuple_list = []
+   tempD = Counter()
    for key, value in D_annot.items():
-       clist = value.get("cap_list")
-       for x in clist:
-           #remove punctuation
-           for ele in x:
-               if ele in string.punctuation:
-                   x = x.replace(ele, "")
-           # divide words in sentence into a list of words
-           word_list = x.split()
-           for word in word_list:
-               if word not in STOP_WORDS: #don't include words in stop list
-                   if word not in tempD:
-                       tempD.update({word: int(1)}) #add first item to dict
-                   else:
-                       tempD.update({word: tempD.get(word) + 1})
-   #transform into list of tuples
-   for key, value in tempD.items():
-       count_list_list.append(list( (value,key) ))
+       add_caption_words(value.get("cap_list"), tempD, lower, stemmed, ngram)
+   return sort_word_counts(tempD)
+
+def sort_word_counts(tempD):
+   """
+       Orders word counts from the most to the least common
+       Value: Dictionary of counts (D)
+       Returns: List of tuples (count, word) (tuple_list)
+   """
    #sort by number then string
-   count_list_list.sort(key=lambda row: (row[0], row[1]),reverse = True)
-   #convert to tuple list
-   for item in count_list_list:
-       tuple_list.append(tuple(item))
-   return(tuple_list)
+   return sorted(((value, key) for key, value in tempD.items()), reverse=True)
+
+def top_words(tempD, n):
+   """
+       Finds the n most common words without sorting all of them
+       Value: Dictionary of counts (D) or saved word table (MappedWords), n (int)
+       Returns: List of tuples (count, word), in the same order as sort_word_counts
+   """
+   if isinstance(tempD, MappedWords):
+       return tempD.top(n)
+   return heapq.nlargest(n, ((value, key) for key, value in tempD.items()))
+
+def scan_annotations(records, D_cat, lower=False, stemmed=False, ngram=1):
+   """
+       Builds the category index and the caption word counts in one pass
+       over the images, without keeping the images themselves
+       Value: Iterable of tuples (image id, category labels, captions), dictionary (D),
+           and the options of caption_tokens
+       Returns: A tuple (category index (CategoryIndex), word counts (Counter))
+   """
+   index = CategoryIndex()
+   wordD = Counter() #word -> count
+   for image_id, labels, captions in records:
+       index.add(image_id, labels, D_cat)
+       add_caption_words(captions, wordD, lower, stemmed, ngram)
+   index.finish()
+   return index, wordD
+
+def object_records(obj):
+   """
+       Finds the images in one decoded JSON object, as read_annot_records does
+       Value: dictionary (an id->image object or one image with "image_id")
+       Returns: Generator of tuples (image id, category labels, captions)
+   """
+   for key, value in obj.items():
+       if isinstance(value, dict) and ("bbox_category_label" in value or "cap_list" in value):
+           yield annot_record(key, value)
+   if "image_id" in obj:
+       yield annot_record(obj["image_id"], obj)
+
+def is_json_lines(path):
+   """
+       Tests if a file holds one JSON object per line
+       Value: path (string)
+       Returns: True or False (bool)
+   """
+   with open(path, 'rb') as fp:
+       line = fp.readline()
+   try:
+       return isinstance(json.loads(line), dict)
+   except ValueError:
+       return False
+
+def shard_ranges(path, shards):
+   """
+       Splits a JSON lines file into byte ranges that start and end on line breaks
+       Value: path (string), shards (int, number of ranges wanted)
+       Returns: List of tuples (start, end) (ints)
+   """
+   size = os.path.getsize(path)
+   bounds = [0]
+   with open(path, 'rb') as fp:
+       for i in range(1, shards):
+           fp.seek(max(size * i // shards, bounds[-1]))
+           #move on to the start of the next line
+           fp.readline()
+           if fp.tell() >= size:
+               break
+           if fp.tell() > bounds[-1]:
+               bounds.append(fp.tell())
+   bounds.append(size)
+   return list(zip(bounds[:-1], bounds[1:]))
+
+def scan_shard(task):
+   """
+       Scans one part of the input in a worker process
+       Value: A tuple (path, start, end, category dictionary, options);
+           start is None for a whole file in any format
+       Returns: A tuple (category index (CategoryIndex), word counts (Counter))
+   """
+   path, start, end, D_cat, options = task
+   if start is None:
+       with open(path) as fp:
+           return scan_annotations(read_annot_records(fp), D_cat, *options)
+   def records():
+       with open(path, 'rb') as fp:
+           fp.seek(start)
+           pos = start
+           while pos < end:
+               line = fp.readline()
+               if not line:
+                   break
+               pos += len(line)
+               if line.strip():
+                   yield from object_records(json.loads(line))
+   return scan_annotations(records(), D_cat, *options)
+
+def scan_sharded(paths, D_cat, workers=None, lower=False, stemmed=False, ngram=1):
+   """
+       Scans annotation files with a pool of worker processes. JSON lines
+       files are split into byte ranges; other files are one part each.
+       Each worker returns its own small index and counter, and they are
+       merged in input order, so the results match scan_annotations.
+       Value: paths (list of strings), dictionary (D), workers (int, None for one per CPU),
+           and the options of caption_tokens
+       Returns: A tuple (category index (CategoryIndex), word counts (Counter))
+   """
+   workers = workers or os.cpu_count() or 1
+   options = (lower, stemmed, ngram)
+   tasks = []
+   for path in paths:
+       if is_json_lines(path):
+           tasks.extend((path, start, end, D_cat, options) for start, end in shard_ranges(path, workers))
+       else:
+           tasks.append((path, None, None, D_cat, options))
+   index, wordD = CategoryIndex(), Counter()
+   with ProcessPoolExecutor(max_workers=min(workers, len(tasks) or 1)) as pool:
+       for part_index, part_words in pool.map(scan_shard, tasks):
+           index.merge(part_index)
+           wordD.update(part_words)
+   index.finish()
+   return index, wordD
+
+def source_stamp(path):
+   """
+       Records what a saved index was built from, to notice later changes
+       Value: path (string)
+       Returns: List [absolute path, size, modification time in ns]
+   """
+   st = os.stat(path)
+   return [os.path.abspath(path), st.st_size, st.st_mtime_ns]
+
+def prefix_digests(path, *sizes):
+   """
+       Fingerprints the start of a file up to each of several sizes, in one read
+       Value: path (string), sizes (ints, smallest first)
+       Returns: List of hex digests (strings)
+   """
+   digest = hashlib.sha1()
+   digests = []
+   done = 0
+   with open(path, 'rb') as fp:
+       for size in sizes:
+           while done < size:
+               block = fp.read(min(CHUNK_SIZE, size - done))
+               if not block:
+                   break
+               digest.update(block)
+               done += len(block)
+           digests.append(digest.hexdigest())
+   return digests
+
+def write_index(path, sources, options, index, wordD, sha1=None):
+   """
+       Saves a category index and word counts to a binary file: a header,
+       JSON metadata, then the image ids of all categories, the instances in
+       each of those images, every image id, the word counts in
+       sort_word_counts order, the offsets of the words and the words
+       themselves (UTF-8). The file is written next to its final name and
+       then renamed, so a reader never sees half a file.
+       Value: path (string), sources (list of source_stamp lists), options (list),
+           category index (CategoryIndex), word counts (D),
+           sha1 (string, prefix_digests of the whole JSON file when it was scanned)
+       Returns: None
+   """
+   postings, post_counts = array('q'), array('q')
+   categories = []
+   for s in index.categories():
+       ids = index.image_ids(s)
+       categories.append([s, index.instance_count(s), len(postings), len(ids)])
+       postings.extend(ids)
+       post_counts.extend(index.image_instances(s))
+   all_ids = array('q', index.all_image_ids())
+   ranked = sort_word_counts(wordD)
+   counts = array('q', (count for count, word in ranked))
+   blob = "".join(word for count, word in ranked).encode()
+   offsets = array('q', [0])
+   for count, word in ranked:
+       offsets.append(offsets[-1] + len(word.encode()))
+   meta = json.dumps({"sources": sources, "options": options, "byteorder": sys.byteorder,
+                      "categories": categories, "postings": len(postings), "images": len(all_ids),
+                      "words": len(ranked), "sha1": sha1}).encode()
+   #the arrays start on an 8-byte boundary so they can be viewed in place
+   meta += b' ' * (-(INDEX_HEADER.size + len(meta)) % 8)
+   temp = path + '.tmp'
+   with open(temp, 'wb') as fp:
+       fp.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(meta)))
+       fp.write(meta)
+       for part in (postings, post_counts, all_ids, counts, offsets):
+           part.tofile(fp)
+       fp.write(blob)
+   os.replace(temp, path)
+
+class MappedIndex():
+   """
+       A category index read from a saved index file. The image ids stay in
+       the memory-mapped file and are viewed in place, not copied.
+   """
+   def __init__(self, categories, postings, post_counts, all_ids):
+       self.entries = {s: (n, start, count) for s, n, start, count in categories}
+       self.postings = postings
+       self.post_counts = post_counts
+       self.all_ids = all_ids
+
+   def categories(self):
+       return sorted(self.entries)
+
+   def image_ids(self, s):
+       n, start, count = self.entries.get(s, (0, 0, 0))
+       return self.postings[start:start + count]
+
+   def image_instances(self, s):
+       n, start, count = self.entries.get(s, (0, 0, 0))
+       return self.post_counts[start:start + count]
+
+   def all_image_ids(self):
+       return self.all_ids
+
+   def instance_count(self, s):
+       return self.entries.get(s, (0, 0, 0))[0]
+
+   def image_count(self, s):
+       return self.entries.get(s, (0, 0, 0))[2]
+
+   def max_instances(self):
+       mcat = (0, "")
+       for s in sorted(self.entries):
+           if self.entries[s][0] > mcat[0]:
+               mcat = (self.entries[s][0], s)
+       return mcat
+
+   def max_images(self):
+       mcat = (0, "")
+       for s in sorted(self.entries):
+           if self.entries[s][2] > mcat[0]:
+               mcat = (self.entries[s][2], s)
+       return mcat
+
+class MappedWords():
+   """
+       Word counts read from a saved index file, already in
+       sort_word_counts order, so the top n are simply the first n
+   """
+   def __init__(self, counts, offsets, blob):
+       self.counts = counts
+       self.offsets = offsets
+       self.blob = blob
+
+   def __len__(self):
+       return len(self.counts)
+
+   def word(self, i):
+       return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode()
+
+   def top(self, n):
+       return [(self.counts[i], self.word(i)) for i in range(min(n, len(self.counts)))]
+
+   def items(self):
+       return ((self.word(i), self.counts[i]) for i in range(len(self.counts)))
+
+def read_index(path):
+   """
+       Memory-maps a saved index file without checking what it was built from
+       Value: path (string)
+       Returns: A tuple (metadata (D), MappedIndex, MappedWords), or None if
+           the file is missing or not readable on this machine
+   """
+   try:
+       with open(path, 'rb') as fp:
+           mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+   except (OSError, ValueError):
+       return None
+   try:
+       magic, version, meta_len = INDEX_HEADER.unpack_from(mm, 0)
+       if magic != INDEX_MAGIC or version != INDEX_VERSION:
+           return None
+       meta = json.loads(mm[INDEX_HEADER.size:INDEX_HEADER.size + meta_len])
+   except (struct.error, ValueError):
+       return None
+   if meta["byteorder"] != sys.byteorder:
+       return None
+   view = memoryview(mm)
+   pos = INDEX_HEADER.size + meta_len
+   parts = []
+   for n in (meta["postings"], meta["postings"], meta["images"], meta["words"], meta["words"] + 1):
+       parts.append(view[pos:pos + 8 * n].cast('q'))
+       pos += 8 * n
+   postings, post_counts, all_ids, counts, offsets = parts
+   return meta, MappedIndex(meta["categories"], postings, post_counts, all_ids), MappedWords(counts, offsets, view[pos:])
+
+def appended_from(meta, sources, options, json_path):
+   """
+       Tests if a saved index is stale only because whole lines were added
+       to the end of a JSON lines file, with the category file unchanged
+       Value: metadata of the saved index (D), sources (list of source_stamp lists),
+           options (list), json_path (string)
+       Returns: A tuple (the size the file had when the index was built (int),
+           prefix_digests of the whole file now (string)), or None
+   """
+   old = meta["sources"]
+   if meta["options"] != options or old[1] != sources[1] or old[0][0] != sources[0][0]:
+       return None
+   size = old[0][1]
+   if size == 0 or size >= sources[0][1] or meta.get("sha1") is None or not is_json_lines(json_path):
+       return None
+   with open(json_path, 'rb') as fp:
+       fp.seek(size - 1)
+       if fp.read(1) != b'\n':
+           return None
+   #all of the old content must still be there; hashing it is one read, far cheaper than parsing it
+   old_sha1, sha1 = prefix_digests(json_path, size, sources[0][1])
+   if old_sha1 != meta["sha1"]:
+       return None
+   return size, sha1
+
+def load_or_build_index(json_path, cat_path, workers=0, index_path=None, lower=False, stemmed=False, ngram=1):
+   """
+       Opens the saved index of a JSON file, or scans the files and saves a
+       new one when there is none or the JSON or category file has changed.
+       When lines were only appended to a JSON lines file, just the new
+       lines are scanned and added to the saved index.
+       Value: json_path, cat_path (strings), workers (int, 0 or 1 for one process),
+           index_path (string, None for the JSON path plus INDEX_SUFFIX, '' to not save),
+           and the options of caption_tokens
+       Returns: A tuple (category index, word counts)
+   """
+   if index_path is None:
+       index_path = json_path + INDEX_SUFFIX
+   sources = [source_stamp(json_path), source_stamp(cat_path)]
+   options = [lower, stemmed, ngram]
+   saved = read_index(index_path) if index_path else None
+   if saved is not None and saved[0]["sources"] == sources and saved[0]["options"] == options:
+       return saved[1], saved[2]
+   with open(cat_path) as fp2:
+       D_cat = read_category_file(fp2)
+   appended = appended_from(saved[0], sources, options, json_path) if saved is not None else None
+   if appended is not None:
+       #scan only the new lines and add them to a copy of the saved index
+       start, sha1 = appended
+       index, wordD = CategoryIndex.from_mapped(saved[1]), Counter(dict(saved[2].items()))
+       new_index, new_words = scan_shard((json_path, start, sources[0][1], D_cat, options))
+       index.merge(new_index)
+       index.finish()
+       wordD.update(new_words)
+   elif workers > 1:
+       index, wordD = scan_sharded([json_path], D_cat, workers, lower, stemmed, ngram)
+   else:
+       with open(json_path) as fp:
+           index, wordD = scan_annotations(read_annot_records(fp), D_cat, lower, stemmed, ngram)
+   if index_path:
+       try:
+           if appended is None:
+               sha1 = prefix_digests(json_path, sources[0][1])[0]
+           write_index(index_path, sources, options, index, wordD, sha1)
+       except OSError:
+           pass #the index only saves time; carry on without it
+   return index, wordD
+
+class ImageDataset():
+   """
+       An annotation dataset loaded once for many questions. Open one with
+       ImageDataset.open, then call its methods or pass request dictionaries
+       (as read from a batch file) to answer. Rankings are worked out once
+       and remembered until update adds more images.
+   """
+   def __init__(self, index, words, D_cat=None, options=(False, False, 1)):
+       self.index = index #CategoryIndex or MappedIndex
+       self.words = words #word counts: Counter or MappedWords
+       self.D_cat = D_cat #category numbers -> names, needed by update
+       self.options = tuple(options) #options of caption_tokens
+       self.memo = dict() #remembered answers, cleared by update
+
+   @classmethod
+   def open(cls, json_path, cat_path, workers=0, index_path=None, lower=False, stemmed=False, ngram=1):
+       """
+           Loads a dataset through its saved index, building the index if needed
+           Value: the arguments of load_or_build_index
+           Returns: dataset (ImageDataset)
+       """
+       index, words = load_or_build_index(json_path, cat_path, workers, index_path, lower, stemmed, ngram)
+       with open(cat_path) as fp2:
+           D_cat = read_category_file(fp2)
+       return cls(index, words, D_cat, (lower, stemmed, ngram))
+
+   def update(self, records):
+       """
+           Adds new images to the statistics without recounting the old ones
+           Value: Iterable of tuples (image id, category labels, captions)
+           Returns: Number of images added (int)
+       """
+       if self.D_cat is None:
+           raise ValueError("the dataset has no category names to update with")
+       if isinstance(self.index, MappedIndex):
+           #a saved index is read-only; copy it into memory once
+           self.index = CategoryIndex.from_mapped(self.index)
+       if isinstance(self.words, MappedWords):
+           self.words = Counter(dict(self.words.items()))
+       n = 0
+       for image_id, labels, captions in records:
+           self.index.add(image_id, labels, self.D_cat)
+           add_caption_words(captions, self.words, *self.options)
+           n += 1
+       self.index.finish()
+       self.memo.clear()
+       return n
+
+   def append_file(self, path):
+       """
+           Adds the images of another annotation file to the statistics
+           Value: path (string)
+           Returns: Number of images added (int)
+       """
+       with open(path) as fp:
+           return self.update(read_annot_records(fp))
+
+   def remember(self, key, compute):
+       """
+           Returns a remembered answer, working it out the first time
+           Value: key (tuple), compute (function of no arguments)
+           Returns: The answer
+       """
+       if key not in self.memo:
+           self.memo[key] = compute()
+       return self.memo[key]
+
+   def categories(self):
+       return self.remember(("categories",), self.index.categories)
+
+   def ranked_categories(self, by="instances"):
+       """
+           Orders all categories by instances or by images, most first
+           (ties by name), once per update
+           Value: by (string, "instances" or "images")
+           Returns: List of tuples (count, category)
+       """
+       if by not in ("instances", "images"):
+           raise ValueError("by must be instances or images")
+       count = self.index.instance_count if by == "instances" else self.index.image_count
+       return self.remember(("ranked", by),
+                            lambda: sorted(((count(s), s) for s in self.categories()), key=lambda x: (-x[0], x[1])))
+
+   def top_categories(self, k=10, by="instances"):
+       """
+           Finds the k categories with the most instances or images
+           Value: k (int, 0 or more), by (string, "instances" or "images")
+           Returns: List of tuples (count, category), most first (ties by name)
+       """
+       if k < 0:
+           raise ValueError("k must not be negative")
+       return self.ranked_categories(by)[:k]
+
+   def find(self, category):
+       """
+           Lists the images a category appears in
+           Value: category name (string)
+           Returns: Sorted list of image ids (ints)
+       """
+       if self.index.image_count(category) == 0:
+           raise ValueError("unknown category " + repr(category))
+       return list(self.index.image_ids(category))
+
+   def query(self, text):
+       return CategoryQuery(text).run(self.index)
+
+   def max_instances(self):
+       ranked = self.ranked_categories("instances")
+       return ranked[0] if ranked and ranked[0][0] > 0 else (0, "")
+
+   def max_images(self):
+       ranked = self.ranked_categories("images")
+       return ranked[0] if ranked and ranked[0][0] > 0 else (0, "")
+
+   def top_words(self, n=10):
+       return self.remember(("top_words", n), lambda: top_words(self.words, n))
+
+   def cooccurrence(self):
+       return self.remember(("cooccurrence",), lambda: CategoryCooccurrence(self.index))
+
+   def top_pairs(self, n=10, by="count", min_count=1):
+       return self.cooccurrence().top_pairs(n, by, min_count)
 
-def main():    
+   def answer(self, request):
+       """
+           Answers one request. The op field picks the question:
+               categories, find (category), query (query), max_instances,
+               max_images, top_categories (k, default 10; by, instances or images),
+               top_words (n, default 10), top_pairs (n, default 10; by, count,
+               lift or pmi; min_count, default 1; needs numpy and scipy)
+           Value: request (dictionary)
+           Returns: reply (the request plus ok and result, or ok and error)
+       """
+       op = request.get("op")
+       try:
+           if op == "categories":
+               result = self.categories()
+           elif op == "find":
+               result = self.find(request["category"])
+           elif op == "query":
+               result = self.query(request["query"])
+           elif op in ("max_instances", "max_images"):
+               count, category = getattr(self, op)()
+               result = {"category": category, "count": count}
+           elif op == "top_categories":
+               result = [{"category": category, "count": count} for count, category in
+                         self.top_categories(int(request.get("k", 10)), request.get("by", "instances"))]
+           elif op == "top_words":
+               result = [{"word": word, "count": count} for count, word in self.top_words(int(request.get("n", 10)))]
+           elif op == "top_pairs":
+               result = [{"categories": [a, b], "count": count, "lift": lift, "pmi": pmi}
+                         for a, b, count, lift, pmi in self.top_pairs(int(request.get("n", 10)),
+                                                                      request.get("by", "count"),
+                                                                      int(request.get("min_count", 1)))]
+           else:
+               raise ValueError("unknown op " + repr(op) if op is not None else "no op given")
+       except KeyError as err:
+           return dict(request, ok=False, error="missing " + str(err))
+       except (TypeError, ValueError, ImportError) as err:
+           return dict(request, ok=False, error=str(err))
+       return dict(request, ok=True, result=result)
+
+def parse_request(line):
+   """
+       Reads one request line: a JSON object, or an op followed by its
+       argument, such as "find dog", "query dog AND NOT cat" or "top_words 5"
+       Value: line (string)
+       Returns: request (dictionary), or None for a blank line
+   """
+   line = line.strip()
+   if not line:
+       return None
+   if line.startswith('{'):
+       try:
+           request = json.loads(line)
+       except ValueError:
+           request = None
+       return request if isinstance(request, dict) else {"op": None, "line": line}
+   op, _, arg = line.partition(' ')
+   arg = arg.strip()
+   key = {"find": "category", "query": "query", "top_words": "n", "top_categories": "k", "top_pairs": "n"}.get(op)
+   if key is None or not arg:
+       return {"op": op}
+   return {"op": op, key: arg}
+
+def run_batch(dataset, fp_in, fp_out):
+   """
+       Answers every request in a file, writing one JSON line per request
+       Value: dataset (ImageDataset), fp_in and fp_out (file pointers)
+       Returns: Number of requests answered (int)
+   """
+   n = 0
+   for line in fp_in:
+       request = parse_request(line)
+       if request is None:
+           continue
+       fp_out.write(json.dumps(dataset.answer(request)) + "\n")
+       n += 1
+   return n
+
+def parse_args(arglist):
+    """
+       Parses the command-line options
+       Value: arglist (list of strings)
+       Returns: options (Namespace)
+    """
+    parser = ArgumentParser(description="Image annotation analyzer")
+    parser.add_argument('--workers', type=int, default=0,\
+            help="Scan the annotations with this many processes (JSON lines files are split by byte range)")
+    parser.add_argument('--no-index', action='store_true',\
+            help="Do not read or save the index file kept next to the JSON file")
+    parser.add_argument('--json', help="Annotation file; with --categories, answer requests without the menu")
+    parser.add_argument('--categories', help="Category file for --json")
+    parser.add_argument('--queries', default='-',\
+            help="File of requests, one per line ('-' for standard input)")
+    parser.add_argument('--output', default='-', help="File for the JSON lines replies ('-' for standard output)")
+    parser.add_argument('--lower', action='store_true', help="Lowercase caption words before counting")
+    parser.add_argument('--stem', action='store_true', help="Count caption words by their stems")
+    parser.add_argument('--ngram', type=int, default=1, help="Count runs of this many caption words")
+    args = parser.parse_args(arglist)
+    if bool(args.json) != bool(args.categories):
+        parser.error("--json and --categories go together")
+    return args
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    index_path = '' if args.no_index else None
+    if args.json:
+        #batch mode: load once, answer every request, no prompts
+        dataset = ImageDataset.open(args.json, args.categories, args.workers, index_path,\
+                args.lower, args.stem, args.ngram)
+        fp_in = sys.stdin if args.queries == '-' else open(args.queries)
+        fp_out = sys.stdout if args.output == '-' else open(args.output, 'w')
+        try:
+            run_batch(dataset, fp_in, fp_out)
+        finally:
+            if fp_in is not sys.stdin:
+                fp_in.close()
+            if fp_out is not sys.stdout:
+                fp_out.close()
+        return
     print("Images\n")
     # open the file of the JSON image
     fp=open_file("JSON image")
-    dd = read_annot_file(fp)
     #open the category file
     fp2 = open_file("category")
-    rd = read_category_file(fp2) #read category file
-    ccs = collect_catogory_set(dd, rd) #collect catogory set
-    cil = collect_img_list_for_categories(dd, rd, ccs) #collect img list
+    fp.close()
+    fp2.close()
+    #use the saved index, or stream the images once to build the category lists and word counts
+    dataset = ImageDataset.open(fp.name, fp2.name, args.workers, index_path,\
+            args.lower, args.stem, args.ngram)
+    index = dataset.index
+    clist = dataset.categories() #sorted category names
     #go through the options that the user could enter
     while True:
         sel = get_option() #selection
@@ -240,65 +1373,86 @@ def main():
         if sel=='q': break
         #if the user enters c, display the categories
         if sel == 'c':
-            clist = list(ccs)
-            clist.sort()
             print("Categories:")
             #seperate by commas
             print(", ".join(clist))
             continue
         #if the user enters f, find the images by category
         if sel == 'f':
-            clist = list(ccs)
-            #sort the list
-            clist.sort()
             print("Categories:")
             #seperate by commas
             print(", ".join(clist))
             while True:
                 #determine if what the user entered is valid
                 c = input("Choose a category from the list above: ")
-                if c not in clist:
+                if index.image_count(c) == 0:
                     print("Incorrect category choice.")
                     continue
                 print("The category {} appears in the following images:"\
                       .format(c))
-                #pull out image info for category chosen
-                ilist = cil.get(c)
-                #transform to a set to removed redundant image ids
-                iset = set(ilist)
-                #transform back to list so numbers can be sorted
-                ilist = list(iset)
-                #convert to integers
-                for i in range(0,len(ilist)):
-                    ilist[i] = int(ilist[i])
-                #sort integer list low-to-high
-                ilist.sort()
-                print(", ".join(str(e) for e in ilist))
+                #the index already holds distinct ids sorted low-to-high
+                print(", ".join(map(str, index.image_ids(c))))
                 break
             continue
+        #if the user enters b, find the images that match a query
+        if sel == 'b':
+            print("Categories:")
+            print(", ".join(clist))
+            while True:
+                text = input("Enter a query (for example: person AND dog NOT car, dog>=2): ")
+                try:
+                    ilist = CategoryQuery(text).run(index)
+                except ValueError as err:
+                    print("Incorrect query: {}.".format(err))
+                    continue
+                break
+            if not ilist:
+                print("No images match the query.")
+                continue
+            print("{} images match the query:".format(len(ilist)))
+            print(", ".join(map(str, ilist)))
+            continue
         #if user enters i, find the max instances of categories and display
         if sel == 'i':
-            maxi = max_instances_for_item(cil) #max instances for item
+            maxi = dataset.max_instances() #max instances for item
             print("Max Instances: the category {} appears {} times in images."\
                   .format(maxi[1],maxi[0]))
             continue
         #if user enters m, find and display the max number of img in category
         if sel == 'm':
-            mif = max_images_for_item(cil) #max images for item
+            mif = dataset.max_images() #max images for item
             print("Max images: the category {} appears in {} images."\
                   .format(mif[1],mif[0]))
             continue
         #if user enters w, display the top ten words 
         if sel == 'w':
-            count_w = count_words(dd) #count words
             inpt = input("Enter number of desired words: ")
             #test for valid input
-            if inpt.isalnum():
+            if not inpt.strip().isdigit():
+                print("Incorrect number.  Please try again.")
                 continue
+            #the words were counted once at startup; each answer is remembered
+            count_w = dataset.top_words(int(inpt)) #count words
             print("Top {} words in captions.".format(int(inpt)))
             print("{:<14s}{:>6s}".format("word","count")) 
-            for num in range(0,int(inpt)):
-                print("{:<14s}{:>6d}".format(count_w[num][1],count_w[num][0]))
+            for count, word in count_w:
+                print("{:<14s}{:>6d}".format(word,count))
+            continue
+        #if user enters p, display the pairs of categories found together most
+        if sel == 'p':
+            inpt = input("Enter number of desired pairs: ")
+            if not inpt.strip().isdigit():
+                print("Incorrect number.  Please try again.")
+                continue
+            try:
+                pairs = dataset.top_pairs(int(inpt))
+            except ImportError as err:
+                print(err)
+                continue
+            print("Top {} pairs of categories in images.".format(int(inpt)))
+            print("{:<28s}{:>8s}{:>8s}".format("categories","images","lift"))
+            for a, b, count, lift, pmi in pairs:
+                print("{:<28s}{:>8d}{:>8.2f}".format(a + " & " + b,count,lift))
             continue
     print("\nThank you for running my code.")
     
@@ -0,0 +1,168 @@
+###################################################################
+# Bulk import and export for the Project #11 calendar assistant
+# Read events from CSV files or ICS-like files
+# Validate every row in one pass, parsing each date and time only once
+# Add the valid events together and report all rejected rows at once
+# Write the events of a range of dates back out
+###################################################################
+
+import csv
+import datetime
+import re
+
+from p11_event import P11_Event, CAL_TYPE, DAY_START, DAY_END, parse_date, parse_time, format_time
+
+CSV_FIELDS = ['date', 'time', 'duration', 'type']
+
+ICS_DURATION = re.compile(r'PT(?:(\d+)H)?(?:(\d+)M)?$')
+
+
+def read_csv(fp):
+    """
+       Reads event rows from a CSV file with date, time, duration and type columns
+       (a header row naming them is optional)
+       value: fp (open text file)
+       Returns: generator of tuples (line number, date, time, duration, type)
+    """
+    reader = csv.reader(fp)
+    for row in reader:
+        if not row or row[0].strip().lower() == 'date':
+            continue #blank line or header
+        row = [x.strip() for x in row] + [''] * (4 - len(row))
+        yield (reader.line_num, row[0], row[1], row[2], row[3].lower())
+
+
+def ics_start(value):
+    """
+       Converts an ICS DTSTART or DTEND value to a date and time string
+       value: value (string, yyyymmddThhmm[ss])
+       Returns: tuple (date (mm/dd/yyyy), time (hh:mm)) or (None, None)
+    """
+    match = re.match(r'(\d{4})(\d{2})(\d{2})T(\d{2})(\d{2})', value)
+    if match is None:
+        return None, None
+    year, month, day, hour, minute = match.groups()
+    return '{}/{}/{}'.format(month, day, year), '{:d}:{}'.format(int(hour), minute)
+
+
+def read_ics(fp):
+    """
+       Reads event rows from the VEVENT blocks of an ICS-like file, using
+       DTSTART, DURATION (or DTEND) and CATEGORIES
+       value: fp (open text file)
+       Returns: generator of tuples (line number, date, time, duration, type)
+    """
+    fields, line = None, 0
+    for n, text in enumerate(fp, 1):
+        key, _, value = text.strip().partition(':')
+        key = key.split(';')[0].upper() #drop parameters such as ;TZID=
+        if key == 'BEGIN' and value.upper() == 'VEVENT':
+            fields, line = dict(), n
+        elif key == 'END' and value.upper() == 'VEVENT' and fields is not None:
+            date, time = ics_start(fields.get('DTSTART', ''))
+            duration = ''
+            match = ICS_DURATION.match(fields.get('DURATION', ''))
+            if match and any(match.groups()):
+                duration = str(int(match.group(1) or 0) * 60 + int(match.group(2) or 0))
+            elif 'DTEND' in fields:
+                end_date, end_time = ics_start(fields['DTEND'])
+                start, end = parse_time(time), parse_time(end_time)
+                #a bad start or end leaves the duration empty for validate_rows to reject
+                if date is not None and end_date == date and start is not None and end is not None:
+                    duration = str(end - start)
+            yield (line, date, time, duration, fields.get('CATEGORIES', '').split(',')[0].strip().lower())
+            fields = None
+        elif fields is not None:
+            fields[key] = value.strip()
+
+
+def read_rows(path):
+    """
+       Reads event rows from a file, choosing the format by its extension
+       value: path (string, .ics for ICS-like files, anything else for CSV)
+       Returns: list of tuples (line number, date, time, duration, type)
+    """
+    with open(path, newline='') as fp:
+        if path.lower().endswith('.ics'):
+            return list(read_ics(fp))
+        return list(read_csv(fp))
+
+
+def validate_rows(rows):
+    """
+       Checks every row like the interactive prompt does and builds the events.
+       Each distinct date and time string is parsed once, however many rows use it.
+       value: rows (list of tuples (line number, date, time, duration, type))
+       Returns: tuple (events (list of tuples (line number, P11_Event)),
+                rejected rows (list of tuples (line number, reason)))
+    """
+    days, minutes = dict(), dict() #parsed dates and times
+    events, rejected = [], []
+    for line, date, time, duration, cal_type in rows:
+        if date not in days:
+            days[date] = parse_date(date)
+        if time not in minutes:
+            minutes[time] = parse_time(time)
+        day, start = days[date], minutes[time]
+        if day is None:
+            rejected.append((line, 'invalid date {!r}'.format(date)))
+        elif start is None:
+            rejected.append((line, 'invalid time {!r}'.format(time)))
+        elif not duration.isdigit() or int(duration) < 1:
+            rejected.append((line, 'invalid duration {!r}'.format(duration)))
+        elif cal_type not in CAL_TYPE:
+            rejected.append((line, 'invalid type {!r}'.format(cal_type)))
+        elif start < DAY_START or start + int(duration) > DAY_END:
+            rejected.append((line, 'outside {}-{}'.format(format_time(DAY_START), format_time(DAY_END))))
+        else:
+            events.append((line, P11_Event.from_parsed(date, time, int(duration), cal_type, day, start)))
+    return events, rejected
+
+
+def import_events(calendar, path):
+    """
+       Adds the events of a file to a calendar in one batch
+       value: calendar (P11_Calendar), path (string)
+       Returns: tuple (number of events added (int),
+                rejected rows (list of tuples (line number, reason)) in file order)
+    """
+    events, rejected = validate_rows(read_rows(path))
+    lines = {id(e): line for line, e in events}
+    conflicts = calendar.add_events([e for line, e in events])
+    for e, others in conflicts:
+        rejected.append((lines[id(e)], 'overlaps ' + str(others[0])))
+    rejected.sort(key=lambda x: x[0])
+    return len(events) - len(conflicts), rejected
+
+
+def export_events(calendar, path, first=None, last=None):
+    """
+       Writes the events from one date to another to a file, as ICS if the
+       path ends in .ics and as CSV otherwise
+       value: calendar (P11_Calendar), path (string),
+              first and last dates (strings, mm/dd/yyyy, both included; None for no limit)
+       Returns: number of events written (int)
+    """
+    first_day = parse_date(first) if first else 1
+    #without a last date, stop at the last single event or the end of the last series that ends
+    last_day = parse_date(last) if last else (calendar.last_day() or 1)
+    if first_day is None or last_day is None:
+        raise ValueError('invalid date range {!r} - {!r}'.format(first, last))
+    count = 0
+    with open(path, 'w', newline='') as fp:
+        if path.lower().endswith('.ics'):
+            fp.write('BEGIN:VCALENDAR\r\nVERSION:2.0\r\n')
+            for e in calendar.events_between(first_day, last_day):
+                d = datetime.date.fromordinal(e.day)
+                fp.write('BEGIN:VEVENT\r\nDTSTART:{:%Y%m%d}T{:02d}{:02d}00\r\nDURATION:PT{}M\r\n'
+                         'CATEGORIES:{}\r\nEND:VEVENT\r\n'.format(d, e.start // 60, e.start % 60,
+                                                                 e.duration, e.cal_type.upper()))
+                count += 1
+            fp.write('END:VCALENDAR\r\n')
+        else:
+            writer = csv.writer(fp)
+            writer.writerow(CSV_FIELDS)
+            for e in calendar.events_between(first_day, last_day):
+                writer.writerow([e.date, e.time, e.duration, e.cal_type])
+                count += 1
+    return count
@@ -0,0 +1,352 @@
+###################################################################
+# Calendar class for the Project #11 calendar assistant
+# Keep the events of each day in a list sorted by start time
+# Use binary search to add, delete, list and check for conflicts
+# Reject an event that overlaps one already on the calendar
+# Add many events at once and list the events of a range of days
+# Find free time by sweeping each day's events in start order
+# Keep recurring series as rules and expand them only for the days asked for
+# Record every change in an optional durable store (see p11_storage)
+###################################################################
+
+from bisect import bisect_left, bisect_right, insort
+from heapq import merge
+
+from p11_event import P11_Event, DAY_START, DAY_END, parse_date, parse_time, format_date, format_time
+from p11_recurrence import P11_Recurrence
+
+
+class P11_Calendar():
+    """
+       A calendar of events indexed by day.
+       Each day keeps its events sorted by start minute, and the events of a
+       day never overlap, so the only events that can conflict with a new one
+       are its neighbours in that order. days lists the day numbers that have
+       events, in order. series lists the recurring events (P11_Recurrence);
+       their occurrences are only built for the days a query covers. With a
+       store, the stored events are loaded first and every later change is
+       recorded in the store before it is applied.
+    """
+
+    def __init__(self, store=None):
+        self.starts = dict() #day number -> sorted start minutes
+        self.events = dict() #day number -> events in the same order
+        self.days = [] #sorted day numbers with at least one event
+        self.count = 0 #number of events
+        self.series = [] #recurring events
+        self.store = None
+        if store is not None:
+            #events loaded from the store must not be recorded again
+            store.load(self)
+            self.store = store
+
+    def __len__(self):
+        return self.count
+
+    def find_slot(self, day, start, end, series=True):
+        """
+           Finds where an interval goes in a day and whether it is free
+           value: day number (int), start and end minutes (int),
+                  series (bool, also check the occurrences of recurring events)
+           Returns: tuple (position (int), conflicting events (list))
+        """
+        starts = self.starts.get(day, [])
+        events = self.events.get(day, [])
+        i = bisect_right(starts, start) #position of the interval
+        conflicts = []
+        #the event before may run into the interval (only one can, since a day's events do not overlap)
+        if i > 0 and events[i - 1].end > start:
+            conflicts.append(events[i - 1])
+        #events after it conflict while they start before it ends
+        j = i
+        while j < len(starts) and starts[j] < end:
+            conflicts.append(events[j])
+            j += 1
+        if series:
+            #each series answers for the day without listing its other occurrences
+            conflicts.extend(s.occurrence(day) for s in self.series
+                             if s.start < end and start < s.end and s.occurs_on(day))
+        return i, conflicts
+
+    def conflicts(self, e):
+        """
+           Lists the events that overlap an event
+           value: e (P11_Event)
+           Returns: list of events (P11_Event)
+        """
+        if not e.valid:
+            return []
+        return self.find_slot(e.day, e.start, e.end)[1]
+
+    def add_event(self, e):
+        """
+           Adds an event if it is valid and does not overlap another event
+           value: e (P11_Event)
+           Returns: True or False (bool)
+        """
+        if not isinstance(e, P11_Event) or not e.valid:
+            return False
+        i, conflicts = self.find_slot(e.day, e.start, e.end)
+        if conflicts:
+            return False
+        if self.store is not None:
+            self.store.record_add(e)
+        if e.day not in self.starts:
+            self.starts[e.day] = []
+            self.events[e.day] = []
+            insort(self.days, e.day)
+        self.starts[e.day].insert(i, e.start)
+        self.events[e.day].insert(i, e)
+        self.count += 1
+        if self.store is not None:
+            self.store.maybe_compact()
+        return True
+
+    def add_events(self, events):
+        """
+           Adds many valid events at once, recording them in the store together.
+           An event is rejected if it is not valid, or overlaps one on the
+           calendar or one added before it in start time order.
+           value: events (list of P11_Event)
+           Returns: rejected events (list of tuples (event, conflicting events))
+        """
+        accepted = dict() #day number -> new events in start order
+        rejected = [(e, []) for e in events if not e.valid]
+        for e in sorted((e for e in events if e.valid), key=lambda e: (e.day, e.start)):
+            conflicts = self.find_slot(e.day, e.start, e.end)[1]
+            new = accepted.setdefault(e.day, [])
+            #the new events of a day do not overlap, so the last one ends latest
+            if new and new[-1].end > e.start:
+                conflicts.append(new[-1])
+            if conflicts:
+                rejected.append((e, conflicts))
+            else:
+                new.append(e)
+        new_events = [e for day in accepted for e in accepted[day]]
+        if not new_events:
+            return rejected
+        if self.store is not None:
+            self.store.record_batch(new_events)
+        for day, new in accepted.items():
+            if not new:
+                continue
+            #both lists are sorted, so sorting them together is a linear merge
+            events = sorted(self.events.get(day, []) + new, key=lambda e: e.start)
+            self.events[day] = events
+            self.starts[day] = [e.start for e in events]
+        self.days = sorted(self.starts)
+        self.count += len(new_events)
+        if self.store is not None:
+            self.store.maybe_compact()
+        return rejected
+
+    def events_between(self, first_day, last_day):
+        """
+           Yields the events from one day number to another, in order,
+           merging in the occurrences of recurring events as they come due
+           value: first_day, last_day (int, both included)
+           Returns: generator of events (P11_Event)
+        """
+        singles = (e for i in range(bisect_left(self.days, first_day), bisect_right(self.days, last_day))
+                   for e in self.events[self.days[i]])
+        if not self.series:
+            yield from singles
+            return
+        yield from merge(singles, *(s.occurrences(first_day, last_day) for s in self.series),
+                         key=lambda e: (e.day, e.start))
+
+    def last_day(self):
+        """
+           Finds the last day with a single event or the end of a series that ends
+           value: None
+           Returns: day number (int) or None for an empty calendar
+        """
+        ends = [s.last for s in self.series if s.last is not None]
+        if self.days:
+            ends.append(self.days[-1])
+        return max(ends) if ends else None
+
+    def delete_event(self, date, time):
+        """
+           Deletes the event starting at a date and time
+           value: date (string, mm/dd/yyyy), time (string, hh:mm)
+           Returns: True or False (bool)
+        """
+        day, start = parse_date(date), parse_time(time)
+        starts = self.starts.get(day)
+        if not starts or start is None:
+            return self.skip_occurrence(day, start)
+        i = bisect_left(starts, start)
+        if i == len(starts) or starts[i] != start:
+            return self.skip_occurrence(day, start)
+        if self.store is not None:
+            self.store.record_delete(self.events[day][i])
+        del starts[i]
+        del self.events[day][i]
+        self.count -= 1
+        #forget days that no longer have events
+        if not starts:
+            del self.starts[day]
+            del self.events[day]
+            del self.days[bisect_left(self.days, day)]
+        if self.store is not None:
+            self.store.maybe_compact()
+        return True
+
+    def skip_occurrence(self, day, start):
+        """
+           Cancels the occurrence of a recurring event at a day and start minute
+           value: day number (int), start minute (int)
+           Returns: True or False (bool)
+        """
+        if day is None or start is None:
+            return False
+        for s in self.series:
+            if s.start == start and s.occurs_on(day):
+                s.exceptions.add(day)
+                if self.store is not None:
+                    self.store.record_series(s)
+                    self.store.maybe_compact()
+                return True
+        return False
+
+    def add_series(self, s):
+        """
+           Adds a recurring event if it is valid and none of its occurrences
+           overlaps another event. Only the days that have single events and
+           the rules of the other series are checked.
+           value: s (P11_Recurrence)
+           Returns: True or False (bool)
+        """
+        if not isinstance(s, P11_Recurrence) or not s.valid or self.series_conflicts(s):
+            return False
+        if self.store is not None:
+            self.store.record_series(s)
+        self.series.append(s)
+        if self.store is not None:
+            self.store.maybe_compact()
+        return True
+
+    def series_conflicts(self, s):
+        """
+           Lists what overlaps a recurring event
+           value: s (P11_Recurrence)
+           Returns: list of single events (P11_Event) and series (P11_Recurrence)
+        """
+        conflicts = []
+        last = bisect_right(self.days, s.last) if s.last is not None else len(self.days)
+        for i in range(bisect_left(self.days, s.first), last):
+            day = self.days[i]
+            if s.occurs_on(day):
+                conflicts.extend(self.find_slot(day, s.start, s.end, series=False)[1])
+        conflicts.extend(x for x in self.series if x.overlaps(s))
+        return conflicts
+
+    def delete_series(self, date, time):
+        """
+           Deletes the recurring event that starts, or has an occurrence, at a date and time
+           value: date (string, mm/dd/yyyy), time (string, hh:mm)
+           Returns: True or False (bool)
+        """
+        day, start = parse_date(date), parse_time(time)
+        if day is None or start is None:
+            return False
+        for i, s in enumerate(self.series):
+            if s.start == start and (s.first == day or s.occurs_on(day)):
+                if self.store is not None:
+                    self.store.record_series_delete(s)
+                del self.series[i]
+                if self.store is not None:
+                    self.store.maybe_compact()
+                return True
+        return False
+
+    def day_events(self, day):
+        """
+           Lists the events of a day number in start order, occurrences included
+           value: day number (int)
+           Returns: list of events (P11_Event)
+        """
+        events = self.events.get(day, [])
+        occurrences = [s.occurrence(day) for s in self.series if s.occurs_on(day)]
+        if not occurrences:
+            return list(events)
+        return sorted(events + occurrences, key=lambda e: e.start)
+
+    def day_schedule(self, date):
+        """
+           Lists the events of a date in start time order
+           value: date (string, mm/dd/yyyy)
+           Returns: list of events (P11_Event)
+        """
+        day = parse_date(date)
+        return self.day_events(day) if day is not None else []
+
+    def range_events(self, first, last, cal_type=None):
+        """
+           Lists the events from one date to another, optionally of one type
+           value: first, last (strings, mm/dd/yyyy, both included), cal_type (string or None for all)
+           Returns: list of events (P11_Event) or None if a date is not valid
+        """
+        first_day, last_day = parse_date(first), parse_date(last)
+        if first_day is None or last_day is None:
+            return None
+        events = self.events_between(first_day, last_day)
+        if cal_type is None:
+            return list(events)
+        return [e for e in events if e.cal_type == cal_type]
+
+    def free_slots(self, first, last, duration, count=1, day_start=DAY_START, day_end=DAY_END):
+        """
+           Finds the first gaps of at least duration minutes between day_start
+           and day_end on the dates from first to last. Each day is swept once:
+           a gap is the time between the latest end so far and the next start.
+           value: first, last (strings, mm/dd/yyyy, both included), duration (int),
+                  count (int, most gaps to return), day_start and day_end (int, minutes)
+           Returns: list of tuples (date, start time, end time) (strings) or None if a date is not valid
+        """
+        if duration <= 0 or count <= 0:
+            raise ValueError("duration and count must be positive")
+        first_day, last_day = parse_date(first), parse_date(last)
+        if first_day is None or last_day is None:
+            return None
+        slots = []
+        for day in range(first_day, last_day + 1):
+            free = day_start #start of the current gap
+            for e in (self.day_events(day) if self.series else self.events.get(day, ())):
+                if e.start >= day_end:
+                    break
+                if e.start - free >= duration:
+                    slots.append((day, free, e.start))
+                    if len(slots) == count:
+                        break
+                free = max(free, e.end)
+            if len(slots) < count and day_end - free >= duration:
+                slots.append((day, free, day_end))
+            if len(slots) >= count:
+                break
+        return [(format_date(day), format_time(start), format_time(end)) for day, start, end in slots[:count]]
+
+    def close(self):
+        """
+           Closes the calendar's store, if it has one
+           value: None
+           Returns: None
+        """
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def __str__(self):
+        s = "Events:"
+        for day in self.days:
+            for e in self.events[day]:
+                s += "\n" + str(e)
+        if self.series:
+            s += "\nRecurring events:"
+            for x in self.series:
+                s += "\n" + str(x)
+        return s
+
+    def __repr__(self):
+        return self.__str__()
@@ -0,0 +1,130 @@
+###################################################################
+# Event class for the Project #11 calendar assistant
+# Validate the date, start time, duration and type of an event
+# Parse the date and time once into a day number and start minute
+# Display the event
+###################################################################
+
+import datetime
+
+CAL_TYPE = ['meeting','event','appointment','other']
+DAY_START = 360 #earliest start time in minutes (6 * 60)
+DAY_END = 1020 #latest end time in minutes (17 * 60)
+
+
+def parse_date(date):
+    """
+       Converts a date string to a day number (proleptic Gregorian ordinal)
+       value: date (string, mm/dd/yyyy)
+       Returns: day number (int) or None if the date is not valid
+    """
+    try:
+        month, day, year = date.split('/')
+        if len(year) != 4:
+            return None
+        return datetime.date(int(year), int(month), int(day)).toordinal()
+    except (AttributeError, ValueError):
+        return None
+
+
+def parse_time(time):
+    """
+       Converts a time string to minutes after midnight
+       value: time (string, hh:mm)
+       Returns: minutes (int) or None if the time is not valid
+    """
+    try:
+        hours, minutes = time.split(':')
+        hours, minutes = int(hours), int(minutes)
+    except (AttributeError, ValueError):
+        return None
+    if 0 <= hours < 24 and 0 <= minutes < 60:
+        return hours * 60 + minutes
+    return None
+
+
+def format_date(day):
+    """
+       Converts a day number back to a date string
+       value: day number (int)
+       Returns: date (string, mm/dd/yyyy)
+    """
+    return datetime.date.fromordinal(day).strftime('%m/%d/%Y')
+
+
+def format_time(minutes):
+    """
+       Converts minutes after midnight back to a time string
+       value: minutes (int)
+       Returns: time (string, hh:mm)
+    """
+    return '{:d}:{:02d}'.format(minutes // 60, minutes % 60)
+
+
+class P11_Event():
+    """
+       A single calendar event: a date, start time, duration and type.
+       The date and time are parsed once; day is the date's day number and
+       start/end are minutes after midnight. valid is False if any part is bad.
+    """
+    __slots__ = ('date', 'time', 'duration', 'cal_type', 'day', 'start', 'end', 'valid')
+
+    def __init__(self, date=None, time='9:00', duration=60, cal_type='meeting'):
+        self.date = date
+        self.time = time
+        self.duration = duration
+        self.cal_type = cal_type
+        self.day = parse_date(date)
+        self.start = parse_time(time)
+        #an event must have a good date and time, a whole positive duration and a known type
+        self.valid = (self.day is not None and self.start is not None and type(duration) == int
+                      and duration > 0 and cal_type in CAL_TYPE)
+        self.end = self.start + duration if self.valid else None
+
+    @classmethod
+    def from_parsed(cls, date, time, duration, cal_type, day, start):
+        """
+           Builds a valid event from strings that were already parsed
+           value: date, time (strings), duration (int), cal_type (string),
+                  day number and start minute (int)
+           Returns: event (P11_Event)
+        """
+        e = cls.__new__(cls)
+        e.date, e.time, e.duration, e.cal_type = date, time, duration, cal_type
+        e.day, e.start, e.end, e.valid = day, start, start + duration, True
+        return e
+
+    def get_date(self):
+        return self.date
+
+    def get_time(self):
+        return self.time
+
+    def get_duration(self):
+        return self.duration
+
+    def get_type(self):
+        return self.cal_type
+
+    def overlaps(self, other):
+        """
+           Tests if two events share any minute
+           value: other (P11_Event)
+           Returns: True or False (bool)
+        """
+        return self.day == other.day and self.start < other.end and other.start < self.end
+
+    def __str__(self):
+        return "{}: start: {}; duration: {}; type: {}".format(self.date, self.time, self.duration, self.cal_type)
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __eq__(self, other):
+        if not isinstance(other, P11_Event):
+            return NotImplemented
+        return (self.day, self.start, self.duration, self.cal_type) == \
+            (other.day, other.start, other.duration, other.cal_type)
+
+    def __hash__(self):
+        return hash((self.day, self.start, self.duration, self.cal_type))
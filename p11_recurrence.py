@@ -0,0 +1,222 @@
+###################################################################
+# Recurring events for the Project #11 calendar assistant
+# Store a series as its first event plus a daily, weekly or monthly rule
+# Test whether the series falls on a day with arithmetic, not by listing it
+# Generate the occurrences of a window of days only when asked for them
+###################################################################
+
+import datetime
+
+from p11_event import P11_Event, parse_date, format_date
+
+FREQS = ['daily', 'weekly', 'monthly']
+
+
+def month_index(date):
+    """
+       Numbers months consecutively so that month differences are subtractions
+       value: date (datetime.date)
+       Returns: month index (int)
+    """
+    return date.year * 12 + date.month - 1
+
+
+class P11_Recurrence():
+    """
+       A recurring event: the first occurrence (a P11_Event) repeated every
+       interval days, weeks or months. count limits the number of occurrences
+       and until (mm/dd/yyyy) the last date; exceptions holds the day numbers
+       of cancelled occurrences. A monthly series skips months that lack its
+       day of the month, and those months do not count towards count.
+       last is the day number of the last occurrence, or None if the series
+       never ends. valid is False if any part of the rule is bad.
+    """
+    __slots__ = ('event', 'freq', 'interval', 'count', 'until', 'exceptions', 'first', 'last', 'valid')
+
+    def __init__(self, event, freq='weekly', interval=1, count=None, until=None, exceptions=()):
+        self.event = event
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+        self.exceptions = set(exceptions) #day numbers
+        self.first = event.day
+        until_day = parse_date(until) if until is not None else None
+        self.valid = (event.valid and freq in FREQS and type(interval) == int and interval > 0
+                      and (count is None or (type(count) == int and count > 0))
+                      and (until is None or (until_day is not None and until_day >= event.day)))
+        self.last = None
+        if self.valid and count is not None:
+            self.last = self.nth_day(count - 1)
+        if self.valid and until_day is not None:
+            self.last = until_day if self.last is None else min(self.last, until_day)
+
+    @property
+    def start(self):
+        return self.event.start
+
+    @property
+    def end(self):
+        return self.event.end
+
+    def nth_day(self, n):
+        """
+           Finds the day of the occurrence after n others (exceptions included)
+           value: n (int)
+           Returns: day number (int)
+        """
+        if self.freq != 'monthly':
+            return self.first + n * self.step()
+        for day in self.days(self.first, datetime.date.max.toordinal()):
+            if n == 0:
+                return day
+            n -= 1
+
+    def step(self):
+        """
+           Days between occurrences of a daily or weekly series
+           value: None
+           Returns: days (int)
+        """
+        return self.interval * (7 if self.freq == 'weekly' else 1)
+
+    def occurs_on(self, day):
+        """
+           Tests if the series has an occurrence on a day, in constant time
+           value: day number (int, or None for a bad date)
+           Returns: True or False (bool)
+        """
+        if day is None or day < self.first or (self.last is not None and day > self.last) or day in self.exceptions:
+            return False
+        if self.freq != 'monthly':
+            return (day - self.first) % self.step() == 0
+        date, first = datetime.date.fromordinal(day), datetime.date.fromordinal(self.first)
+        return date.day == first.day and (month_index(date) - month_index(first)) % self.interval == 0
+
+    def days(self, first_day, last_day):
+        """
+           Yields the days the rule falls on from one day to another, in order,
+           starting at the first of them rather than at the start of the series
+           (exceptions and the end of the series are not applied)
+           value: first_day, last_day (int, both included)
+           Returns: generator of day numbers (int)
+        """
+        first_day = max(first_day, self.first)
+        if self.freq != 'monthly':
+            step = self.step()
+            #round up to the next day on the rule
+            day = first_day + (self.first - first_day) % step
+            while day <= last_day:
+                yield day
+                day += step
+            return
+        first = datetime.date.fromordinal(self.first)
+        months = month_index(datetime.date.fromordinal(first_day)) - month_index(first)
+        index = month_index(first) + months + (-months) % self.interval
+        while True:
+            try:
+                date = datetime.date(index // 12, index % 12 + 1, first.day)
+            except ValueError:
+                if index // 12 > datetime.MAXYEAR:
+                    return
+                index += self.interval #this month has no such day
+                continue
+            day = date.toordinal()
+            if day > last_day:
+                return
+            if day >= first_day:
+                yield day
+            index += self.interval
+
+    def occurrence(self, day):
+        """
+           Builds the event of one occurrence
+           value: day number (int)
+           Returns: event (P11_Event)
+        """
+        e = self.event
+        return P11_Event.from_parsed(format_date(day), e.time, e.duration, e.cal_type, day, e.start)
+
+    def occurrences(self, first_day, last_day):
+        """
+           Yields the occurrences from one day to another, in order, one at a time
+           value: first_day, last_day (int, both included)
+           Returns: generator of events (P11_Event)
+        """
+        if self.last is not None:
+            last_day = min(last_day, self.last)
+        for day in self.days(first_day, last_day):
+            if day not in self.exceptions:
+                yield self.occurrence(day)
+
+    def overlaps(self, other):
+        """
+           Tests if two series ever have occurrences that share a minute.
+           Only the sparser series is walked, and only over the days both run;
+           if neither ends, one full cycle of the combined pattern past the
+           last cancelled occurrence is enough.
+           value: other (P11_Recurrence)
+           Returns: True or False (bool)
+        """
+        if not (self.start < other.end and other.start < self.end):
+            return False
+        first = max(self.first, other.first)
+        lasts = [x.last for x in (self, other) if x.last is not None]
+        if lasts:
+            last = min(lasts)
+        else:
+            #the days of the week repeat every 400 years (146097 days); months every interval
+            cycle = 146097 * self.interval * other.interval
+            if self.freq != 'monthly' and other.freq != 'monthly':
+                cycle = self.step() * other.step()
+            #cancelled occurrences break the pattern, so it only repeats after the last of them
+            last = max(first, *self.exceptions, *other.exceptions) + cycle
+        sparse, dense = sorted((self, other), key=lambda x: -x.spacing())
+        return any(dense.occurs_on(day) for day in sparse.days(first, last)
+                   if day not in sparse.exceptions and (sparse.last is None or day <= sparse.last))
+
+    def spacing(self):
+        """
+           Approximate days between occurrences
+           value: None
+           Returns: days (int)
+        """
+        return self.interval * 30 if self.freq == 'monthly' else self.step()
+
+    def to_record(self):
+        """
+           Converts the series to plain values for storage
+           value: None
+           Returns: record (dict)
+        """
+        e = self.event
+        return {'date': e.date, 'time': e.time, 'duration': e.duration, 'type': e.cal_type,
+                'freq': self.freq, 'interval': self.interval, 'count': self.count, 'until': self.until,
+                'exceptions': sorted(self.exceptions)}
+
+    @classmethod
+    def from_record(cls, record):
+        """
+           Builds a series from a stored record
+           value: record (dict)
+           Returns: series (P11_Recurrence)
+        """
+        event = P11_Event(record['date'], record['time'], record['duration'], record['type'])
+        return cls(event, record['freq'], record['interval'], record['count'], record['until'],
+                   record['exceptions'])
+
+    def __str__(self):
+        e = self.event
+        s = "{}: start: {}; duration: {}; type: {}; repeats: {}".format(e.date, e.time, e.duration, e.cal_type, self.freq)
+        if self.interval != 1:
+            s += " every {}".format(self.interval)
+        if self.count is not None:
+            s += "; {} times".format(self.count)
+        if self.until is not None:
+            s += "; until {}".format(self.until)
+        if self.exceptions:
+            s += "; except " + ", ".join(format_date(day) for day in sorted(self.exceptions))
+        return s
+
+    def __repr__(self):
+        return self.__str__()
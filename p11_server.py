@@ -0,0 +1,252 @@
+###################################################################
+# Calendar service for the Project #11 calendar assistant
+# Serve one calendar to many clients over a TCP or Unix socket
+# Each request and reply is one line of JSON
+# Let reads run together and give each write the calendar to itself
+# Write to the store in a worker thread so slow disks do not stall reads
+# Answer reads in worker threads too, and cap how much one read may ask for
+###################################################################
+
+import asyncio
+import json
+
+from p11_batch import validate_rows
+from p11_event import parse_date
+from p11_recurrence import P11_Recurrence
+
+READ_OPS = ['list', 'range', 'free', 'ping']
+WRITE_OPS = ['add', 'delete', 'add_series', 'delete_series']
+MAX_DAYS = 3660 #longest date range a range or free request may cover (about ten years)
+MAX_COUNT = 1000 #most free slots one request may ask for
+
+
+def event_fields(e):
+    return [e.date, e.time, e.duration, e.cal_type]
+
+
+def split_address(address):
+    """
+       Splits a server address into a host and port, or a Unix socket path
+       value: address (string, host:port, :port or a path)
+       Returns: tuple (host (string), port (int)) or (path (string), None)
+    """
+    host, _, port = address.rpartition(':')
+    if port.isdigit() and '/' not in address:
+        return host or '127.0.0.1', int(port)
+    return address, None
+
+
+class ReadWriteLock():
+    """
+       Lets any number of readers in at once, or one writer on its own.
+       A waiting writer stops new readers, so writes are not starved.
+    """
+
+    def __init__(self):
+        self.readers = 0
+        self.writer = False
+        self.waiting = 0 #writers waiting for their turn
+        self.changed = asyncio.Condition()
+
+    async def acquire_read(self):
+        async with self.changed:
+            await self.changed.wait_for(lambda: not self.writer and not self.waiting)
+            self.readers += 1
+
+    async def release_read(self):
+        async with self.changed:
+            self.readers -= 1
+            self.changed.notify_all()
+
+    async def acquire_write(self):
+        async with self.changed:
+            self.waiting += 1
+            await self.changed.wait_for(lambda: not self.writer and not self.readers)
+            self.waiting -= 1
+            self.writer = True
+
+    async def release_write(self):
+        async with self.changed:
+            self.writer = False
+            self.changed.notify_all()
+
+
+class P11_Server():
+    """
+       Serves a calendar over a socket. Requests are JSON objects with an
+       op field:
+           add, add_series: date, time, duration, type (add_series also
+               freq and optionally interval, count, until)
+           delete, delete_series, list: date, time (list: date only)
+           range: first, last and optionally type
+           free: first, last, duration and optionally count
+               (range and free cover at most MAX_DAYS days, free at most MAX_COUNT slots)
+           ping
+       Every reply has ok (true or false) and, on failure, error.
+    """
+
+    def __init__(self, calendar):
+        self.calendar = calendar
+        self.lock = ReadWriteLock()
+        self.server = None
+
+    async def start(self, address):
+        """
+           Starts listening on an address
+           value: address (string, host:port, :port or a Unix socket path)
+           Returns: None
+        """
+        host, port = split_address(address)
+        if port is None:
+            self.server = await asyncio.start_unix_server(self.serve, path=host)
+        else:
+            self.server = await asyncio.start_server(self.serve, host, port)
+
+    async def serve_forever(self, address):
+        await self.start(address)
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def serve(self, reader, writer):
+        """
+           Answers the requests of one connection, one line at a time
+           value: reader, writer (asyncio streams)
+           Returns: None
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = await self.handle(line)
+                writer.write(json.dumps(reply).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def handle(self, line):
+        """
+           Runs one request under the lock its op needs
+           value: line (bytes, a JSON object)
+           Returns: reply (dict)
+        """
+        try:
+            request = json.loads(line)
+            op = request['op']
+        except (ValueError, TypeError, KeyError):
+            return {'ok': False, 'error': 'bad request'}
+        if op in READ_OPS:
+            await self.lock.acquire_read()
+            try:
+                #a long range still takes a while, so it runs in a worker thread and other clients go on
+                return await asyncio.get_running_loop().run_in_executor(None, self.read, op, request)
+            except (KeyError, TypeError, ValueError) as err:
+                return {'ok': False, 'error': 'bad request: ' + str(err)}
+            finally:
+                await self.lock.release_read()
+        if op in WRITE_OPS:
+            await self.lock.acquire_write()
+            try:
+                #the store may wait on the disk, so the write runs in a worker thread
+                return await asyncio.get_running_loop().run_in_executor(None, self.write, op, request)
+            except (KeyError, TypeError, ValueError) as err:
+                return {'ok': False, 'error': 'bad request: ' + str(err)}
+            finally:
+                await self.lock.release_write()
+        return {'ok': False, 'error': 'unknown op ' + repr(op)}
+
+    def read(self, op, request):
+        """
+           Answers a request that does not change the calendar
+           value: op (string), request (dict)
+           Returns: reply (dict)
+        """
+        c = self.calendar
+        if op == 'ping':
+            return {'ok': True}
+        if op == 'list':
+            return {'ok': True, 'events': [event_fields(e) for e in c.day_schedule(request['date'])]}
+        first_day, last_day = parse_date(request['first']), parse_date(request['last'])
+        if first_day is not None and last_day is not None and last_day - first_day >= MAX_DAYS:
+            return {'ok': False, 'error': 'range longer than {} days'.format(MAX_DAYS)}
+        if op == 'range':
+            events = c.range_events(request['first'], request['last'], request.get('type'))
+        else:
+            count = int(request.get('count', 1))
+            if count > MAX_COUNT:
+                return {'ok': False, 'error': 'count above {}'.format(MAX_COUNT)}
+            events = c.free_slots(request['first'], request['last'], int(request['duration']), count)
+        if events is None:
+            return {'ok': False, 'error': 'invalid date'}
+        if op == 'range':
+            return {'ok': True, 'events': [event_fields(e) for e in events]}
+        return {'ok': True, 'slots': events}
+
+    def write(self, op, request):
+        """
+           Carries out a request that changes the calendar
+           value: op (string), request (dict)
+           Returns: reply (dict)
+        """
+        c = self.calendar
+        if op in ('delete', 'delete_series'):
+            delete = c.delete_event if op == 'delete' else c.delete_series
+            if delete(request['date'], request['time']):
+                return {'ok': True}
+            return {'ok': False, 'error': 'no such event'}
+        #check new events the same way the prompt and the importer do
+        events, rejected = validate_rows([(None, request['date'], request['time'],
+                                           str(request['duration']), str(request['type']).lower())])
+        if rejected:
+            return {'ok': False, 'error': rejected[0][1]}
+        e = events[0][1]
+        if op == 'add':
+            if c.add_event(e):
+                return {'ok': True}
+            conflicts = c.conflicts(e)
+        else:
+            s = P11_Recurrence(e, request.get('freq'), request.get('interval', 1), request.get('count'),
+                               request.get('until'))
+            if not s.valid:
+                return {'ok': False, 'error': 'invalid recurrence'}
+            if c.add_series(s):
+                return {'ok': True}
+            conflicts = c.series_conflicts(s)
+        return {'ok': False, 'error': 'conflict', 'conflicts': [str(x) for x in conflicts]}
+
+
+class P11_Client():
+    """
+       A connection to a calendar server that sends one request at a time
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, address):
+        host, port = split_address(address)
+        if port is None:
+            return cls(*await asyncio.open_unix_connection(host))
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, **request):
+        """
+           Sends a request and waits for its reply
+           value: request fields (op and its arguments)
+           Returns: reply (dict)
+        """
+        self.writer.write(json.dumps(request).encode() + b'\n')
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
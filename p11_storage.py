@@ -0,0 +1,230 @@
+###################################################################
+# Durable storage for the Project #11 calendar assistant
+# Log every add and delete to an append-only file before applying it
+# Compact the log into a snapshot once it grows long enough
+# On startup load the snapshot and replay only the log written after it
+# Optionally keep the events in an indexed SQLite table instead
+###################################################################
+
+import json
+import os
+
+from p11_event import P11_Event, format_date, format_time
+from p11_recurrence import P11_Recurrence
+
+
+class P11_LogStore():
+    """
+       Stores a calendar as a snapshot file plus an append-only log of the
+       adds and deletes made since the snapshot. Every record carries a
+       sequence number; the snapshot remembers the last one it includes, so
+       a crash between writing a snapshot and clearing the log never replays
+       an operation twice, and a half-written last log line is ignored.
+    """
+
+    def __init__(self, directory, snapshot_every=1000, sync=True):
+        self.directory = directory
+        self.snapshot_every = snapshot_every #log records between snapshots
+        self.sync = sync #force each record to disk before returning
+        self.snapshot_path = os.path.join(directory, 'snapshot.json')
+        self.log_path = os.path.join(directory, 'events.log')
+        self.seq = 0 #sequence number of the last record
+        self.pending = 0 #records written since the last snapshot
+        self.log = None
+        self.calendar = None
+        os.makedirs(directory, exist_ok=True)
+
+    def load(self, calendar):
+        """
+           Fills a calendar from the snapshot and the log written after it
+           value: calendar (P11_Calendar)
+           Returns: None
+        """
+        self.calendar = calendar
+        try:
+            with open(self.snapshot_path) as fp:
+                snapshot = json.load(fp)
+        except FileNotFoundError:
+            snapshot = {'seq': 0, 'events': []}
+        calendar.add_events([P11_Event(*event) for event in snapshot['events']])
+        for record in snapshot.get('series', []):
+            calendar.add_series(P11_Recurrence.from_record(record))
+        self.seq = snapshot['seq']
+        good = 0 #length of the log up to its last complete record
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as fp:
+                for line in fp:
+                    #a record cut short by a crash, even one that still parses without its
+                    #newline, was never acknowledged and nothing after it was written
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    good += len(line)
+                    if record['seq'] <= snapshot['seq']:
+                        continue #already part of the snapshot
+                    self.apply(calendar, record)
+                    self.seq = record['seq']
+                    self.pending += 1
+        self.log = open(self.log_path, 'a')
+        #drop a torn last record so new records are not written after it
+        self.log.truncate(good)
+
+    def apply(self, calendar, record):
+        """
+           Replays one log record on a calendar
+           value: calendar (P11_Calendar), record (dict)
+           Returns: None
+        """
+        if record['op'] == 'add':
+            calendar.add_event(P11_Event(record['date'], record['time'], record['duration'], record['type']))
+        elif record['op'] == 'batch':
+            calendar.add_events([P11_Event(*event) for event in record['events']])
+        elif record['op'] == 'series':
+            #a series is logged again whenever its exceptions change
+            calendar.delete_series(record['series']['date'], record['series']['time'])
+            calendar.add_series(P11_Recurrence.from_record(record['series']))
+        elif record['op'] == 'unseries':
+            calendar.delete_series(record['date'], record['time'])
+        else:
+            calendar.delete_event(record['date'], record['time'])
+
+    def write(self, record):
+        """
+           Appends a record to the log, compacting it when it gets long
+           value: record (dict)
+           Returns: None
+        """
+        self.seq += 1
+        record['seq'] = self.seq
+        self.log.write(json.dumps(record) + '\n')
+        self.log.flush()
+        if self.sync:
+            os.fsync(self.log.fileno())
+        self.pending += 1
+
+    def maybe_compact(self):
+        """
+           Writes a snapshot once enough records have been logged since the last one
+           value: None
+           Returns: None
+        """
+        if self.pending >= self.snapshot_every:
+            self.compact()
+
+    def record_add(self, e):
+        self.write({'op': 'add', 'date': e.date, 'time': e.time, 'duration': e.duration, 'type': e.cal_type})
+
+    def record_delete(self, e):
+        self.write({'op': 'delete', 'date': e.date, 'time': e.time})
+
+    def record_batch(self, events):
+        """
+           Logs many added events as one record, so they are kept all or none
+           value: events (list of P11_Event)
+           Returns: None
+        """
+        self.write({'op': 'batch', 'events': [[e.date, e.time, e.duration, e.cal_type] for e in events]})
+
+    def record_series(self, s):
+        self.write({'op': 'series', 'series': s.to_record()})
+
+    def record_series_delete(self, s):
+        self.write({'op': 'unseries', 'date': s.event.date, 'time': s.event.time})
+
+    def compact(self):
+        """
+           Writes every current event to a new snapshot and starts an empty log
+           value: None
+           Returns: None
+        """
+        events = [[e.date, e.time, e.duration, e.cal_type]
+                  for day in self.calendar.days for e in self.calendar.events[day]]
+        temp = self.snapshot_path + '.tmp'
+        with open(temp, 'w') as fp:
+            json.dump({'seq': self.seq, 'events': events,
+                       'series': [s.to_record() for s in self.calendar.series]}, fp)
+            fp.flush()
+            os.fsync(fp.fileno())
+        #the snapshot only replaces the old one once it is completely on disk
+        os.replace(temp, self.snapshot_path)
+        self.log.close()
+        self.log = open(self.log_path, 'w')
+        self.pending = 0
+
+    def close(self):
+        if self.log is not None:
+            if self.pending:
+                self.compact()
+            self.log.close()
+            self.log = None
+
+
+class P11_SQLiteStore():
+    """
+       Stores a calendar in an SQLite table keyed on (day, start_minute),
+       the day number and start minute of each event. Each add or delete is
+       its own small transaction, so write time does not grow with the
+       calendar.
+    """
+
+    def __init__(self, path):
+        import sqlite3
+        #callers such as the calendar server write from worker threads, one at a time
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS events (day INTEGER NOT NULL, start_minute INTEGER NOT NULL, '
+                              'duration INTEGER NOT NULL, cal_type TEXT NOT NULL, '
+                              'PRIMARY KEY (day, start_minute)) WITHOUT ROWID')
+            #a recurring event is one row keyed by its first occurrence, holding its rule as JSON
+            self.conn.execute('CREATE TABLE IF NOT EXISTS series (day INTEGER NOT NULL, start_minute INTEGER NOT NULL, '
+                              'rule TEXT NOT NULL, PRIMARY KEY (day, start_minute)) WITHOUT ROWID')
+
+    def load(self, calendar):
+        """
+           Fills a calendar from the table
+           value: calendar (P11_Calendar)
+           Returns: None
+        """
+        rows = self.conn.execute('SELECT day, start_minute, duration, cal_type FROM events ORDER BY day, start_minute')
+        calendar.add_events([P11_Event.from_parsed(format_date(day), format_time(start), duration, cal_type, day, start)
+                             for day, start, duration, cal_type in rows])
+        for rule, in self.conn.execute('SELECT rule FROM series'):
+            calendar.add_series(P11_Recurrence.from_record(json.loads(rule)))
+
+    def maybe_compact(self):
+        pass #SQLite keeps its own table compact
+
+    def record_add(self, e):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?)', (e.day, e.start, e.duration, e.cal_type))
+
+    def record_delete(self, e):
+        with self.conn:
+            self.conn.execute('DELETE FROM events WHERE day = ? AND start_minute = ?', (e.day, e.start))
+
+    def record_batch(self, events):
+        """
+           Stores many added events in a single transaction
+           value: events (list of P11_Event)
+           Returns: None
+        """
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?)',
+                                  [(e.day, e.start, e.duration, e.cal_type) for e in events])
+
+    def record_series(self, s):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO series VALUES (?, ?, ?)',
+                              (s.first, s.start, json.dumps(s.to_record())))
+
+    def record_series_delete(self, s):
+        with self.conn:
+            self.conn.execute('DELETE FROM series WHERE day = ? AND start_minute = ?', (s.first, s.start))
+
+    def close(self):
+        self.conn.close()
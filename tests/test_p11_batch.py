@@ -0,0 +1,31 @@
+from p11_batch import import_events
+from p11_calendar import P11_Calendar
+
+ICS = """BEGIN:VCALENDAR
+BEGIN:VEVENT
+DTSTART:20260105T0900
+DTEND:20260105T2599
+CATEGORIES:MEETING
+END:VEVENT
+BEGIN:VEVENT
+DTSTART:20260105T2599
+DTEND:20260105T1000
+CATEGORIES:MEETING
+END:VEVENT
+BEGIN:VEVENT
+DTSTART:20260106T0900
+DTEND:20260106T1000
+CATEGORIES:MEETING
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def test_import_rejects_malformed_ics_rows(tmp_path):
+    path = tmp_path / "events.ics"
+    path.write_text(ICS)
+    c = P11_Calendar()
+    added, rejected = import_events(c, str(path))
+    assert added == 1
+    assert [line for line, reason in rejected] == [2, 7]
+    assert [e.duration for e in c.day_schedule('01/06/2026')] == [60]
@@ -0,0 +1,79 @@
+import pytest
+
+from p11_calendar import P11_Calendar
+from p11_event import P11_Event
+from p11_recurrence import P11_Recurrence
+
+
+def calendar_with_series():
+    c = P11_Calendar()
+    assert c.add_series(P11_Recurrence(P11_Event('01/05/2026', '9:00', 60, 'meeting')))
+    return c
+
+
+def test_delete_event_bad_date_with_series():
+    c = calendar_with_series()
+    assert c.delete_event('bad', '9:00') is False
+    assert c.delete_event('01/12/2026', 'bad') is False
+    assert c.delete_event('01/12/2026', '9:00') is True
+
+
+def test_delete_series_bad_date_or_time():
+    c = calendar_with_series()
+    assert c.delete_series('bad', '9:00') is False
+    assert c.delete_series('01/05/2026', '25:99') is False
+    assert len(c.series) == 1
+    assert c.delete_series('01/05/2026', '9:00') is True
+
+
+def test_free_slots_rejects_non_positive_duration_and_count():
+    c = calendar_with_series()
+    assert c.free_slots('01/05/2026', '01/05/2026', 30) == [('01/05/2026', '6:00', '9:00')]
+    for duration, count in ((0, 1), (-30, 1), (30, 0)):
+        with pytest.raises(ValueError):
+            c.free_slots('01/05/2026', '01/06/2026', duration, count)
+
+
+def test_series_conflict_check_sees_past_cancelled_occurrences():
+    c = P11_Calendar()
+    assert c.add_series(P11_Recurrence(P11_Event('01/05/2026', '9:00', 60, 'meeting'), 'daily'))
+    assert c.delete_event('01/05/2026', '9:00') is True
+    assert c.delete_event('01/12/2026', '9:00') is True
+    assert c.add_series(P11_Recurrence(P11_Event('01/05/2026', '9:00', 60, 'appointment'))) is False
+    assert len(c.day_schedule('01/19/2026')) == 1
+
+
+def test_range_events_filter_by_type():
+    c = calendar_with_series()
+    assert c.add_event(P11_Event('01/06/2026', '11:00', 30, 'appointment'))
+    assert c.add_event(P11_Event('01/20/2026', '11:00', 30, 'appointment'))
+    events = c.range_events('01/05/2026', '01/13/2026')
+    assert [(e.date, e.cal_type) for e in events] == [('01/05/2026', 'meeting'), ('01/06/2026', 'appointment'),
+                                                      ('01/12/2026', 'meeting')]
+    assert [e.date for e in c.range_events('01/01/2026', '01/31/2026', 'appointment')] == ['01/06/2026', '01/20/2026']
+    assert c.range_events('01/05/2026', 'bad') is None
+
+
+def test_free_slots_match_a_minute_by_minute_scan():
+    import random
+    from p11_event import DAY_START, DAY_END, format_time
+    random.seed(7)
+    c = calendar_with_series()
+    for _ in range(60):
+        c.add_event(P11_Event('01/{:02d}/2026'.format(random.randint(5, 9)),
+                              '{}:{:02d}'.format(random.randint(6, 16), random.choice((0, 15, 30, 45))),
+                              random.choice((15, 30, 60, 90)), 'event'))
+    for duration in (15, 45, 120):
+        expected = []
+        for date in ('01/05/2026', '01/06/2026', '01/07/2026', '01/08/2026', '01/09/2026'):
+            busy = {minute for e in c.day_schedule(date) for minute in range(e.start, e.end)}
+            gap = None
+            for minute in range(DAY_START, DAY_END + 1):
+                if minute < DAY_END and minute not in busy:
+                    gap = minute if gap is None else gap
+                elif gap is not None:
+                    if minute - gap >= duration:
+                        expected.append((date, format_time(gap), format_time(minute)))
+                    gap = None
+        assert c.free_slots('01/05/2026', '01/09/2026', duration, 1000) == expected
+        assert c.free_slots('01/05/2026', '01/09/2026', duration, 2) == expected[:2]
@@ -0,0 +1,63 @@
+import asyncio
+
+from p11_calendar import P11_Calendar
+from p11_event import P11_Event
+from p11_recurrence import P11_Recurrence
+from p11_server import MAX_COUNT, P11_Client, P11_Server
+
+
+def run_requests(requests):
+    async def session():
+        c = P11_Calendar()
+        c.add_series(P11_Recurrence(P11_Event('01/05/2026', '9:00', 60, 'meeting'), 'daily'))
+        server = P11_Server(c)
+        await server.start('127.0.0.1:0')
+        port = server.server.sockets[0].getsockname()[1]
+        client = await P11_Client.connect('127.0.0.1:{}'.format(port))
+        try:
+            return [await client.request(**request) for request in requests]
+        finally:
+            await client.close()
+            server.server.close()
+            await server.server.wait_closed()
+    return asyncio.run(session())
+
+
+def test_reads_are_limited_and_validated():
+    replies = run_requests([
+        {'op': 'range', 'first': '01/05/2026', 'last': '01/07/2026'},
+        {'op': 'range', 'first': '01/01/2026', 'last': '01/01/2126'},
+        {'op': 'free', 'first': '01/05/2026', 'last': '01/05/2026', 'duration': 30},
+        {'op': 'free', 'first': '01/05/2026', 'last': '01/05/2026', 'duration': 0},
+        {'op': 'free', 'first': '01/05/2026', 'last': '01/05/2026', 'duration': 30, 'count': MAX_COUNT + 1},
+        {'op': 'ping'},
+    ])
+    assert replies[0] == {'ok': True, 'events': [['01/0{}/2026'.format(d), '9:00', 60, 'meeting'] for d in (5, 6, 7)]}
+    assert [reply['ok'] for reply in replies[1:]] == [False, True, False, False, True]
+    assert replies[2]['slots'] == [['01/05/2026', '6:00', '9:00']]
+
+
+def test_concurrent_clients_cannot_double_book(tmp_path):
+    async def session():
+        c = P11_Calendar()
+        server = P11_Server(c)
+        address = str(tmp_path / 'calendar.sock')
+        await server.start(address)
+        clients = [await P11_Client.connect(address) for _ in range(8)]
+        try:
+            #every client asks for the same hour at once; the writes take turns
+            replies = await asyncio.gather(*(client.request(op='add', date='01/05/2026', time='10:00',
+                                                            duration=60, type='meeting') for client in clients))
+            listed = await asyncio.gather(*(client.request(op='list', date='01/05/2026') for client in clients))
+            deleted = await clients[0].request(op='delete', date='01/05/2026', time='10:00')
+            return replies, listed, deleted, await clients[1].request(op='list', date='01/05/2026')
+        finally:
+            for client in clients:
+                await client.close()
+            server.server.close()
+            await server.server.wait_closed()
+    replies, listed, deleted, after = asyncio.run(session())
+    assert sorted(reply['ok'] for reply in replies) == [False] * 7 + [True]
+    assert all(reply['error'] == 'conflict' for reply in replies if not reply['ok'])
+    assert all(reply['events'] == [['01/05/2026', '10:00', 60, 'meeting']] for reply in listed)
+    assert deleted == {'ok': True} and after == {'ok': True, 'events': []}
@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+
+from p11_calendar import P11_Calendar
+from p11_event import P11_Event
+from p11_recurrence import P11_Recurrence
+from p11_storage import P11_LogStore, P11_SQLiteStore
+
+
+def open_calendar(directory):
+    store = P11_LogStore(str(directory), sync=False)
+    calendar = P11_Calendar(store)
+    return calendar
+
+
+def schedule(calendar):
+    return [(e.date, e.time) for e in calendar.range_events('01/01/2026', '12/31/2026')]
+
+
+@pytest.mark.parametrize("torn", [b'{"op": "add", "date": "01/0', b'{"op": "add", "seq": 3, "date": "01/07/2026",'
+                                  b' "time": "9:00", "duration": 60, "type": "meeting"}'])
+def test_log_store_recovers_from_torn_record(tmp_path, torn):
+    calendar = open_calendar(tmp_path)
+    assert calendar.add_event(P11_Event('01/05/2026', '9:00', 60, 'meeting'))
+    assert calendar.add_event(P11_Event('01/06/2026', '9:00', 60, 'meeting'))
+    #a crash in the middle of the third write leaves part of a record without its newline
+    with open(os.path.join(str(tmp_path), 'events.log'), 'ab') as fp:
+        fp.write(torn)
+
+    calendar = open_calendar(tmp_path)
+    assert schedule(calendar) == [('01/05/2026', '9:00'), ('01/06/2026', '9:00')]
+    assert calendar.add_event(P11_Event('01/08/2026', '9:00', 60, 'meeting'))
+
+    #read the log as another crash would leave it, before close writes a snapshot
+    with open(os.path.join(str(tmp_path), 'events.log'), 'rb') as fp:
+        lines = fp.read().split(b'\n')
+    assert lines[-1] == b''
+    assert [json.loads(line)['seq'] for line in lines[:-1]] == [1, 2, 3]
+    calendar = open_calendar(tmp_path)
+    assert schedule(calendar) == [('01/05/2026', '9:00'), ('01/06/2026', '9:00'), ('01/08/2026', '9:00')]
+    calendar.close()
+
+
+@pytest.mark.parametrize("make_store", [lambda path: P11_LogStore(str(path), snapshot_every=2, sync=False),
+                                        lambda path: P11_SQLiteStore(str(path / 'calendar.db'))])
+def test_calendar_survives_a_restart(tmp_path, make_store):
+    calendar = P11_Calendar(make_store(tmp_path))
+    for date in ('01/05/2026', '01/06/2026', '01/07/2026'):
+        assert calendar.add_event(P11_Event(date, '9:00', 60, 'meeting'))
+    assert calendar.delete_event('01/06/2026', '9:00')
+    assert calendar.add_series(P11_Recurrence(P11_Event('01/05/2026', '13:00', 30, 'other')))
+    assert calendar.delete_event('01/12/2026', '13:00')
+    expected = schedule(calendar)
+    calendar.close()
+    calendar = P11_Calendar(make_store(tmp_path))
+    assert schedule(calendar) == expected
+    assert ('01/12/2026', '13:00') not in expected and ('01/19/2026', '13:00') in expected
+    calendar.close()
+
+
+def test_log_store_replays_only_the_log_after_the_snapshot(tmp_path):
+    calendar = P11_Calendar(P11_LogStore(str(tmp_path), snapshot_every=2, sync=False))
+    for date in ('01/05/2026', '01/06/2026', '01/07/2026'):
+        assert calendar.add_event(P11_Event(date, '9:00', 60, 'meeting'))
+    with open(os.path.join(str(tmp_path), 'snapshot.json')) as fp:
+        assert len(json.load(fp)['events']) == 2
+    with open(os.path.join(str(tmp_path), 'events.log')) as fp:
+        assert [json.loads(line)['date'] for line in fp] == ['01/07/2026']
+    assert len(schedule(open_calendar(tmp_path))) == 3
@@ -0,0 +1,274 @@
+import json
+import os
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import Project_1
+
+
+def skaters_frame():
+    return pd.DataFrame({
+        "Player Name": ["A", "B", "C", "D", "E", "F", "G"],
+        "Team": ["BOS", "BOS", "TOR", "TOR", "TOR", "BOS", None],
+        "Pos": ["C", "D", "C", "D", "D", "C", "C"],
+        "G": [10, 3, 7, 2, 5, 1, 4],
+        "Hits": [5, 50, 20, 80, 10, 1, 3],
+        "PIM": [2, 20, 4, 30, 6, 0, 8],
+    })
+
+
+def grouped(df, boards, by, position=None, workers=None):
+    handler = Project_1.PlayerHandler(df)
+    return handler.grouped_leaderboards(boards, by, position, workers)
+
+
+def test_grouped_boards_from_db_match_csv_data(tmp_path):
+    db_path = str(tmp_path / "players.db")
+    df = skaters_frame().dropna(subset=["Team"])
+    Project_1.SQL.ingest_dataframe(df, "skaters", db_path)
+    handlers = Project_1.build_handlers([("goals", 1), ("hits", 2)], None, db_path, rank=False)
+    boards = {"G": 1, "Hits": 2}
+    for by, position in ((["Team"], None), (["Pos"], None), (["Team", "Pos"], None), (["Team"], "D")):
+        expected = grouped(df.copy(), boards, by, position)
+        actual = handlers["skaters"].grouped_leaderboards(boards, by, position)
+        for column in boards:
+            pd.testing.assert_frame_equal(actual[column], expected[column], check_dtype=False)
+
+
+def test_grouped_boards_pool_keeps_missing_teams():
+    boards = {"G": 2}
+    serial = grouped(skaters_frame(), boards, ["Team"])
+    pooled = grouped(skaters_frame(), boards, ["Team"], workers=2)
+    pd.testing.assert_frame_equal(pooled["G"], serial["G"])
+    assert pooled["G"]["Player Name"].tolist().count("G") == 1
+
+
+def test_stats_cache_cold_and_warm_reads_match(tmp_path):
+    csv_path = tmp_path / "stats.csv"
+    csv_path.write_text("Skaters\n"
+                        "Player Name,Team,Pos,G,Hits,SV%\n"
+                        "A,BOS,C,10,5,\n"
+                        "B,,D,3,,0.915\n"
+                        "C,TOR,,7,20,0.9\n")
+    cache_dir = str(tmp_path / "cache")
+    expected = Project_1.read_stats_csv(str(csv_path), None, None)
+    cold = Project_1.read_stats_csv(str(csv_path), None, cache_dir)
+    warm = Project_1.read_stats_csv(str(csv_path), None, cache_dir)
+    pd.testing.assert_frame_equal(cold, expected)
+    pd.testing.assert_frame_equal(warm, expected)
+    assert pd.isna(warm.loc[1, "Team"]) and pd.isna(warm.loc[2, "Pos"])
+    columns = ["Player Name", "Team"]
+    pd.testing.assert_frame_equal(Project_1.read_stats_csv(str(csv_path), columns, cache_dir), expected[columns])
+
+
+def test_stats_cache_keeps_files_with_the_same_name_apart(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    frames = []
+    for directory, goals in (("a", 1), ("b", 2)):
+        (tmp_path / directory).mkdir()
+        csv_path = tmp_path / directory / "stats.csv"
+        csv_path.write_text(f"Skaters\nPlayer Name,Team,G\nA,BOS,{goals}\n")
+        frames.append(Project_1.read_stats_csv(str(csv_path), None, cache_dir))
+    for directory, goals in (("a", 1), ("b", 2)):
+        warm = Project_1.read_stats_csv(str(tmp_path / directory / "stats.csv"), None, cache_dir)
+        assert warm["G"].tolist() == [goals]
+    assert len([name for name in os.listdir(cache_dir) if name.endswith(".npz")]) == 2
+
+
+def test_aggregate_stats_keeps_namesakes_apart():
+    chunks = [
+        pd.DataFrame({"Player Name": ["Sebastian Aho", "Sebastian Aho", "X"], "Team": ["CAR", "NYI", "BOS"],
+                      "Pos": ["C", "D", None], "G": [30, 5, 1], "Hits": [40, 90, 2]}),
+        pd.DataFrame({"Player Name": ["Sebastian Aho", "X"], "Team": ["CAR", "BOS"], "Pos": ["C", None],
+                      "G": [2, 1], "Hits": [3, 1]}),
+    ]
+    skaters = Project_1.aggregate_stats(iter(chunks))["skaters"]
+    assert skaters[["Player Name", "Pos", "G", "Hits"]].fillna({"Pos": "-"}).values.tolist() == [
+        ["Sebastian Aho", "C", 32, 43], ["Sebastian Aho", "D", 5, 90], ["X", "-", 2, 3]]
+
+
+def test_leaderboard_state_updates_match_full_aggregation(tmp_path):
+    path = str(tmp_path / "state.jsonl")
+    nights = [
+        pd.DataFrame({"Player Name": ["A", "B", "C", "A"], "Team": "BOS", "Pos": ["C", "D", "C", "D"],
+                      "G": [3, 2, 1, 1], "Hits": [1, 5, 2, 0], "PIM": [0, 2, 4, 1]}),
+        # a correction takes goals away from the leader, so someone off the board moves up
+        pd.DataFrame({"Player Name": ["A", "D"], "Team": "TOR", "Pos": ["C", "C"],
+                      "G": [-3, 2], "Hits": [0, 1], "PIM": [0, 0]}),
+    ]
+    for night in nights:
+        state = Project_1.LeaderboardState.load(path, capacity=2)
+        state.apply(night)
+        state.save(path)
+    with open(path) as fp:
+        assert len(fp.readlines()) == 2
+    state = Project_1.LeaderboardState.load(path, capacity=2)
+    expected = Project_1.aggregate_stats(iter(nights))["skaters"]
+    for column in ("G", "Hits", "PIM"):
+        actual = Project_1.PlayerHandler(state.tables()["skaters"]).leaderboards({column: 2})[column]
+        best = Project_1.PlayerHandler(expected.copy()).leaderboards({column: 2})[column]
+        assert actual[["Player Name", "Pos", column]].values.tolist() == best[["Player Name", "Pos", column]].values.tolist()
+
+
+def test_roster_codes_hold_more_than_256_teams():
+    df = pd.DataFrame({"Player Name": [f"P{i}" for i in range(300)], "Team": [f"T{i:03d}" for i in range(300)],
+                       "Pos": "C", "G": 1, "Hits": 2, "PIM": 3})
+    roster = Project_1.Roster.concat([Project_1.Roster.from_dataframe(df), Project_1.Roster.from_dataframe(df.tail(2))])
+    assert [roster[i].team for i in (0, 299, 300, 301)] == ["T000", "T299", "T298", "T299"]
+    assert roster.to_dataframe()["Team"].astype(str).tolist() == df["Team"].tolist() + ["T298", "T299"]
+
+
+def test_csv_output_is_one_table(tmp_path, capsys):
+    import io
+    skaters = tmp_path / "skaters.csv"
+    skaters.write_text("Skaters\nPlayer Name,Team,Pos,G,Hits,PIM\nA,BOS,C,10,5,2\nB,TOR,D,3,50,20\nC,TOR,C,7,20,4\n")
+    goalies = tmp_path / "goalies.csv"
+    goalies.write_text("Goalies\nPlayer Name,Team,SV,SA\nG1,BOS,90,100\nG2,TOR,95,100\n")
+    for flags, boards in (([], ["G", "G", "Hits", "Hits", "SV%", "SV%"]),
+                          (["--per-position"], ["G", "G", "G", "Hits", "Hits", "Hits", "SV%", "SV%"])):
+        Project_1.main(["-tgs", "2", "-bh", "2", "-bg", "2", "--format", "csv", "--inputs", str(skaters),
+                        str(goalies)] + flags)
+        out = capsys.readouterr().out
+        table = pd.read_csv(io.StringIO(out))
+        assert "\n\n" not in out
+        assert sorted(table["board"]) == sorted(boards)
+        assert list(table.columns[:1]) == ["board"] and list(table.columns[-4:]) == ["Rank", "Player Name",
+                                                                                   "Team Name", "value"]
+
+
+def test_profiler_leaves_tracing_it_did_not_start():
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        profiler = Project_1.Profiler()
+        profiler.start()
+        with profiler.stage("work"):
+            pass
+        profiler.stop()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    profiler = Project_1.Profiler()
+    profiler.start()
+    profiler.stop()
+    assert not tracemalloc.is_tracing()
+
+
+def test_stats_cache_is_reused_until_the_csv_changes(tmp_path, monkeypatch):
+    csv_path = tmp_path / "stats.csv"
+    csv_path.write_text("Skaters\nPlayer Name,Team,G\nA,BOS,1\n")
+    cache_dir = str(tmp_path / "cache")
+    read_csv = pd.read_csv
+    Project_1.read_stats_csv(str(csv_path), None, cache_dir)
+
+    def no_parse(*args, **kwargs):
+        raise AssertionError("the CSV was parsed again")
+    monkeypatch.setattr(pd, "read_csv", no_parse)
+    assert Project_1.read_stats_csv(str(csv_path), ["G"], cache_dir)["G"].tolist() == [1]
+    os.utime(csv_path, ns=(1, 1))
+    assert Project_1.read_stats_csv(str(csv_path), ["G"], cache_dir)["G"].tolist() == [1]
+    monkeypatch.setattr(pd, "read_csv", read_csv)
+    csv_path.write_text("Skaters\nPlayer Name,Team,G\nA,BOS,2\n")
+    assert Project_1.read_stats_csv(str(csv_path), ["G"], cache_dir)["G"].tolist() == [2]
+
+
+def test_roster_round_trips_players_and_goalies():
+    players = [Project_1.Player("A", "BOS", "C", 10, 2, 5), Project_1.Goalie("G", "TOR", 900, 80),
+               Project_1.Player("B", "TOR", "D", 3, 20, 50)]
+    assert not any(hasattr(player, "__dict__") for player in players)
+    roster = Project_1.Roster.from_players(players)
+    df = roster.to_dataframe()
+    assert df["SA"].tolist() == [pd.NA, 980, pd.NA]
+    assert df["Hits"].tolist() == [5, pd.NA, 50]
+    back = Project_1.Roster.from_dataframe(df[df["Pos"] != "Goalie"])
+    assert [(p.name, p.team, p.position, p.goals, p.penalty_minutes, p.hits) for p in back] ==\
+            [("A", "BOS", "C", 10, 2, 5), ("B", "TOR", "D", 3, 20, 50)]
+    goalie = roster.to_players()[1]
+    assert (type(goalie), goalie.saves, goalie.goals_allowed) == (Project_1.Goalie, 900, 80)
+
+
+def test_render_leaderboard_formats():
+    board = pd.DataFrame({"Player Name": ["A|B", "C"], "Team Name": ["Boston Bruins", "Toronto Maple Leafs"],
+                          "G": [10, 7]}, index=[5, 2])
+    assert Project_1.render_leaderboard(board, "G", "text", "Top:\n") ==\
+            ("Top:\nTop scorer #:1 A|B from Boston Bruins scored 10 goals.\n"
+             "Top scorer #:2 C from Toronto Maple Leafs scored 7 goals.\n")
+    jsonl = Project_1.render_leaderboard(board, "G", "jsonl").splitlines()
+    assert [json.loads(line)["Rank"] for line in jsonl] == [1, 2]
+    markdown = Project_1.render_leaderboard(board, "G", "markdown").splitlines()
+    assert markdown[0] == "| Rank | Player Name | Team Name | G |"
+    assert markdown[2] == "| 1 | A\\|B | Boston Bruins | 10 |"
+    with pytest.raises(ValueError):
+        Project_1.render_leaderboard(board, "G", "html")
+
+
+def test_aggregate_stats_streams_season_files(tmp_path):
+    (tmp_path / "2022.csv").write_text("Skaters\nPlayer Name,Team,Pos,G,Hits,PIM\nA,BOS,C,10,5,2\nB,TOR,D,3,50,20\n")
+    (tmp_path / "2023.csv").write_text("Skaters\nPlayer Name,Team,Pos,G,Hits,PIM\nB,TOR,D,4,10,0\nA,BOS,C,1,1,1\n"
+                                       "C,TOR,C,7,20,4\n")
+    (tmp_path / "goalies.csv").write_text("Goalies\nPlayer Name,Team,SV,SA\nG,BOS,90,100\nG,BOS,300,310\n")
+    paths = Project_1.expand_inputs([str(tmp_path)])
+    assert [os.path.basename(path) for path in paths] == ["2022.csv", "2023.csv", "goalies.csv"]
+    tables = Project_1.aggregate_stats(Project_1.iter_stat_chunks(paths, chunksize=1))
+    skaters = tables["skaters"]
+    assert skaters[["Player Name", "G", "Hits", "PIM"]].values.tolist() ==\
+            [["A", 11, 6, 3], ["B", 7, 60, 20], ["C", 7, 20, 4]]
+    # Save percentage comes from the summed saves and shots, not the average of 0.9 and 0.968
+    assert tables["goalies"][["SV", "SA", "SV%"]].values.tolist() == [[390, 410, 0.951]]
+
+
+def test_grouped_leaderboards_rank_every_team_and_position():
+    df = skaters_frame().dropna(subset=["Team"])
+    boards = grouped(df, {"Hits": 1, "G": 2}, ["Team", "Pos"])
+    expected = []
+    for (team, pos), rows in df.groupby(["Team", "Pos"]):
+        best = rows.sort_values("Hits", ascending=False, kind="stable").head(1)
+        expected += [[team, pos, rank, name] for rank, name in enumerate(best["Player Name"], 1)]
+    assert boards["Hits"][["Team", "Pos", "Rank", "Player Name"]].values.tolist() == expected
+    assert boards["G"].groupby(["Team", "Pos"]).size().max() == 2
+    pooled = grouped(df, {"Hits": 1, "G": 2}, ["Team", "Pos"], workers=2)
+    for column in ("Hits", "G"):
+        pd.testing.assert_frame_equal(pooled[column], boards[column])
+    centers = grouped(df, {"G": 5}, ["Team"], position="C")["G"]
+    assert centers["Player Name"].tolist() == ["A", "F", "C"]
+
+
+def test_update_state_reranks_goalies_from_summed_saves(tmp_path):
+    path = str(tmp_path / "state.jsonl")
+    (tmp_path / "night1.csv").write_text("Goalies\nPlayer Name,Team,SV,SA\nG1,BOS,90,100\nG2,TOR,50,52\n")
+    (tmp_path / "night2.csv").write_text("Goalies\nPlayer Name,Team,SV,SA\nG1,BOS,300,310\nG2,TOR,0,10\n")
+    state = Project_1.update_state(path, [str(tmp_path / "night1.csv")])
+    assert state.top("SV%", 2) == ["G2", "G1"]
+    Project_1.update_state(path, [str(tmp_path / "night2.csv")])
+    with open(path, "a") as fp:
+        fp.write('{"next_seq": 9, "players"')
+    state = Project_1.LeaderboardState.load(path)
+    assert state.top("SV%", 2) == ["G1", "G2"]
+    goalies = state.tables()["goalies"]
+    assert goalies[["Player Name", "SV", "SA", "SV%"]].values.tolist() == [["G1", 390, 410, 0.951],
+                                                                          ["G2", 50, 62, 0.806]]
+    with open(path) as fp:
+        assert fp.read().endswith("}\n")
+
+
+def test_profile_reports_stages_as_json_or_a_cprofile_dump(tmp_path, capsys):
+    import pstats
+    import tracemalloc
+    skaters = tmp_path / "skaters.csv"
+    skaters.write_text("Skaters\nPlayer Name,Team,Pos,G,Hits,PIM\nA,BOS,C,10,5,2\nB,TOR,D,3,50,20\n")
+    report_path = str(tmp_path / "profile.json")
+    Project_1.main(["-tgs", "1", "--inputs", str(skaters), "--profile", "--profile-output", report_path])
+    with open(report_path) as fp:
+        report = json.load(fp)
+    stages = {stage["stage"]: stage for stage in report["stages"]}
+    assert stages["total"]["depth"] == 0 and stages["goal_scorers_analysis"]["rows"] == 2
+    assert all(stage["seconds"] >= 0 and stage["peak_memory_bytes"] >= 0 for stage in report["stages"])
+    assert report["summary"]["rank"]["calls"] == 2
+    dump_path = str(tmp_path / "run.prof")
+    Project_1.main(["-tgs", "1", "--inputs", str(skaters), "--profile", "--profile-format", "cprofile",
+                    "--profile-output", dump_path])
+    assert pstats.Stats(dump_path).total_calls > 0
+    assert not tracemalloc.is_tracing()
+    assert "A from" in capsys.readouterr().out
@@ -0,0 +1,25 @@
+import subprocess
+import sys
+
+import Project_1_benchmark
+
+
+def test_import_and_help_load_no_heavy_modules():
+    probe = Project_1_benchmark.IMPORT_PROBE.format(heavy=Project_1_benchmark.HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", probe], cwd=Project_1_benchmark.HERE,\
+            capture_output=True, text=True, check=True)
+    assert result.stdout.split()[1:] == []
+    result = subprocess.run([sys.executable, "Project_1.py", "--help"], cwd=Project_1_benchmark.HERE,\
+            capture_output=True, text=True, check=True)
+    assert result.stdout.startswith("usage:")
+
+
+def test_check_reports_budgets_and_regressions():
+    results = {"import_ms": 30.0, "help_first_output_ms": 90.0, "heavy_modules_on_import": []}
+    budgets = {"import_ms": 50.0, "help_first_output_ms": 80.0}
+    assert Project_1_benchmark.check(results, budgets) == ["help_first_output_ms 90.0 ms exceeds the 80.0 ms budget"]
+    failures = Project_1_benchmark.check(results, {"import_ms": 50.0}, {"import_ms": 10.0})
+    assert failures == ["import_ms 30.0 ms regressed from the 10.0 ms baseline"]
+    # A baseline saved without a measurement skips it instead of failing
+    assert Project_1_benchmark.check(results, budgets, {"help_first_output_ms": 100.0}) ==\
+            ["help_first_output_ms 90.0 ms exceeds the 80.0 ms budget"]
@@ -0,0 +1,152 @@
+import json
+import os
+
+import pytest
+
+import Project_3
+
+
+def annotation_lines(first, count):
+    lines = []
+    for image_id in range(first, first + count):
+        labels = [1 + image_id % 3, 1 + image_id % 5, 2]
+        captions = ["a dog and a cat %d" % (image_id % 7), "the red car"]
+        lines.append(json.dumps({"image_id": image_id, "bbox_category_label": labels, "cap_list": captions}) + "\n")
+    return lines
+
+
+@pytest.fixture
+def dataset_files(tmp_path):
+    cat_path = tmp_path / "categories.txt"
+    cat_path.write_text("1 cat\n2 dog\n3 car\n4 tree\n5 bike\n")
+    json_path = tmp_path / "annotations.jsonl"
+    json_path.write_text("".join(annotation_lines(0, 200)))
+    return str(json_path), str(cat_path)
+
+
+def same_statistics(a, b):
+    (index_a, words_a), (index_b, words_b) = a, b
+    assert index_a.categories() == index_b.categories()
+    for s in index_b.categories():
+        assert list(index_a.image_ids(s)) == list(index_b.image_ids(s))
+        assert list(index_a.image_instances(s)) == list(index_b.image_instances(s))
+        assert index_a.instance_count(s) == index_b.instance_count(s)
+    assert list(index_a.all_image_ids()) == list(index_b.all_image_ids())
+    assert Project_3.top_words(words_a, 100) == Project_3.top_words(words_b, 100)
+
+
+def test_appended_lines_update_the_saved_index(dataset_files, monkeypatch):
+    json_path, cat_path = dataset_files
+    Project_3.load_or_build_index(json_path, cat_path)
+    with open(json_path, "a") as fp:
+        fp.writelines(annotation_lines(200, 25))
+    scanned = []
+    scan_shard = Project_3.scan_shard
+    monkeypatch.setattr(Project_3, "scan_shard", lambda task: scanned.append(task[1:3]) or scan_shard(task))
+    incremental = Project_3.load_or_build_index(json_path, cat_path)
+    assert scanned == [(len("".join(annotation_lines(0, 200))), os.path.getsize(json_path))]
+    full = Project_3.load_or_build_index(json_path, cat_path, index_path="")
+    same_statistics(incremental, full)
+    #the rewritten index is opened as is on the next run
+    same_statistics(Project_3.load_or_build_index(json_path, cat_path), full)
+
+
+def test_edit_before_an_append_rebuilds_the_index(dataset_files, monkeypatch):
+    json_path, cat_path = dataset_files
+    Project_3.load_or_build_index(json_path, cat_path)
+    lines = annotation_lines(0, 200)
+    #change the first record without changing the file's size, then append
+    lines[0] = lines[0].replace('"image_id": 0', '"image_id": 9')
+    with open(json_path, "w") as fp:
+        fp.writelines(lines + annotation_lines(200, 5))
+    monkeypatch.setattr(Project_3, "scan_shard", None)
+    rebuilt = Project_3.load_or_build_index(json_path, cat_path)
+    same_statistics(rebuilt, Project_3.load_or_build_index(json_path, cat_path, index_path=""))
+
+
+def test_dataset_update_matches_a_full_scan(dataset_files):
+    json_path, cat_path = dataset_files
+    dataset = Project_3.ImageDataset.open(json_path, cat_path)
+    before = dataset.top_categories(5)
+    records = [record for line in annotation_lines(200, 25) for record in Project_3.object_records(json.loads(line))]
+    assert dataset.update(records) == 25
+    with open(json_path, "a") as fp:
+        fp.writelines(annotation_lines(200, 25))
+    full = Project_3.ImageDataset.open(json_path, cat_path, index_path="")
+    same_statistics((dataset.index, dataset.words), (full.index, full.words))
+    assert dataset.top_categories(5) == full.top_categories(5) != before
+    assert dataset.top_categories(5, "images") == full.top_categories(5, "images")
+    assert dataset.max_instances() == full.max_instances()
+
+
+def test_top_categories_rejects_negative_k(dataset_files):
+    dataset = Project_3.ImageDataset.open(*dataset_files, index_path="")
+    reply = dataset.answer({"op": "top_categories", "k": -1})
+    assert reply["ok"] is False
+    assert dataset.top_categories(0) == []
+
+
+def test_top_pairs_match_counting_every_pair(dataset_files):
+    pytest.importorskip("scipy")
+    import math
+    dataset = Project_3.ImageDataset.open(*dataset_files, index_path="")
+    images = {s: set(dataset.index.image_ids(s)) for s in dataset.categories()}
+    total = len(dataset.index.all_image_ids())
+    pairs = []
+    for a in sorted(images):
+        for b in sorted(images):
+            both = len(images[a] & images[b])
+            if a < b and both >= 2:
+                lift = both * total / (len(images[a]) * len(images[b]))
+                pairs.append((a, b, both, lift, math.log(lift)))
+    for column, by in enumerate(("count", "lift", "pmi"), 2):
+        expected = sorted(pairs, key=lambda x: (-round(x[column], 9), x[0], x[1]))[:4]
+        result = dataset.top_pairs(4, by, min_count=2)
+        assert [x[:3] for x in result] == [x[:3] for x in expected]
+        assert [x[3:] for x in result] == [pytest.approx(x[3:]) for x in expected]
+        for a, b, both, lift, pmi in result:
+            assert dataset.cooccurrence().pair(a, b) == (both, lift, pmi)
+
+
+def test_lowercased_captions_still_drop_stop_words():
+    assert Project_3.caption_tokens('I saw I and The dog', lower=True) == ['saw', 'dog']
+    assert Project_3.caption_tokens('I saw I and The dog') == ['saw', 'The', 'dog']
+
+
+def test_list_helpers_give_the_old_results():
+    D_cat = {1: "cat", 2: "dog", 3: "car"}
+    D_annot = {"12": {"bbox_category_label": [2, 1, 2], "cap_list": []},
+               "3": {"bbox_category_label": [2, 9], "cap_list": []},
+               "7": {"bbox_category_label": [], "cap_list": []}}
+    cat_set = Project_3.collect_catogory_set(D_annot, D_cat)
+    assert cat_set == {"cat", "dog"}
+    D_image = Project_3.collect_img_list_for_categories(D_annot, D_cat, cat_set | {"car"})
+    assert D_image == {"cat": ["12"], "dog": ["12", "12", "3"], "car": []}
+    assert Project_3.max_instances_for_item(D_image) == (3, "dog")
+    assert Project_3.max_images_for_item(D_image) == (2, "dog")
+
+
+def test_cooccurrence_matrices_from_a_saved_index(dataset_files, tmp_path):
+    pytest.importorskip("scipy")
+    with open(dataset_files[0], "a") as fp:
+        fp.write(json.dumps({"image_id": 999, "bbox_category_label": [], "cap_list": []}) + "\n")
+    index_path = str(tmp_path / "annotations.idx")
+    Project_3.ImageDataset.open(*dataset_files, index_path=index_path)
+    dataset = Project_3.ImageDataset.open(*dataset_files, index_path=index_path)
+    assert isinstance(dataset.index, Project_3.MappedIndex)
+    matrices = dataset.cooccurrence()
+    categories = dataset.categories()
+    X = Project_3.incidence_matrix(dataset.index, categories).toarray()
+    assert X.shape == (201, len(categories)) and not X[-1].any()
+    assert (matrices.counts.toarray() == X.T @ X).all()
+    assert matrices.images == 201
+    assert matrices.pair("cat", "cat")[0] == len(dataset.index.image_ids("cat"))
+    shared = X.T @ X
+    i, j = max(((i, j) for i in range(len(categories)) for j in range(i + 1, len(categories))),
+               key=lambda x: (shared[x], -x[0], -x[1]))
+    reply = dataset.answer({"op": "top_pairs", "n": 1})
+    assert reply["ok"] is True
+    assert reply["result"][0]["categories"] == [categories[i], categories[j]]
+    assert reply["result"][0]["count"] == shared[i, j]
+    with pytest.raises(ValueError):
+        matrices.pair("cat", "unicorn")